@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+# End-to-end load benchmark of the API.
+#
+# Seeds a synthetic dataset into a local stand-in store (DATABASE_BACKEND
+# memory or sqlite, see database/local_backend.py), starts the FastAPI app from
+# main.py in-process with its lifespan hook, waits for the backend warm-up
+# (services/startup.py) and drives each endpoint with concurrent clients over
+# httpx's ASGI transport. For every endpoint it reports latency percentiles,
+# requests/sec and the backend calls made per request; `--output` writes the
+# results as JSON and `--compare` prints the relative change against a
+# previous run.
+#
+#   python -m benchmarks.load --requests 2000 --concurrency 32 --output bench.json
+#   python -m benchmarks.load --compare bench.json
+#
+# Firebase Auth is replaced by a stand-in accepting the "bench-<uid>" tokens
+# handed to the clients, so /auth/me measures the app's own token handling.
+
+TOKEN_PREFIX = "bench-"
+
+SKILLS = [
+    "python", "javascript", "typescript", "java", "kotlin", "swift", "go", "rust", "c++", "c#",
+    "sql", "postgresql", "mongodb", "react", "vue.js", "angular", "node.js", "django", "fastapi",
+    "spring", "docker", "kubernetes", "aws", "azure", "gcp", "terraform", "linux", "git",
+    "machine learning", "deep learning", "data analysis", "pandas", "tensorflow", "pytorch",
+    "cybersécurité", "réseaux", "devops", "ui design", "ux research", "figma", "gestion de projet",
+    "scrum", "marketing digital", "seo", "comptabilité", "finance", "communication", "anglais"
+]
+LEVELS = ["débutant", "intermédiaire", "avancé", "expert"]
+OPPORTUNITY_TYPES = ["stage", "alternance", "emploi", "projet", "freelance"]
+
+
+def _configure_environment(backend: str):
+    """Must run before the app modules are imported: settings are read at import"""
+    os.environ["DATABASE_BACKEND"] = backend
+    os.environ.setdefault("REPLICA_ENABLED", "false")
+    os.environ.setdefault("JOB_QUEUE_JOURNAL", "")
+    os.environ.setdefault("REQUEST_LOG_ENABLED", "false")
+    if backend == "sqlite":
+        os.environ.setdefault("SQLITE_DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.sqlite3"))
+
+
+class BackendCounter:
+    """Counts the Database handle calls (one per backend round trip)"""
+
+    OPERATIONS = ("get", "set", "update", "remove", "push")
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def install(self, database_class):
+        for operation in self.OPERATIONS:
+            setattr(database_class, operation, self._wrap(operation, getattr(database_class, operation)))
+
+    def _wrap(self, operation, method):
+        def counted(handle, *args, **kwargs):
+            with self._lock:
+                self.counts[operation] += 1
+            return method(handle, *args, **kwargs)
+        return counted
+
+    def count(self, operation: str):
+        with self._lock:
+            self.counts[operation] += 1
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.counts)
+
+
+def _install_auth_stand_in(counter: BackendCounter):
+    from firebase_admin import auth
+
+    def verify_id_token(token, *args, **kwargs):
+        counter.count("verify_id_token")
+        if not token.startswith(TOKEN_PREFIX):
+            raise ValueError("Unknown benchmark token")
+        return {"uid": token[len(TOKEN_PREFIX):], "exp": time.time() + 3600}
+
+    auth.verify_id_token = verify_id_token
+
+
+def build_dataset(sizes: dict, seed: int) -> dict:
+    """Multi-path updates (root paths -> values) for a synthetic dataset"""
+    from database import indexes
+
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    updates = {}
+
+    def created_at(i):
+        return (now + timedelta(minutes=i)).isoformat()
+
+    student_ids = [f"student-{i:06d}" for i in range(sizes["students"])]
+    professional_ids = [f"professional-{i:06d}" for i in range(sizes["professionals"])]
+    company_ids = [f"company-{i:06d}" for i in range(sizes["companies"])]
+
+    for i, uid in enumerate(student_ids):
+        skills = rng.sample(SKILLS, rng.randint(2, 8))
+        validated = {skill: rng.choice(LEVELS) for skill in skills[:rng.randint(1, len(skills))]}
+        updates[f"students/{uid}"] = {
+            "id": uid, "email": f"{uid}@bench.local", "first_name": "Étudiant", "last_name": str(i),
+            "school": "École Bench", "formation": "Informatique", "year_of_study": rng.randint(1, 5),
+            "competences": skills, "validated_skills": validated, "user_type": "student",
+            "profile_complete": True, "created_at": created_at(i)
+        }
+        updates[f"users/{uid}"] = {"email": f"{uid}@bench.local", "user_type": "student", "profile_complete": True}
+
+    for i, uid in enumerate(professional_ids):
+        updates[f"professionals/{uid}"] = {
+            "id": uid, "email": f"{uid}@bench.local", "first_name": "Pro", "last_name": str(i),
+            "company": "Bench SA", "position": "Senior", "expertise_domains": rng.sample(SKILLS, rng.randint(1, 4)),
+            "years_experience": rng.randint(2, 25), "validation_count": 0, "rating": 0.0,
+            "user_type": "professional", "verified": True, "created_at": created_at(i)
+        }
+        updates[f"users/{uid}"] = {"email": f"{uid}@bench.local", "user_type": "professional", "verified": True}
+
+    for i, uid in enumerate(company_ids):
+        updates[f"companies/{uid}"] = {
+            "id": uid, "email": f"{uid}@bench.local", "name": f"Entreprise {i}", "sector": "Tech",
+            "size": "PME", "description": "Entreprise de benchmark", "city": "Paris", "country": "France",
+            "contact_person": "Contact", "contact_position": "RH", "active_offers": 0,
+            "user_type": "company", "verified": True, "created_at": created_at(i)
+        }
+        updates[f"users/{uid}"] = {"email": f"{uid}@bench.local", "user_type": "company", "verified": True}
+
+    for i in range(sizes["opportunities"] if company_ids else 0):
+        opp_id = f"opportunity-{i:06d}"
+        opportunity = {
+            "id": opp_id, "title": f"Offre {i}", "company_id": rng.choice(company_ids),
+            "type": rng.choice(OPPORTUNITY_TYPES), "description": "Offre de benchmark",
+            "required_skills": rng.sample(SKILLS, rng.randint(1, 4)),
+            "preferred_skills": rng.sample(SKILLS, rng.randint(0, 3)),
+            "location": "Paris", "remote_possible": rng.random() < 0.5, "applications_count": 0,
+            "views_count": 0, "status": "active", "created_at": created_at(i)
+        }
+        updates[f"opportunities/{opp_id}"] = opportunity
+        updates.update(indexes.opportunity_entries(opp_id, opportunity))
+
+    for i in range(sizes["validations"] if student_ids else 0):
+        validation_id = f"validation-{i:06d}"
+        validation = {
+            "id": validation_id, "student_id": rng.choice(student_ids), "skill_name": rng.choice(SKILLS),
+            "level_claimed": rng.choice(LEVELS), "evidence_description": "Projet de benchmark",
+            "status": "en_attente", "created_at": created_at(i)
+        }
+        updates[f"skill_validations/{validation_id}"] = validation
+        updates.update(indexes.validation_entries(validation_id, validation))
+
+    return updates
+
+
+def seed(updates: dict, chunk_size: int = 2000):
+    from database.firebase import get_app
+
+    items = list(updates.items())
+    for start in range(0, len(items), chunk_size):
+        get_app().database().update(dict(items[start:start + chunk_size]))
+
+
+def build_scenarios(sizes: dict, seed_value: int) -> list:
+    """(name, method, path, request builder) for each benchmarked endpoint"""
+    rng = random.Random(seed_value + 1)
+
+    def token_for(prefix, count):
+        return lambda: {"Authorization": f"Bearer {TOKEN_PREFIX}{prefix}-{rng.randrange(count):06d}"}
+
+    student = token_for("student", sizes["students"])
+    professional = token_for("professional", sizes["professionals"])
+
+    def new_opportunity():
+        company_id = f"company-{rng.randrange(sizes['companies']):06d}"
+        return {
+            "headers": {"Authorization": f"Bearer {TOKEN_PREFIX}{company_id}"},
+            "json": {
+                "title": "Offre benchmark", "company_id": company_id, "type": rng.choice(OPPORTUNITY_TYPES),
+                "description": "Créée pendant le benchmark", "required_skills": rng.sample(SKILLS, rng.randint(1, 4)),
+                "preferred_skills": rng.sample(SKILLS, rng.randint(0, 2)), "location": "Lyon"
+            }
+        }
+
+    return [
+        ("GET /auth/me", "GET", "/auth/me", lambda: {"headers": student()}),
+        ("GET /matching/recommendations", "GET", "/matching/recommendations", lambda: {"headers": student()}),
+        ("GET /skills/pending-validations", "GET", "/skills/pending-validations",
+         lambda: {"headers": professional()}),
+        ("POST /matching/opportunities", "POST", "/matching/opportunities", new_opportunity),
+    ]
+
+
+def _percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = q * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+async def run_scenario(client, counter: BackendCounter, job_queue, scenario, requests: int,
+                       concurrency: int, warmup: int) -> dict:
+    name, method, path, build = scenario
+    for _ in range(warmup):
+        await client.request(method, path, **build())
+    await job_queue.join()
+
+    latencies = []
+    statuses = Counter()
+    remaining = iter(range(requests))
+
+    async def client_loop():
+        for _ in remaining:
+            kwargs = build()
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    before = counter.snapshot()
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    # Les tâches de fond déclenchées par ces requêtes font partie de leur coût
+    await job_queue.join()
+    calls = counter.snapshot() - before
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+        "requests_per_second": requests / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": 1000 * _percentile(latencies, 0.50),
+            "p95": 1000 * _percentile(latencies, 0.95),
+            "p99": 1000 * _percentile(latencies, 0.99),
+            "max": 1000 * latencies[-1] if latencies else 0.0
+        },
+        "backend_calls_per_request": {operation: count / requests for operation, count in sorted(calls.items())},
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run(args) -> dict:
+    _configure_environment(args.backend)
+
+    import httpx
+    from database.local_backend import LocalDatabase
+    from main import app
+    from services.job_queue import job_queue
+    from services import recommendations
+    from services.startup import warm_up
+
+    counter = BackendCounter()
+    counter.install(LocalDatabase)
+    _install_auth_stand_in(counter)
+
+    sizes = {
+        "students": args.students, "professionals": args.professionals, "companies": args.companies,
+        "opportunities": args.opportunities, "validations": args.validations
+    }
+    seed_started = time.perf_counter()
+    seed(build_dataset(sizes, args.seed))
+    seed_seconds = time.perf_counter() - seed_started
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        # Mesures sur des backends préchauffés, comme un worker déclaré prêt
+        while not warm_up.ready:
+            await asyncio.sleep(0.01)
+        # Listes de recommandations matérialisées, comme après un déploiement
+        await recommendations.rebuild()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in build_scenarios(sizes, args.seed):
+                if args.endpoint and not any(pattern in scenario[0] for pattern in args.endpoint):
+                    continue
+                results[scenario[0]] = await run_scenario(client, counter, job_queue, scenario, args.requests,
+                                                          args.concurrency, args.warmup)
+                print(_format_line(scenario[0], results[scenario[0]]), flush=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "dataset": sizes,
+            "seed": args.seed,
+            "seed_seconds": seed_seconds,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup
+        },
+        "endpoints": results
+    }
+
+
+def _format_line(name: str, result: dict) -> str:
+    latency = result["latency_ms"]
+    calls = sum(result["backend_calls_per_request"].values())
+    return (f"{name:<36} {result['requests_per_second']:>9.1f} req/s  p50 {latency['p50']:>8.2f} ms  "
+            f"p95 {latency['p95']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms  "
+            f"calls/req {calls:>6.2f}  errors {result['errors']}")
+
+
+def compare(baseline: dict, current: dict):
+    """Print the relative change of every endpoint against a previous run"""
+    print(f"\nComparison with {baseline['meta'].get('commit') or 'baseline'}:")
+    for name, result in current["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if not previous:
+            print(f"{name:<36} (absent de la référence)")
+            continue
+        changes = []
+        for label, old, new in [
+            ("req/s", previous["requests_per_second"], result["requests_per_second"]),
+            ("p50", previous["latency_ms"]["p50"], result["latency_ms"]["p50"]),
+            ("p95", previous["latency_ms"]["p95"], result["latency_ms"]["p95"]),
+            ("p99", previous["latency_ms"]["p99"], result["latency_ms"]["p99"]),
+            ("calls/req", sum(previous["backend_calls_per_request"].values()),
+             sum(result["backend_calls_per_request"].values())),
+        ]:
+            changes.append(f"{label} {100 * (new - old) / old:+.1f}%" if old else f"{label} n/a")
+        print(f"{name:<36} " + "  ".join(changes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StudyConnect API load benchmark")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--professionals", type=int, default=300)
+    parser.add_argument("--companies", type=int, default=100)
+    parser.add_argument("--opportunities", type=int, default=1000)
+    parser.add_argument("--validations", type=int, default=3000)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per endpoint")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--endpoint", action="append", help="Only run endpoints containing this text")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Previous JSON results to compare with")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(json.load(baseline), results)
+    return 0 if all(result["errors"] == 0 for result in results["endpoints"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
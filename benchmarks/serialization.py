@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from benchmarks.load import OPPORTUNITY_TYPES, SKILLS
+from classes.schemas_dto import Opportunity
+from services import serialization
+
+# Serialization cost of a list response, per 1,000 opportunities.
+#
+#   response_model  previous path of /companies/opportunities: Opportunity(**record)
+#                   for each record, FastAPI's List[Opportunity] response-model
+#                   validation and jsonable_encoder, then JSONResponse (json.dumps)
+#   orjson          serialization.prebuilt() on the stored records
+#   msgpack         the same with "Accept: application/msgpack"
+#
+#   python -m benchmarks.serialization --opportunities 1000 --repeat 30 --output serialization.json
+
+
+def build_opportunities(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    return [
+        {
+            "id": f"opportunity-{i:06d}", "title": f"Offre {i}", "company_id": f"company-{rng.randrange(100):06d}",
+            "type": rng.choice(OPPORTUNITY_TYPES), "description": "Offre de benchmark " * 8,
+            "required_skills": rng.sample(SKILLS, rng.randint(1, 4)),
+            "preferred_skills": rng.sample(SKILLS, rng.randint(0, 3)),
+            "location": "Paris", "remote_possible": rng.random() < 0.5, "duration": "6 mois",
+            "compensation": None, "requirements": [], "benefits": ["tickets restaurant"],
+            "applications_count": rng.randrange(50), "views_count": rng.randrange(500),
+            "created_at": (now + timedelta(minutes=i)).isoformat(), "deadline": None, "status": "active"
+        }
+        for i in range(count)
+    ]
+
+
+_RESPONSE_FIELD = create_model_field(name="Response", type_=List[Opportunity], mode="serialization")
+
+
+def _response_model_path(loop, records: list) -> bytes:
+    content = loop.run_until_complete(
+        serialize_response(field=_RESPONSE_FIELD, response_content=[Opportunity(**r) for r in records])
+    )
+    return JSONResponse(content).body
+
+
+def _prebuilt(records: list, msgpack: bool) -> bytes:
+    token = serialization._wants_msgpack.set(msgpack)
+    try:
+        return serialization.prebuilt(records).body
+    finally:
+        serialization._wants_msgpack.reset(token)
+
+
+def run(count: int, repeat: int) -> dict:
+    records = build_opportunities(count)
+    loop = asyncio.new_event_loop()
+    paths = {
+        "response_model": lambda: _response_model_path(loop, records),
+        "orjson": lambda: _prebuilt(records, msgpack=False),
+        "msgpack": lambda: _prebuilt(records, msgpack=True),
+    }
+    results = {}
+    for name, render in paths.items():
+        body = render()  # échauffement
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            samples.append(time.perf_counter() - started)
+        per_thousand = 1000.0 / count
+        results[name] = {
+            "median_ms_per_1000": 1000 * statistics.median(samples) * per_thousand,
+            "min_ms_per_1000": 1000 * min(samples) * per_thousand,
+            "bytes_per_1000": len(body) * per_thousand,
+        }
+    loop.close()
+    baseline = results["response_model"]["median_ms_per_1000"]
+    for result in results.values():
+        result["speedup"] = baseline / result["median_ms_per_1000"] if result["median_ms_per_1000"] else 0.0
+    return {"opportunities": count, "repeat": repeat, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serialization benchmark of list responses")
+    parser.add_argument("--opportunities", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.opportunities, args.repeat)
+    for name, result in report["results"].items():
+        print(f"{name:<16} {result['median_ms_per_1000']:>8.2f} ms / 1000 opportunities  "
+              f"(min {result['min_ms_per_1000']:.2f})  {result['bytes_per_1000'] / 1024:>7.1f} KiB  "
+              f"x{result['speedup']:.1f}")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Startup benchmark.
+#
+#   import  time to `import main` in a fresh interpreter (median of --repeat runs),
+#           checked against --import-budget-ms: the exit status is 1 over budget
+#   serve   in a fresh interpreter, time from the start of the lifespan hook to
+#           the first /health response, and to /ready answering 200 once the
+#           backends are warmed up (DATABASE_BACKEND --backend, memory by default)
+#   --top   the modules with the highest self import time (python -X importtime)
+#
+#   python -m benchmarks.startup --repeat 10 --import-budget-ms 1200 --top 15 --output startup.json
+#
+# Every measurement runs in a child process (python -m benchmarks.startup --child
+# ...) so that no module is already imported.
+
+DEFAULT_IMPORT_BUDGET_MS = 1200.0
+READY_TIMEOUT_SECONDS = 120.0
+
+
+def _child_import() -> dict:
+    started = time.perf_counter()
+    import main  # noqa: F401
+    return {"import_ms": 1000 * (time.perf_counter() - started)}
+
+
+async def _child_serve() -> dict:
+    import httpx
+
+    started = time.perf_counter()
+    from main import app
+    from services.startup import warm_up
+    imported = time.perf_counter()
+
+    result = {"import_ms": 1000 * (imported - started)}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/health")
+            result["health_ms"] = 1000 * (time.perf_counter() - imported)
+            result["health_status"] = response.status_code
+            deadline = time.perf_counter() + READY_TIMEOUT_SECONDS
+            while time.perf_counter() < deadline:
+                response = await client.get("/ready")
+                if response.status_code == 200:
+                    break
+                await asyncio.sleep(0.005)
+            result["ready_ms"] = 1000 * (time.perf_counter() - imported) if response.status_code == 200 else None
+            result["warm_up"] = warm_up.status()["steps"]
+    return result
+
+
+def _run_child(mode: str, env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", mode],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    # Dernière ligne : résultat JSON (les précédentes sont les journaux de l'application)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile(env: dict, top: int) -> list:
+    """(module, self µs, cumulative µs) of the `top` slowest modules to import"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=env, capture_output=True, text=True, check=True
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return sorted(modules, key=lambda module: module[1], reverse=True)[:top]
+
+
+def run(args) -> dict:
+    env = {**os.environ, "DATABASE_BACKEND": args.backend, "REQUEST_LOG_ENABLED": "false"}
+    env.setdefault("REPLICA_ENABLED", "false")
+    env.setdefault("JOB_QUEUE_JOURNAL", "")
+
+    imports = [_run_child("import", env)["import_ms"] for _ in range(args.repeat)]
+    serve = _run_child("serve", env)
+    report = {
+        "backend": args.backend,
+        "python": sys.version.split()[0],
+        "import_ms": {"median": statistics.median(imports), "min": min(imports), "max": max(imports)},
+        "import_budget_ms": args.import_budget_ms,
+        "serve": serve,
+    }
+    if args.top:
+        report["slowest_imports"] = [
+            {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+            for name, self_us, cumulative_us in import_profile(env, args.top)
+        ]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup benchmark of the API")
+    parser.add_argument("--backend", default="memory", choices=["firebase", "memory", "sqlite"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=0, help="List the N modules slowest to import")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--child", choices=["import", "serve"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child == "import":
+        print(json.dumps(_child_import()))
+        return 0
+    if args.child == "serve":
+        print(json.dumps(asyncio.run(_child_serve())))
+        return 0
+
+    report = run(args)
+    imports, serve = report["import_ms"], report["serve"]
+    within_budget = imports["median"] <= args.import_budget_ms
+    print(f"import main      {imports['median']:>8.1f} ms median (min {imports['min']:.1f}, max {imports['max']:.1f})  "
+          f"budget {args.import_budget_ms:.0f} ms {'OK' if within_budget else 'EXCEEDED'}")
+    print(f"first /health    {serve['health_ms']:>8.1f} ms after import")
+    ready = f"{serve['ready_ms']:>8.1f} ms after import" if serve["ready_ms"] is not None else "   timeout"
+    print(f"/ready           {ready}")
+    for name, step in serve["warm_up"].items():
+        seconds = f"{1000 * step['seconds']:.1f} ms" if step["seconds"] is not None else step["status"]
+        print(f"  {name:<14} {seconds}")
+    for module in report.get("slowest_imports", []):
+        print(f"  {module['self_ms']:>8.1f} ms  {module['module']}")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
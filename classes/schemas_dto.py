@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -7,6 +7,10 @@ from enum import Enum
 # Représente la structure de la données (data type) en entrée ou en sortie de notre API.
 # Model Pydantic = Datatype
 
+# Noms de compétences et domaines d'expertise : longueur bornée, ils sont indexés
+# par sous-chaîne (services/expertise_matcher.py)
+SkillName = Annotated[str, Field(max_length=100)]
+
 # Enums pour le nouveau projet
 class CompetenceLevel(str, Enum):
     DEBUTANT = "débutant"
@@ -79,7 +83,7 @@ class ProfessionalBase(BaseModel):
     last_name: str
     company: str
     position: str
-    expertise_domains: List[str]
+    expertise_domains: List[SkillName]
     years_experience: int
     phone: Optional[str] = None
     linkedin_url: Optional[str] = None
@@ -127,7 +131,7 @@ class Company(CompanyBase):
 # Modèles validation de compétences
 class SkillValidationRequest(BaseModel):
     student_id: str
-    skill_name: str
+    skill_name: SkillName
     level_claimed: CompetenceLevel
     evidence_description: str
     portfolio_links: Optional[List[str]] = None
@@ -199,6 +203,13 @@ class Application(ApplicationBase):
     company_feedback: Optional[str] = None
     interview_date: Optional[datetime] = None
 
+# Catalogue de compétences : skills_catalog/<domain>/<name> = {category, description}
+class SkillCatalogEntry(BaseModel):
+    domain: str = Field(pattern=r"^[^.$#\[\]/]+$")  # programming, design, marketing, business...
+    name: str = Field(pattern=r"^[^.$#\[\]/]+$")
+    category: str
+    description: str = ""
+
 # Modèles écoles (bonus)
 class SchoolBase(BaseModel):
     name: str
@@ -0,0 +1,132 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Réglages d'exécution de l'API, surchargeables par variables d'environnement.
+
+# Cache des tokens Firebase vérifiés (nombre d'entrées, LRU)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+# Cache des enregistrements "users" lus par get_current_user
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
+# Rafraîchissement en tâche de fond des clés publiques Google
+SIGNING_KEYS_REFRESH_SECONDS = float(os.getenv("SIGNING_KEYS_REFRESH_SECONDS", "1800"))
+
+# Accès base de données : pool de threads borné et délai maximum par appel
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "32"))
+DB_CALL_TIMEOUT_SECONDS = float(os.getenv("DB_CALL_TIMEOUT_SECONDS", "10"))
+# Lectures identiques simultanées fusionnées en un seul appel, pour ces préfixes de chemin
+COALESCED_READ_PATHS = [prefix.strip("/") for prefix in os.getenv(
+    "COALESCED_READ_PATHS", "opportunities,professionals,students,companies,skills_catalog"
+).split(",") if prefix.strip("/")]
+
+# Écriture groupée des notifications (multi-path PATCH)
+NOTIFICATION_CHUNK_SIZE = int(os.getenv("NOTIFICATION_CHUNK_SIZE", "500"))
+NOTIFICATION_WRITE_RETRIES = int(os.getenv("NOTIFICATION_WRITE_RETRIES", "3"))
+NOTIFICATION_RETRY_BACKOFF_SECONDS = float(os.getenv("NOTIFICATION_RETRY_BACKOFF_SECONDS", "0.5"))
+
+# File de tâches en arrière-plan (fan-out après écriture)
+JOB_QUEUE_MAXSIZE = int(os.getenv("JOB_QUEUE_MAXSIZE", "10000"))
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "4"))
+JOB_QUEUE_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("JOB_QUEUE_ENQUEUE_TIMEOUT_SECONDS", "1"))
+JOB_QUEUE_DRAIN_TIMEOUT_SECONDS = float(os.getenv("JOB_QUEUE_DRAIN_TIMEOUT_SECONDS", "30"))
+# Chemin du journal SQLite ; vide = pas de persistance
+JOB_QUEUE_JOURNAL = os.getenv("JOB_QUEUE_JOURNAL", "")
+
+# Index inversé compétence -> opportunités / étudiants, propre à chaque worker : seul le
+# worker qui traite une écriture met l'index à jour, les autres ne la voient qu'à la
+# reconstruction suivante. Cet intervalle borne donc le retard, avec plusieurs workers,
+# des candidats du fan-out des opportunités et du matching des imports. Une reconstruction
+# relit les collections entières : à réduire seulement si plusieurs workers écrivent
+SKILL_INDEX_REBUILD_SECONDS = float(os.getenv("SKILL_INDEX_REBUILD_SECONDS", "600"))
+# Index des domaines d'expertise et des validations en attente (routage des demandes,
+# /pending-validations) : même borne de retard entre workers que l'index des compétences
+EXPERTISE_INDEX_REBUILD_SECONDS = float(os.getenv("EXPERTISE_INDEX_REBUILD_SECONDS", "600"))
+
+# Poids des compétences souhaitées (preferred_skills) dans le score de correspondance
+PREFERRED_SKILLS_WEIGHT = float(os.getenv("PREFERRED_SKILLS_WEIGHT", "0.2"))
+
+# Réplique locale des collections chaudes via le streaming RTDB (opt-in)
+REPLICA_ENABLED = os.getenv("REPLICA_ENABLED", "false").lower() == "true"
+REPLICA_COLLECTIONS = [c for c in os.getenv(
+    "REPLICA_COLLECTIONS", "opportunities,professionals,skill_validations,skills_catalog"
+).split(",") if c]
+REPLICA_CHECK_SECONDS = float(os.getenv("REPLICA_CHECK_SECONDS", "5"))
+# Sans aucun message pendant ce délai (évènement ou keep-alive, envoyé environ toutes
+# les 30 s par le serveur), le flux est considéré comme perdu et resynchronisé
+REPLICA_MAX_SILENCE_SECONDS = float(os.getenv("REPLICA_MAX_SILENCE_SECONDS", "120"))
+
+# Pagination par curseur des endpoints de liste
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "50"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "200"))
+
+# Backend de stockage : "firebase" (Realtime Database), "memory" ou "sqlite"
+# (substituts locaux pour les benchmarks et le développement hors ligne)
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "firebase").lower()
+SQLITE_DATABASE_PATH = os.getenv("SQLITE_DATABASE_PATH", "studyconnect.sqlite3")
+# Enfants indexés pour les requêtes order_by_child(...).equal_to(...) des backends locaux
+LOCAL_INDEXED_CHILDREN = [tuple(spec.split(":", 1)) for spec in os.getenv(
+    "LOCAL_INDEXED_CHILDREN",
+    "skill_validations:professional_id,skill_validations:student_id,skill_validations:status,"
+    "opportunities:company_id,notifications:user_id,notifications:student_id,notifications:professional_id"
+).split(",") if ":" in spec]
+
+# Instrumentation des appels backend (en-têtes Server-Timing, journal par requête, /metrics)
+METRICS_PAYLOAD_BYTES = os.getenv("METRICS_PAYLOAD_BYTES", "true").lower() == "true"
+REQUEST_LOG_ENABLED = os.getenv("REQUEST_LOG_ENABLED", "true").lower() == "true"
+
+# Score minimal pour qu'une opportunité soit recommandée à un étudiant
+MATCH_SCORE_THRESHOLD = float(os.getenv("MATCH_SCORE_THRESHOLD", "0.3"))
+# Taille des lots d'écriture lors de la reconstruction des recommandations matérialisées
+RECOMMENDATIONS_REBUILD_CHUNK_SIZE = int(os.getenv("RECOMMENDATIONS_REBUILD_CHUNK_SIZE", "500"))
+
+# Administrateurs (en plus du custom claim Firebase "admin")
+ADMIN_UIDS = [uid for uid in os.getenv("ADMIN_UIDS", "").split(",") if uid]
+# Exports en streaming : nombre d'enregistrements lus par requête de plage
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
+# Imports en masse : enregistrements validés par lot (1000 au plus pour import_users),
+# chemins par multi-path update, itérations PBKDF2 des mots de passe importés
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_WRITE_CHUNK_SIZE = int(os.getenv("IMPORT_WRITE_CHUNK_SIZE", "500"))
+IMPORT_PASSWORD_HASH_ROUNDS = int(os.getenv("IMPORT_PASSWORD_HASH_ROUNDS", "10000"))
+
+# Préchauffage des backends après le démarrage (clients Firebase, réplique, index) :
+# délai avant de relancer une étape en échec
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "10"))
+
+# Push des notifications (WebSocket / SSE) : taille du tampon d'envoi par connexion,
+# intervalle des heartbeats, nombre maximal de notifications rattrapées à la reconnexion
+NOTIFICATION_PUSH_BUFFER_SIZE = int(os.getenv("NOTIFICATION_PUSH_BUFFER_SIZE", "100"))
+NOTIFICATION_PUSH_HEARTBEAT_SECONDS = float(os.getenv("NOTIFICATION_PUSH_HEARTBEAT_SECONDS", "25"))
+NOTIFICATION_PUSH_CATCHUP_LIMIT = int(os.getenv("NOTIFICATION_PUSH_CATCHUP_LIMIT", "200"))
+# Nombre maximal de notifications marquées comme lues par requête "avant une date"
+NOTIFICATION_MARK_READ_MAX = int(os.getenv("NOTIFICATION_MARK_READ_MAX", "1000"))
+
+# Rétention des notifications (0 désactive une règle) : lues depuis plus de N jours,
+# toutes celles de plus de N jours, au-delà des K plus récentes par destinataire
+NOTIFICATION_RETENTION_READ_DAYS = int(os.getenv("NOTIFICATION_RETENTION_READ_DAYS", "30"))
+NOTIFICATION_RETENTION_MAX_AGE_DAYS = int(os.getenv("NOTIFICATION_RETENTION_MAX_AGE_DAYS", "365"))
+NOTIFICATION_RETENTION_KEEP_LAST = int(os.getenv("NOTIFICATION_RETENTION_KEEP_LAST", "500"))
+# Intervalle de la purge planifiée dans l'application (0 : désactivée). Par défaut la purge
+# est lancée par cron via la CLI : les workers ne se coordonnent pas, elle ne doit être
+# activée que dans un seul processus
+NOTIFICATION_RETENTION_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_RETENTION_INTERVAL_SECONDS", "0"))
+NOTIFICATION_RETENTION_CHUNK_SIZE = int(os.getenv("NOTIFICATION_RETENTION_CHUNK_SIZE", "500"))
+# Archivage des notifications supprimées en NDJSON gzip ("" : pas d'archive)
+NOTIFICATION_ARCHIVE_DIR = os.getenv("NOTIFICATION_ARCHIVE_DIR", "archives")
+
+# Cache des profils (/students, /professionals, /companies /profile) : durée de vie des
+# entrées, budget en octets par collection ("collection:octets", sinon budget par défaut)
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+PROFILE_CACHE_BUDGETS = {name: int(size) for name, _, size in (spec.partition(":") for spec in os.getenv(
+    "PROFILE_CACHE_BUDGETS", "students:8388608,professionals:4194304,companies:4194304"
+).split(",")) if name and size}
+PROFILE_CACHE_DEFAULT_BUDGET_BYTES = int(os.getenv("PROFILE_CACHE_DEFAULT_BUDGET_BYTES", "4194304"))
+# Fichier SQLite partagé par les workers d'un même hôte ("" : cache local seul) ;
+# le cache local n'est gardé que PROFILE_CACHE_LOCAL_TTL_SECONDS, avec ou sans
+# fichier partagé, car les invalidations faites par un autre worker ne l'atteignent pas
+PROFILE_CACHE_SHARED_PATH = os.getenv("PROFILE_CACHE_SHARED_PATH", "")
+PROFILE_CACHE_LOCAL_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_LOCAL_TTL_SECONDS", "5"))
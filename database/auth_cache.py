@@ -0,0 +1,117 @@
+import threading
+import time
+
+from cachetools import TLRUCache, TTLCache
+from firebase_admin import auth
+from firebase_admin import _token_gen
+
+from configs import settings
+
+
+class VerifiedTokenCache:
+    """LRU cache of decoded ID tokens, each entry expiring at the token's `exp`"""
+
+    def __init__(self, maxsize: int):
+        self._cache = TLRUCache(
+            maxsize=maxsize,
+            ttu=lambda _token, claims, _now: claims.get('exp', 0),
+            timer=time.time
+        )
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            return self._cache.get(token)
+
+    def put(self, token: str, claims: dict):
+        # TLRUCache ignore d'elle-même les tokens déjà expirés
+        with self._lock:
+            self._cache[token] = claims
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+class UserRecordCache:
+    """Short-TTL cache of `users/{uid}` records"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, timer=time.monotonic)
+        self._lock = threading.Lock()
+
+    def get(self, uid: str):
+        with self._lock:
+            return self._cache.get(uid)
+
+    def put(self, uid: str, user_data: dict):
+        with self._lock:
+            self._cache[uid] = user_data
+
+    def invalidate(self, uid: str):
+        with self._lock:
+            self._cache.pop(uid, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+class SigningKeyRefresher:
+    """Keeps Google's token signing certificates warm in firebase_admin's HTTP cache.
+
+    firebase_admin fetches the certificates lazily through a cache-control aware
+    session, so the first verification after the cached copy expires pays a
+    blocking HTTPS round-trip. This thread re-fetches them periodically through
+    the very same session, bypassing the cache, so verification always finds a
+    fresh copy.
+
+    That session is private to firebase_admin (pinned exactly in
+    requirements.txt): `start()` raises if it cannot be found, so an upgrade
+    that moves it fails the startup warm-up instead of silently disabling the
+    refresh.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._request = None
+
+    @staticmethod
+    def _verifier_request():
+        verifier = getattr(auth._get_client(None), '_token_verifier', None)
+        request = getattr(verifier, 'request', None)
+        if not callable(request) or not getattr(_token_gen, 'ID_TOKEN_CERT_URI', None):
+            raise RuntimeError("firebase_admin internals changed: token verifier session not found, "
+                               "signing keys cannot be refreshed (check the firebase-admin pin)")
+        return request
+
+    def refresh(self):
+        try:
+            self._request(_token_gen.ID_TOKEN_CERT_URI, method='GET', headers={'cache-control': 'no-cache'})
+            return True
+        except Exception as e:
+            print(f"Error refreshing token signing keys: {str(e)}")
+            return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._request = self._verifier_request()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="signing-key-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
+user_cache = UserRecordCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+signing_key_refresher = SigningKeyRefresher(settings.SIGNING_KEYS_REFRESH_SECONDS)
@@ -1,8 +1,8 @@
 import firebase_admin
 from firebase_admin import credentials
 import json
-import pyrebase
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -42,21 +42,67 @@ def get_service_account():
             raise ValueError("Missing FIREBASE_SERVICE_ACCOUNT environment variable")
         return json.loads(service_account_json)
 
-# Get configurations
-firebase_config_json = get_firebase_config()
-service_account_key_json = get_service_account()
+from configs import settings
+from database.instrumentation import InstrumentedDatabase
 
-# Initialize the app with a service account
-if not firebase_admin._apps:
-    cred = credentials.Certificate(service_account_key_json)
-    firebase_admin.initialize_app(cred)
+# Clients built on first use (or by the startup warm-up), not at import: importing
+# pyrebase alone costs a quarter of a second, and without credentials the import
+# used to fail outright.
+_clients = None
+_clients_lock = threading.Lock()
 
-# Initialize Firebase with configuration
-firebase = pyrebase.initialize_app(firebase_config_json)
 
-# Get database and auth instances
-db = firebase.database()
-authUser = firebase.auth()
+def _create_clients():
+    if settings.DATABASE_BACKEND != "firebase":
+        # Backend local (mémoire ou SQLite) : même interface Database que pyrebase,
+        # sans authentification par mot de passe
+        from database.local_backend import create_local_app
+        firebase = create_local_app(settings.DATABASE_BACKEND, settings.SQLITE_DATABASE_PATH,
+                                    settings.LOCAL_INDEXED_CHILDREN)
+        return firebase, None
+
+    import pyrebase
+
+    # Get configurations
+    firebase_config_json = get_firebase_config()
+    service_account_key_json = get_service_account()
+
+    # Initialize the app with a service account
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(service_account_key_json)
+        firebase_admin.initialize_app(cred)
+
+    # Initialize Firebase with configuration
+    firebase = pyrebase.initialize_app(firebase_config_json)
+    return firebase, firebase.auth()
+
+
+def initialize():
+    """Build the Firebase Admin app and the pyrebase clients once (thread-safe)"""
+    global _clients
+    if _clients is None:
+        with _clients_lock:
+            if _clients is None:
+                _clients = _create_clients()
+    return _clients
+
+
+def initialized() -> bool:
+    return _clients is not None
+
+
+def get_app():
+    """pyrebase app (or local backend app) exposing `.database()`"""
+    return initialize()[0]
+
+
+def get_password_auth():
+    """pyrebase Auth for email/password sign-in (None with the local backends)"""
+    return initialize()[1]
+
+
+def get_db():
+    return InstrumentedDatabase(get_app().database())
 
 # Helper functions for StudyConnect specific operations
 def init_studyconnect_collections():
@@ -77,9 +123,9 @@ def init_studyconnect_collections():
         
         for collection in collections:
             # Check if collection exists, if not create empty structure
-            existing = db.child(collection).get().val()
+            existing = get_db().child(collection).get().val()
             if not existing:
-                db.child(collection).set({})
+                get_db().child(collection).set({})
                 print(f"Initialized {collection} collection")
         
         # Initialize skills catalog with common skills
@@ -108,9 +154,9 @@ def init_studyconnect_collections():
             }
         }
         
-        existing_skills = db.child("skills_catalog").get().val()
+        existing_skills = get_db().child("skills_catalog").get().val()
         if not existing_skills:
-            db.child("skills_catalog").set(skills_catalog)
+            get_db().child("skills_catalog").set(skills_catalog)
             print("Initialized skills catalog")
             
         print("StudyConnect collections initialized successfully!")
@@ -132,7 +178,7 @@ def get_user_by_type(user_id: str, user_type: str):
             return None
             
         collection = collection_map[user_type]
-        user_data = db.child(collection).child(user_id).get().val()
+        user_data = get_db().child(collection).child(user_id).get().val()
         return user_data
         
     except Exception as e:
@@ -142,21 +188,12 @@ def get_user_by_type(user_id: str, user_type: str):
 def create_notification(user_id: str, notification_type: str, message: str, data: dict = None):
     """Create a notification for a user"""
     try:
-        import uuid
-        from datetime import datetime
+        from database.notification_writer import NotificationWriter
         
-        notification_id = str(uuid.uuid4())
-        notification_data = {
-            "id": notification_id,
-            "user_id": user_id,
-            "type": notification_type,
-            "message": message,
-            "data": data or {},
-            "read": False,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        db.child("notifications").child(notification_id).set(notification_data)
+        writer = NotificationWriter()
+        notification_id = writer.add("user_id", user_id, notification_type, message, data=data or {})
+        if not writer.flush_sync():
+            return None
         return notification_id
         
     except Exception as e:
@@ -166,13 +203,15 @@ def create_notification(user_id: str, notification_type: str, message: str, data
 def get_user_notifications(user_id: str, unread_only: bool = False):
     """Get notifications for a user"""
     try:
-        all_notifications = db.child("notifications").order_by_child("user_id").equal_to(user_id).get().val() or {}
-        
-        notifications = []
-        for notif_id, notif_data in all_notifications.items():
-            if unread_only and notif_data.get("read", False):
-                continue
-            notifications.append(notif_data)
+        if unread_only:
+            # Index des non lues : seules ces notifications sont lues
+            from database.unread_notifications import UNREAD_BY_RECIPIENT
+            unread_ids = get_db().child(UNREAD_BY_RECIPIENT).child(user_id).shallow().get().val() or []
+            notifications = [get_db().child("notifications").child(notif_id).get().val() for notif_id in unread_ids]
+            notifications = [notif_data for notif_data in notifications if notif_data]
+        else:
+            all_notifications = get_db().child("notifications").order_by_child("user_id").equal_to(user_id).get().val() or {}
+            notifications = list(all_notifications.values())
         
         # Sort by creation date (newest first)
         notifications.sort(key=lambda x: x.get("created_at", ""), reverse=True)
@@ -183,9 +222,16 @@ def get_user_notifications(user_id: str, unread_only: bool = False):
         return []
 
 def mark_notification_as_read(notification_id: str):
-    """Mark a notification as read"""
+    """Mark a notification as read (body flag, unread index entry and counter in one update)"""
     try:
-        db.child("notifications").child(notification_id).update({"read": True})
+        from database import indexes, unread_notifications
+        
+        notification = get_db().child("notifications").child(notification_id).get().val()
+        if not notification:
+            return False
+        if not notification.get("read"):
+            recipient_id = indexes.notification_recipient(notification)
+            get_db().update(unread_notifications.read_entries(recipient_id, [notification_id]))
         return True
     except Exception as e:
         print(f"Error marking notification as read: {str(e)}")
@@ -0,0 +1,98 @@
+import asyncio
+import sys
+
+from database import repository
+
+# Secondary index nodes maintained next to the primary records.
+#
+#   index/validations_by_student/<student_id>/<validation_id>   = created_at
+#   index/notifications_by_recipient/<user_id>/<notification_id> = created_at
+#   index/opportunities_by_company/<company_id>/<opportunity_id> = created_at
+#
+# Entries are written in the same multi-path update as the record they point
+# to, so listing a user's records only costs reads proportional to that user's
+# own data instead of downloading the whole collection (see
+# database/pagination.py for the paged reads).
+#
+# The paged reads are `$value` range queries on one owner's node, which RTDB
+# only serves efficiently (and without a warning) with a ".value" index on each
+# owner node. The database rules must contain, next to the existing rules:
+#
+#   "index": {
+#     "validations_by_student":     {"$owner_id": {".indexOn": ".value"}},
+#     "notifications_by_recipient": {"$owner_id": {".indexOn": ".value"}},
+#     "opportunities_by_company":   {"$owner_id": {".indexOn": ".value"}},
+#     "unread_notifications":       {"$owner_id": {".indexOn": ".value"}}
+#   }
+#
+# (unread_notifications: database/unread_notifications.py, also read by $value.)
+
+VALIDATIONS_BY_STUDENT = "index/validations_by_student"
+NOTIFICATIONS_BY_RECIPIENT = "index/notifications_by_recipient"
+OPPORTUNITIES_BY_COMPANY = "index/opportunities_by_company"
+
+
+def notification_recipient(notification: dict):
+    """Fan-out paths store the recipient under different keys"""
+    return (notification.get('student_id')
+            or notification.get('professional_id')
+            or notification.get('user_id'))
+
+
+def validation_entries(validation_id: str, validation: dict, delete: bool = False) -> dict:
+    return {
+        f"{VALIDATIONS_BY_STUDENT}/{validation['student_id']}/{validation_id}":
+            None if delete else validation.get('created_at', '')
+    }
+
+
+def notification_entries(notification_id: str, notification: dict, delete: bool = False) -> dict:
+    return {
+        f"{NOTIFICATIONS_BY_RECIPIENT}/{notification_recipient(notification)}/{notification_id}":
+            None if delete else notification.get('created_at', '')
+    }
+
+
+def opportunity_entries(opportunity_id: str, opportunity: dict, delete: bool = False) -> dict:
+    return {
+        f"{OPPORTUNITIES_BY_COMPANY}/{opportunity['company_id']}/{opportunity_id}":
+            None if delete else opportunity.get('created_at', '')
+    }
+
+
+# Backfill des index à partir des données existantes
+
+_BACKFILL_SPECS = [
+    ("skill_validations", VALIDATIONS_BY_STUDENT, lambda record: record.get('student_id')),
+    ("notifications", NOTIFICATIONS_BY_RECIPIENT, notification_recipient),
+    ("opportunities", OPPORTUNITIES_BY_COMPANY, lambda record: record.get('company_id')),
+]
+
+
+async def backfill(chunk_size: int = 500) -> dict:
+    """Rebuild every index node from the primary collections"""
+    written = {}
+    for collection, index, owner_of in _BACKFILL_SPECS:
+        records = await repository.get(collection) or {}
+        by_owner = {}
+        for record_id, record in records.items():
+            owner_id = owner_of(record) if isinstance(record, dict) else None
+            if owner_id:
+                by_owner.setdefault(owner_id, {})[record_id] = record.get('created_at', '')
+
+        owners = list(by_owner.items())
+        for start in range(0, len(owners), chunk_size):
+            chunk = owners[start:start + chunk_size]
+            await repository.update_multi({f"{index}/{owner_id}": entries for owner_id, entries in chunk})
+
+        written[index] = sum(len(entries) for entries in by_owner.values())
+        print(f"{index}: {written[index]} entries for {len(by_owner)} owners")
+    return written
+
+
+if __name__ == "__main__":
+    # Usage : python -m database.indexes backfill
+    if sys.argv[1:] != ["backfill"]:
+        print("Usage: python -m database.indexes backfill")
+        sys.exit(1)
+    asyncio.run(backfill())
@@ -0,0 +1,289 @@
+import bisect
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+
+from configs import settings
+
+# Per-request accounting of backend calls.
+#
+# Every RTDB handle operation (get / set / update / remove / push) and every
+# Firebase Auth call is timed and recorded against the request being served:
+# the middleware opens a RequestStats in a context variable, and
+# repository.run_blocking copies the context into the pool thread so the
+# recording happens on the right request. At the end of the request the stats
+# are emitted as a Server-Timing header and a structured log line, and folded
+# into the process-wide histograms served by /metrics (Prometheus text format).
+
+_current_request = contextvars.ContextVar("current_request", default=None)
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50)
+
+
+# Valeur des paramètres de requête portant un token (EventSource ne peut pas
+# envoyer d'en-tête Authorization), masquée dans les journaux d'accès
+_QUERY_TOKEN = re.compile(r"([?&](?:token|access_token)=)[^&\s\"]*", re.IGNORECASE)
+
+
+def redact_query_tokens(text: str) -> str:
+    return _QUERY_TOKEN.sub(r"\1***", text)
+
+
+class QueryTokenFilter(logging.Filter):
+    """Logging filter masking token query parameters in the arguments of access log records"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.args, tuple):
+            record.args = tuple(redact_query_tokens(arg) if isinstance(arg, str) else arg for arg in record.args)
+        elif isinstance(record.msg, str):
+            record.msg = redact_query_tokens(record.msg)
+        return True
+
+
+def _payload_size(value) -> int:
+    if not settings.METRICS_PAYLOAD_BYTES or value is None:
+        return 0
+    try:
+        return len(json.dumps(value, separators=(",", ":"), default=str))
+    except Exception:
+        return 0
+
+
+class RequestStats:
+    """Backend calls made while serving one request: operation -> [count, seconds, bytes]"""
+
+    def __init__(self):
+        self.operations = {}
+        self._lock = threading.Lock()
+
+    def add(self, operation: str, seconds: float, size: int):
+        with self._lock:
+            entry = self.operations.setdefault(operation, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += size
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {operation: list(entry) for operation, entry in self.operations.items()}
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # valeurs des labels -> [compteurs par bucket..., somme, total]
+        self._series = {}
+
+    def observe(self, label_values: tuple, value: float):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._series = {}
+
+    def inc(self, label_values: tuple, amount: float = 1):
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._series.items()):
+            labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_duration = Histogram(
+            "studyconnect_http_request_duration_seconds", "HTTP request latency by route",
+            ("method", "route"), DURATION_BUCKETS)
+        self.requests = Counter(
+            "studyconnect_http_requests_total", "HTTP requests by route and status",
+            ("method", "route", "status"))
+        self.backend_calls_per_request = Histogram(
+            "studyconnect_backend_calls_per_request", "Backend calls made by one request, by route",
+            ("method", "route"), CALL_COUNT_BUCKETS)
+        self.backend_time_per_request = Histogram(
+            "studyconnect_backend_seconds_per_request", "Time spent in backend calls by one request, by route",
+            ("method", "route"), DURATION_BUCKETS)
+        self.backend_call_duration = Histogram(
+            "studyconnect_backend_call_duration_seconds", "Backend call latency by operation",
+            ("operation",), DURATION_BUCKETS)
+        self.backend_bytes = Counter(
+            "studyconnect_backend_bytes_total", "JSON payload bytes exchanged with the backend by operation",
+            ("operation",))
+        self.backend_errors = Counter(
+            "studyconnect_backend_errors_total", "Failed backend calls by operation",
+            ("operation",))
+        self.coalesced_reads = Counter(
+            "studyconnect_coalesced_reads_total", "Reads served by an identical in-flight backend call, by collection",
+            ("collection",))
+
+    def observe_call(self, operation: str, seconds: float, size: int, failed: bool):
+        with self._lock:
+            self.backend_call_duration.observe((operation,), seconds)
+            if size:
+                self.backend_bytes.inc((operation,), size)
+            if failed:
+                self.backend_errors.inc((operation,))
+
+    def observe_coalesced(self, collection: str):
+        with self._lock:
+            self.coalesced_reads.inc((collection,))
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, operations: dict):
+        with self._lock:
+            self.request_duration.observe((method, route), seconds)
+            self.requests.inc((method, route, str(status)))
+            self.backend_calls_per_request.observe((method, route), sum(entry[0] for entry in operations.values()))
+            self.backend_time_per_request.observe((method, route), sum(entry[1] for entry in operations.values()))
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for metric in (self.request_duration, self.requests, self.backend_calls_per_request,
+                           self.backend_time_per_request, self.backend_call_duration, self.backend_bytes,
+                           self.backend_errors, self.coalesced_reads):
+                lines.extend(metric.render())
+            return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def record(operation: str, seconds: float, size: int = 0, failed: bool = False):
+    stats = _current_request.get()
+    if stats is not None:
+        stats.add(operation, seconds, size)
+    metrics_registry.observe_call(operation, seconds, size, failed)
+
+
+def traced(operation: str, func):
+    """Wrap a blocking backend call (e.g. firebase_admin auth) so it is recorded"""
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            record(operation, time.perf_counter() - started, failed=failed)
+    return wrapper
+
+
+class InstrumentedDatabase:
+    """Delegating wrapper around a pyrebase Database handle that times terminal operations"""
+
+    _TERMINAL = ("get", "set", "update", "remove", "push")
+
+    def __init__(self, handle):
+        self._handle = handle
+
+    def __getattr__(self, name):
+        attribute = getattr(self._handle, name)
+        if name in self._TERMINAL:
+            return lambda *args, **kwargs: self._timed(name, attribute, args, kwargs)
+        if not callable(attribute):
+            return attribute
+
+        def chained(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            # Les méthodes de chaînage renvoient le handle : on garde l'enveloppe
+            return self if result is self._handle else result
+        return chained
+
+    def _timed(self, operation: str, method, args, kwargs):
+        started = time.perf_counter()
+        failed = True
+        size = 0
+        try:
+            result = method(*args, **kwargs)
+            failed = False
+            if operation == "get":
+                size = _payload_size(result.val())
+            elif args:
+                size = _payload_size(args[0])
+            return result
+        finally:
+            record(f"db.{operation}", time.perf_counter() - started, size, failed)
+
+
+def _server_timing(operations: dict, total: float) -> str:
+    entries = []
+    for operation, (count, seconds, size) in sorted(operations.items()):
+        name = operation.replace(".", "-").replace("_", "-")
+        entries.append(f'{name};dur={1000 * seconds:.2f};desc="{count} calls, {size} B"')
+    entries.append(f"total;dur={1000 * total:.2f}")
+    return ", ".join(entries)
+
+
+async def instrumentation_middleware(request, call_next):
+    """HTTP middleware: per-request backend accounting, Server-Timing header, log line, metrics"""
+    stats = RequestStats()
+    token = _current_request.set(stats)
+    started = time.perf_counter()
+    status = 500
+    response = None
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        total = time.perf_counter() - started
+        _current_request.reset(token)
+        operations = stats.snapshot()
+        # Gabarit de la route (/skills/validate/{validation_id}) pour borner la cardinalité
+        route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+        if response is not None:
+            response.headers["Server-Timing"] = _server_timing(operations, total)
+        metrics_registry.observe_request(request.method, route, status, total, operations)
+        if settings.REQUEST_LOG_ENABLED:
+            print(json.dumps({
+                "event": "request",
+                "method": request.method,
+                "route": route,
+                "path": request.url.path,
+                "status": status,
+                "duration_ms": round(1000 * total, 2),
+                "backend": {
+                    operation: {"calls": count, "duration_ms": round(1000 * seconds, 2), "bytes": size}
+                    for operation, (count, seconds, size) in operations.items()
+                }
+            }, ensure_ascii=False))
@@ -0,0 +1,525 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from random import randrange
+
+from requests import HTTPError, Response
+
+# Local stand-ins for the Realtime Database, selected with DATABASE_BACKEND.
+#
+# LocalDatabase mirrors the subset of pyrebase's Database chain used by the
+# application (child / order_by_* / equal_to / start_at / end_at / limit_to_* /
+# shallow, then get().val() / set / update / remove / push), with the same
+# semantics: values go through JSON like on the wire, null leaves and empty
+# objects disappear, multi-path updates are atomic, server values
+# ({".sv": {"increment": n}} / {".sv": "timestamp"}) are resolved at write time
+# and query results come back ordered. Two stores implement it:
+#
+#   MemoryStore  nested dicts plus hash indexes on the configured children
+#   SqliteStore  one row per record with JSON expression indexes
+#
+# Both serve `order_by_child(child).equal_to(value)` on an indexed child of a
+# top-level collection from the index instead of scanning the collection.
+#
+# Like RTDB, a multi-path update whose paths overlap (one is an ancestor of, or
+# the same as, another) is rejected as a whole with a 400, raised as the
+# HTTPError pyrebase raises for a failed request.
+
+_IDENTIFIER = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+def _segments(path) -> list:
+    return [segment for segment in str(path).split("/") if segment]
+
+
+def _bad_request(message: str):
+    response = Response()
+    response.status_code = 400
+    response._content = json.dumps({"error": message}).encode("utf-8")
+    return HTTPError("400 Client Error: Bad Request", response.text, response=response)
+
+
+def _check_disjoint(paths: list):
+    # Triés, un chemin et ses descendants sont contigus : comparer les voisins suffit
+    ordered = sorted(tuple(segments) for segments in paths)
+    for previous, current in zip(ordered, ordered[1:]):
+        if current[:len(previous)] == previous:
+            raise _bad_request(f"Invalid data; path /{'/'.join(previous)} overlaps /{'/'.join(current)} in the same update")
+
+
+def _clean(value):
+    """Drop null leaves and empty objects, as the Realtime Database does"""
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, child in value.items():
+            child = _clean(child)
+            if child is not None:
+                cleaned[str(key)] = child
+        return cleaned or None
+    if isinstance(value, list):
+        cleaned = [_clean(child) for child in value]
+        return cleaned if any(child is not None for child in cleaned) else None
+    return value
+
+
+def _wire(value):
+    return _clean(json.loads(json.dumps(value)))
+
+
+def _copy(value):
+    return json.loads(json.dumps(value)) if isinstance(value, (dict, list)) else value
+
+
+def _order_value(value):
+    """Realtime Database ordering: null < false < true < numbers < strings < objects"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4, 0)
+
+
+def _key_order(key: str):
+    return (0, int(key), "") if key.lstrip("-").isdigit() else (1, 0, key)
+
+
+def _child_value(record, child: str):
+    for segment in _segments(child):
+        if not isinstance(record, dict):
+            return None
+        record = record.get(segment)
+    return record
+
+
+def apply_query(node, query: dict):
+    """Filter, order and limit the children of `node` like a REST query"""
+    if not isinstance(node, dict):
+        return node
+    if query.get("shallow"):
+        return {key: True for key in node}
+    order_by = query.get("orderBy")
+    if order_by is None:
+        return node
+
+    if order_by == "$key":
+        order_of = lambda key, value: _key_order(key)
+        bound = lambda target: _key_order(str(target))
+    elif order_by == "$value":
+        order_of = lambda key, value: _order_value(value)
+        bound = _order_value
+    else:
+        order_of = lambda key, value: _order_value(_child_value(value, order_by))
+        bound = _order_value
+
+    items = sorted(node.items(), key=lambda item: (order_of(*item), _key_order(item[0])))
+    if "equalTo" in query:
+        target = bound(query["equalTo"])
+        items = [item for item in items if order_of(*item) == target]
+    if "startAt" in query:
+        target = bound(query["startAt"])
+        items = [item for item in items if order_of(*item) >= target]
+    if "endAt" in query:
+        target = bound(query["endAt"])
+        items = [item for item in items if order_of(*item) <= target]
+    if "limitToFirst" in query:
+        items = items[:query["limitToFirst"]]
+    if "limitToLast" in query:
+        items = items[-query["limitToLast"]:] if query["limitToLast"] else []
+    return OrderedDict(items)
+
+
+def _resolve_server_values(segments: list, value, read):
+    """Replace {".sv": ...} placeholders (increment, timestamp) using the stored values"""
+    if not isinstance(value, dict):
+        return value
+    if set(value) == {".sv"}:
+        server_value = value[".sv"]
+        if server_value == "timestamp":
+            return int(time.time() * 1000)
+        if isinstance(server_value, dict) and "increment" in server_value:
+            current = read(segments)
+            delta = server_value["increment"]
+            # Comme le Realtime Database : une valeur non numérique est remplacée par le delta
+            if isinstance(current, (int, float)) and not isinstance(current, bool):
+                return current + delta
+            return delta
+        raise ValueError(f"Unsupported server value: {server_value}")
+    return {key: _resolve_server_values(segments + [key], child, read) for key, child in value.items()}
+
+
+def _set_in(node: dict, segments: list, value) -> dict:
+    """Set (or delete when value is None) a nested path, pruning empty parents"""
+    if not segments:
+        return value
+    key, rest = segments[0], segments[1:]
+    child = _set_in(node.get(key) if isinstance(node.get(key), dict) else {}, rest, value) if rest else value
+    if child is None or child == {}:
+        node.pop(key, None)
+    else:
+        node[key] = child
+    return node
+
+
+class LocalResponse:
+    def __init__(self, value, key):
+        self._value = value
+        self._key = key
+
+    def val(self):
+        return self._value
+
+    def key(self):
+        return self._key
+
+
+class LocalDatabase:
+    """pyrebase-compatible Database handle over a local store"""
+
+    def __init__(self, store):
+        self._store = store
+        self.path = ""
+        self.build_query = {}
+        self.last_push_time = 0
+        self.last_rand_chars = []
+
+    def child(self, *args):
+        new_path = "/".join(str(arg) for arg in args)
+        self.path = f"{self.path}/{new_path}" if self.path else new_path.lstrip("/")
+        return self
+
+    def order_by_key(self):
+        self.build_query["orderBy"] = "$key"
+        return self
+
+    def order_by_value(self):
+        self.build_query["orderBy"] = "$value"
+        return self
+
+    def order_by_child(self, order):
+        self.build_query["orderBy"] = order
+        return self
+
+    def start_at(self, start):
+        self.build_query["startAt"] = start
+        return self
+
+    def end_at(self, end):
+        self.build_query["endAt"] = end
+        return self
+
+    def equal_to(self, equal):
+        self.build_query["equalTo"] = equal
+        return self
+
+    def limit_to_first(self, limit_first):
+        self.build_query["limitToFirst"] = limit_first
+        return self
+
+    def limit_to_last(self, limit_last):
+        self.build_query["limitToLast"] = limit_last
+        return self
+
+    def shallow(self):
+        self.build_query["shallow"] = True
+        return self
+
+    def _take(self):
+        segments, query = _segments(self.path), self.build_query
+        self.path, self.build_query = "", {}
+        return segments, query
+
+    def get(self, token=None, json_kwargs={}):
+        segments, query = self._take()
+        value = self._store.query(segments, query) if query else self._store.read(segments)
+        if query.get("shallow") and isinstance(value, dict):
+            # pyrebase renvoie les clés seules pour une lecture shallow
+            value = value.keys()
+        return LocalResponse(value, segments[-1] if segments else None)
+
+    def set(self, data, token=None, json_kwargs={}):
+        segments, _ = self._take()
+        self._store.write([(segments, _wire(data))])
+        return data
+
+    def update(self, data, token=None, json_kwargs={}):
+        segments, _ = self._take()
+        writes = [(segments + _segments(key), _wire(value)) for key, value in data.items()]
+        _check_disjoint([path for path, _ in writes])
+        self._store.write(writes)
+        return data
+
+    def push(self, data, token=None, json_kwargs={}):
+        segments, _ = self._take()
+        name = self.generate_key()
+        self._store.write([(segments + [name], _wire(data))])
+        return {"name": name}
+
+    def remove(self, token=None):
+        segments, _ = self._take()
+        self._store.write([(segments, None)])
+        return None
+
+    def stream(self, stream_handler, token=None, stream_id=None, is_async=True):
+        raise NotImplementedError("Streaming requires the Firebase backend")
+
+    def generate_key(self):
+        # Même format que les clés push de pyrebase (horodatage + aléa)
+        push_chars = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+        now = int(time.time() * 1000)
+        duplicate_time = now == self.last_push_time
+        self.last_push_time = now
+        time_stamp_chars = [0] * 8
+        for i in reversed(range(8)):
+            time_stamp_chars[i] = push_chars[now % 64]
+            now //= 64
+        if not duplicate_time:
+            self.last_rand_chars = [randrange(64) for _ in range(12)]
+        else:
+            for i in range(11, -1, -1):
+                if self.last_rand_chars[i] != 63:
+                    self.last_rand_chars[i] += 1
+                    break
+                self.last_rand_chars[i] = 0
+        return "".join(time_stamp_chars) + "".join(push_chars[c] for c in self.last_rand_chars)
+
+
+class MemoryStore:
+    def __init__(self, indexed_children):
+        self._root = {}
+        self._lock = threading.RLock()
+        self._indexed = {}
+        for collection, child in indexed_children:
+            self._indexed.setdefault(collection, set()).add(child)
+        # (collection, child) -> {valeur ordonnée: {clés}} et clé -> valeur indexée
+        self._postings = {}
+        self._record_values = {}
+        self._reindex_all()
+
+    def _node(self, segments):
+        node = self._root
+        for segment in segments:
+            if not isinstance(node, dict) or segment not in node:
+                return None
+            node = node[segment]
+        return node
+
+    def read(self, segments):
+        with self._lock:
+            return _copy(self._node(segments))
+
+    def query(self, segments, query):
+        with self._lock:
+            order_by = query.get("orderBy")
+            if (len(segments) == 1 and "equalTo" in query
+                    and order_by in self._indexed.get(segments[0], ())):
+                collection = self._node(segments) or {}
+                keys = self._postings.get((segments[0], order_by), {}).get(_order_value(query["equalTo"]), ())
+                node = {key: collection[key] for key in keys if key in collection}
+            else:
+                node = self._node(segments)
+            return _copy(apply_query(node, query))
+
+    def write(self, writes):
+        with self._lock:
+            for segments, value in writes:
+                value = _resolve_server_values(segments, value, self._node)
+                if segments:
+                    _set_in(self._root, segments, value)
+                else:
+                    self._root = value if isinstance(value, dict) else {}
+            for segments, _ in writes:
+                self._reindex(segments)
+
+    def _reindex_all(self):
+        for collection in self._indexed:
+            self._reindex([collection])
+
+    def _reindex(self, segments):
+        if not segments:
+            return self._reindex_all()
+        collection = segments[0]
+        if collection not in self._indexed:
+            return
+        records = self._node([collection]) or {}
+        keys = list(records) if len(segments) == 1 else [segments[1]]
+        for child in self._indexed[collection]:
+            postings = self._postings.setdefault((collection, child), {})
+            record_values = self._record_values.setdefault((collection, child), {})
+            if len(segments) == 1:
+                postings.clear()
+                record_values.clear()
+            for key in keys:
+                if key in record_values:
+                    postings.get(record_values.pop(key), set()).discard(key)
+                record = records.get(key)
+                if isinstance(record, dict):
+                    value = _order_value(_child_value(record, child))
+                    postings.setdefault(value, set()).add(key)
+                    record_values[key] = value
+
+
+class SqliteStore:
+    """Stores each record (a child of a top-level collection) as one JSON row.
+
+    Index nodes (index/<name>/<owner>/<id>) and aggregates
+    (stats/<kind>/<owner>) are stored one row per owner.
+    Reads and writes above record level are assembled from / split into rows;
+    deeper ones read-modify-write a single row. Everything runs in one
+    transaction per call, so multi-path updates are atomic.
+    """
+
+    _RECORD_DEPTH = {"index": 3, "stats": 3}
+
+    def __init__(self, path: str, indexed_children):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        self._indexed = {}
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS nodes ("
+                "parent TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (parent, key))"
+            )
+            for collection, child in indexed_children:
+                if not _IDENTIFIER.match(child) or not _IDENTIFIER.match(collection):
+                    continue
+                self._indexed.setdefault(collection, set()).add(child)
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{collection}_{child} "
+                    f"ON nodes (parent, json_extract(value, '$.{child}'))"
+                )
+
+    def _depth(self, segments) -> int:
+        return self._RECORD_DEPTH.get(segments[0], 2) if segments else 2
+
+    @staticmethod
+    def _under(prefix: str):
+        """SQL condition selecting rows whose parent is `prefix` or below it"""
+        if not prefix:
+            return "1 = 1", ()
+        # '/' < '0' : la plage [prefix/, prefix0) couvre tous les descendants
+        return "(parent = ? OR (parent >= ? AND parent < ?))", (prefix, prefix + "/", prefix + "0")
+
+    def _row(self, segments):
+        depth = self._depth(segments)
+        return "/".join(segments[:depth - 1]), segments[depth - 1]
+
+    def _assemble(self, prefix_segments, rows) -> dict:
+        tree = {}
+        offset = len(prefix_segments)
+        for parent, key, value in rows:
+            _set_in(tree, _segments(parent)[offset:] + [key], json.loads(value))
+        return tree or None
+
+    def read(self, segments):
+        with self._lock:
+            return self._read(segments)
+
+    def _read(self, segments):
+        if len(segments) >= self._depth(segments):
+            parent, key = self._row(segments)
+            row = self._conn.execute("SELECT value FROM nodes WHERE parent = ? AND key = ?", (parent, key)).fetchone()
+            node = json.loads(row[0]) if row else None
+            return _child_value(node, "/".join(segments[self._depth(segments):])) if node is not None else None
+        condition, params = self._under("/".join(segments))
+        rows = self._conn.execute(f"SELECT parent, key, value FROM nodes WHERE {condition}", params).fetchall()
+        return self._assemble(segments, rows)
+
+    def query(self, segments, query):
+        with self._lock:
+            order_by = query.get("orderBy")
+            if (len(segments) == 1 and self._depth(segments) == 2 and "equalTo" in query
+                    and order_by in self._indexed.get(segments[0], ())):
+                target = query["equalTo"]
+                if isinstance(target, bool):
+                    target = int(target)
+                rows = self._conn.execute(
+                    f"SELECT parent, key, value FROM nodes "
+                    f"WHERE parent = ? AND json_extract(value, '$.{order_by}') = ?",
+                    (segments[0], target)
+                ).fetchall()
+                node = self._assemble(segments, rows)
+            else:
+                node = self._read(segments)
+            return apply_query(node, query)
+
+    def _flatten(self, segments, value):
+        depth = self._depth(segments)
+        if len(segments) == depth:
+            yield "/".join(segments[:-1]), segments[-1], value
+            return
+        if not isinstance(value, dict):
+            raise ValueError(f"Cannot store a scalar at /{'/'.join(segments)} with the sqlite backend")
+        for key, child in value.items():
+            yield from self._flatten(segments + [key], child)
+
+    def _write(self, segments, value):
+        depth = self._depth(segments)
+        if len(segments) > depth:
+            parent, key = self._row(segments)
+            row = self._conn.execute("SELECT value FROM nodes WHERE parent = ? AND key = ?", (parent, key)).fetchone()
+            record = json.loads(row[0]) if row else {}
+            value = _set_in(record if isinstance(record, dict) else {}, segments[depth:], value) or None
+            segments = segments[:depth]
+        if len(segments) == depth:
+            parent, key = self._row(segments)
+            if value is None:
+                self._conn.execute("DELETE FROM nodes WHERE parent = ? AND key = ?", (parent, key))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO nodes (parent, key, value) VALUES (?, ?, ?)",
+                    (parent, key, json.dumps(value))
+                )
+            return
+        # Au-dessus du niveau des enregistrements : remplacement de tout le sous-arbre
+        prefix = "/".join(segments)
+        condition, params = self._under(prefix)
+        self._conn.execute(f"DELETE FROM nodes WHERE {condition}", params)
+        if prefix and len(segments) < depth - 1:
+            self._conn.execute("DELETE FROM nodes WHERE parent = ?", (prefix,))
+        if value is not None:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO nodes (parent, key, value) VALUES (?, ?, ?)",
+                [(parent, key, json.dumps(child)) for parent, key, child in self._flatten(segments, value)]
+            )
+
+    def write(self, writes):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for segments, value in writes:
+                    self._write(segments, _resolve_server_values(segments, value, self._read))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LocalApp:
+    """Stand-in for the pyrebase app object: only `database()` is provided"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def database(self):
+        return LocalDatabase(self.store)
+
+
+def create_local_app(backend: str, sqlite_path: str, indexed_children) -> LocalApp:
+    if backend == "memory":
+        return LocalApp(MemoryStore(indexed_children))
+    if backend == "sqlite":
+        return LocalApp(SqliteStore(sqlite_path, indexed_children))
+    raise ValueError(f"Unknown database backend: {backend}")
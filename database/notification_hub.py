@@ -0,0 +1,104 @@
+import asyncio
+
+from database import repository, indexes
+from configs import settings
+
+# In-process pub/sub of new notifications, keyed by recipient.
+#
+# NotificationWriter publishes every chunk it has committed; each push
+# connection (WebSocket or SSE, see routers/router_notifications.py) holds a
+# Subscription with a bounded buffer. A connection too slow to drain its buffer
+# is marked `overflowed` and closed rather than silently losing notifications:
+# the client reconnects with the id of the last notification it received and
+# `catch_up` reads what it missed from the recipient index.
+#
+# The hub only reaches connections of the worker that wrote the notification.
+# With several workers, clients connected elsewhere get those notifications on
+# their next reconnect catch-up. Subscriptions are only touched on the event
+# loop (synchronous writers go through publish_threadsafe), so no locking.
+
+
+class Subscription:
+    def __init__(self, recipient_id: str, buffer_size: int):
+        self.recipient_id = recipient_id
+        self.buffer_size = buffer_size
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def deliver(self, notification: dict) -> bool:
+        if self.overflowed:
+            return False
+        if self.queue.qsize() >= self.buffer_size:
+            # Sentinelle après les notifications déjà en tampon : elles sont envoyées,
+            # puis la connexion est fermée et le client reprend après la dernière
+            self.overflowed = True
+            self.queue.put_nowait(None)
+            return False
+        self.queue.put_nowait(notification)
+        return True
+
+    async def get(self, timeout: float):
+        """Next notification, None on overflow; raises asyncio.TimeoutError after `timeout`"""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class NotificationHub:
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._subscribers = {}
+        self._loop = None
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def subscribe(self, recipient_id: str) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(recipient_id, self.buffer_size)
+        self._subscribers.setdefault(recipient_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscribers.get(subscription.recipient_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.recipient_id]
+        if subscription.overflowed:
+            self.overflows += 1
+
+    def publish(self, notifications: list):
+        """Deliver committed notifications to their recipients' connections (event loop thread)"""
+        for notification in notifications:
+            self.published += 1
+            for subscription in list(self._subscribers.get(indexes.notification_recipient(notification), ())):
+                if subscription.deliver(notification):
+                    self.delivered += 1
+
+    def publish_threadsafe(self, notifications: list):
+        """publish() from a thread other than the event loop's (synchronous writers)"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.publish, notifications)
+
+    def metrics(self) -> dict:
+        return {"connections": sum(len(subscriptions) for subscriptions in self._subscribers.values()),
+                "recipients": len(self._subscribers), "published": self.published,
+                "delivered": self.delivered, "overflows": self.overflows}
+
+
+async def catch_up(recipient_id: str, last_id: str, limit: int = None) -> list:
+    """Notifications of a recipient created after `last_id`, oldest first (at most `limit`, the newest)"""
+    limit = limit or settings.NOTIFICATION_PUSH_CATCHUP_LIMIT
+    index_path = f"{indexes.NOTIFICATIONS_BY_RECIPIENT}/{recipient_id}"
+    last_created_at = await repository.get(f"{index_path}/{last_id}")
+    if last_created_at is None:
+        # Identifiant inconnu (notification supprimée, autre destinataire) : pas de rattrapage
+        return []
+    entries = await repository.query(index_path, order_by="$value", start_at=last_created_at,
+                                     limit_to_last=limit + 1) or {}
+    keys = sorted((created_at or "", record_id) for record_id, created_at in entries.items())
+    keys = [key for key in keys if key > (last_created_at, last_id)][-limit:]
+    records = await repository.fetch_many("notifications", [record_id for _, record_id in keys])
+    return [records[record_id] for _, record_id in keys if record_id in records]
+
+
+notification_hub = NotificationHub(settings.NOTIFICATION_PUSH_BUFFER_SIZE)
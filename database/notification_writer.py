@@ -0,0 +1,139 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+from database import repository, indexes, unread_notifications
+from database.notification_hub import notification_hub
+from database.firebase import get_db
+from configs import settings
+
+
+class NotificationWriter:
+    """Accumulates notifications and commits them as chunked multi-path updates.
+
+    Each chunk is a single PATCH at the database root carrying the notification
+    records and their index entries, so it is applied atomically: a chunk either
+    lands entirely or not at all. Failed chunks are retried with exponential
+    backoff; those still failing after the last attempt are kept in `failed`.
+    A failed write may still have been applied (e.g. a timeout), and the unread
+    counter increments it carries are not idempotent, so before each retry one
+    of its notifications is read back and the chunk is only re-sent if absent.
+    """
+
+    def __init__(self, chunk_size: int = None, max_retries: int = None, retry_backoff: float = None):
+        self.chunk_size = chunk_size or settings.NOTIFICATION_CHUNK_SIZE
+        self.max_retries = settings.NOTIFICATION_WRITE_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = settings.NOTIFICATION_RETRY_BACKOFF_SECONDS if retry_backoff is None else retry_backoff
+        self.failed = []
+        self._pending = []
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, recipient_key: str, recipient_id: str, notification_type: str, message: str, **fields) -> str:
+        """Queue a notification; `recipient_key` is student_id, professional_id or user_id"""
+        notification_id = str(uuid.uuid4())
+        self._pending.append({
+            "id": notification_id,
+            recipient_key: recipient_id,
+            "type": notification_type,
+            "message": message,
+            **fields,
+            "created_at": datetime.now().isoformat(),
+            "read": False
+        })
+        return notification_id
+
+    def _drain(self):
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start:start + self.chunk_size]
+            updates = {}
+            for notification in chunk:
+                updates[f"notifications/{notification['id']}"] = notification
+                updates.update(indexes.notification_entries(notification['id'], notification))
+            # Index des non lues et compteurs par destinataire, dans le même commit
+            updates.update(unread_notifications.created_entries(chunk))
+            yield chunk, updates
+
+    @staticmethod
+    def _landed_path(chunk: list) -> str:
+        # Un chunk est appliqué en entier ou pas du tout : une notification suffit
+        return f"notifications/{chunk[0]['id']}/id"
+
+    async def _landed(self, chunk: list):
+        """Whether the chunk was committed; None when that cannot be read back"""
+        try:
+            return await repository.get(self._landed_path(chunk), coalesce=False) is not None
+        except Exception as e:
+            print(f"Error reading back {len(chunk)} notifications: {str(e)}")
+            return None
+
+    def _landed_sync(self, chunk: list):
+        try:
+            return get_db().child(self._landed_path(chunk)).get().val() is not None
+        except Exception as e:
+            print(f"Error reading back {len(chunk)} notifications: {str(e)}")
+            return None
+
+    async def _commit(self, chunk: list, updates: dict) -> bool:
+        # Une écriture en erreur (timeout) a pu être appliquée : on relit avant de
+        # renvoyer le chunk, sinon ses incréments de compteurs seraient comptés deux fois
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                landed = await self._landed(chunk)
+                if landed:
+                    return True
+                if landed is None:
+                    continue
+            try:
+                await repository.update_multi(updates)
+                return True
+            except Exception as e:
+                error = e
+        if await self._landed(chunk):
+            return True
+        print(f"Error writing {len(chunk)} notifications: {str(error)}")
+        self.failed.extend(chunk)
+        return False
+
+    def _commit_sync(self, chunk: list, updates: dict) -> bool:
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                landed = self._landed_sync(chunk)
+                if landed:
+                    return True
+                if landed is None:
+                    continue
+            try:
+                get_db().update(updates)
+                return True
+            except Exception as e:
+                error = e
+        if self._landed_sync(chunk):
+            return True
+        print(f"Error writing {len(chunk)} notifications: {str(error)}")
+        self.failed.extend(chunk)
+        return False
+
+    async def flush(self) -> int:
+        """Commit every queued notification, returns how many were written"""
+        written = 0
+        for chunk, updates in self._drain():
+            if await self._commit(chunk, updates):
+                written += len(chunk)
+                # Push aux connexions WebSocket / SSE des destinataires
+                notification_hub.publish(chunk)
+        return written
+
+    def flush_sync(self) -> int:
+        """Blocking variant of flush() for synchronous callers"""
+        written = 0
+        for chunk, updates in self._drain():
+            if self._commit_sync(chunk, updates):
+                written += len(chunk)
+                notification_hub.publish_threadsafe(chunk)
+        return written
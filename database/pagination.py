@@ -0,0 +1,104 @@
+import base64
+import heapq
+import json
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Query
+
+from database import repository
+from configs import settings
+
+# Cursor-based pagination shared by the list endpoints.
+#
+# Lists are ordered by a sort key ending with the record id as tie-breaker,
+# e.g. (created_at, id). The cursor is the sort key of the last item of the
+# previous page, encoded as url-safe base64 JSON; the next page starts strictly
+# after it, so pages stay stable when new records are inserted.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort_key) -> str:
+    raw = json.dumps(list(sort_key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_key = json.loads(raw)
+    except Exception:
+        raise InvalidCursorError("Curseur invalide")
+    if not isinstance(sort_key, list) or not sort_key:
+        raise InvalidCursorError("Curseur invalide")
+    return tuple(sort_key)
+
+
+class PageParams(NamedTuple):
+    limit: int
+    cursor: Optional[tuple]
+
+
+def page_params(
+    limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description=f"Valeur de l'en-tête {NEXT_CURSOR_HEADER} de la page précédente")
+) -> PageParams:
+    """Dépendance FastAPI : paramètres `limit` / `cursor` des endpoints de liste"""
+    try:
+        return PageParams(limit, decode_cursor(cursor))
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def set_next_cursor(response, next_cursor):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def paginate(items, sort_key, limit: int, cursor=None, reverse: bool = False):
+    """Page of an in-memory collection -> (items, next cursor or None)"""
+    if cursor is not None:
+        if reverse:
+            items = (item for item in items if sort_key(item) < cursor)
+        else:
+            items = (item for item in items if sort_key(item) > cursor)
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    page = select(limit + 1, items, key=sort_key)
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(sort_key(page[-1]))
+
+
+async def page_index(index: str, owner_id: str, collection: str, limit: int, cursor=None,
+                     replica: bool = False):
+    """Newest-first page of the records referenced by an index node.
+
+    Index entries map record id -> created_at, so the page is read with a
+    `$value` range query and only `limit` records are fetched afterwards.
+    """
+    # Marge pour les entrées de même date que le curseur, élargie au besoin
+    fetch = limit + 2
+    while True:
+        entries = await repository.query(
+            f"{index}/{owner_id}", order_by="$value",
+            end_at=cursor[0] if cursor else None, limit_to_last=fetch
+        ) or {}
+        keys = [(created_at or "", record_id) for record_id, created_at in entries.items()]
+        if cursor:
+            keys = [key for key in keys if key < cursor]
+        if len(keys) > limit or len(entries) < fetch:
+            break
+        fetch *= 2
+
+    keys.sort(reverse=True)
+    next_cursor = encode_cursor(keys[limit - 1]) if len(keys) > limit else None
+    keys = keys[:limit]
+    records = await repository.fetch_many(collection, [record_id for _, record_id in keys], replica=replica)
+    return [records[record_id] for _, record_id in keys if record_id in records], next_cursor
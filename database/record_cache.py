@@ -0,0 +1,237 @@
+import sqlite3
+import threading
+import time
+
+import orjson
+from cachetools import Cache, TTLCache
+
+from database import repository
+from configs import settings
+
+# Read-through cache of records keyed by collection and id (profile endpoints).
+#
+# Two tiers:
+#   local   per-worker LRU with TTL, one per collection, whose size budget is
+#           counted in bytes of the JSON-encoded records
+#   shared  optional SQLite file (PROFILE_CACHE_SHARED_PATH) read on a local
+#           miss, so the uvicorn workers of a host share loaded records
+#
+# Writers call `invalidate(collection, id)`, which drops the record from both
+# tiers. Other workers may still serve their local copy until it expires, so
+# the local TTL is kept short (PROFILE_CACHE_LOCAL_TTL_SECONDS), with or without
+# a shared store, and the shared TTL long. A load that started before an
+# invalidation is not stored: locally through a per-key generation, kept only
+# while loads of that key are in flight, in the shared store through a
+# version per key. Invalidation leaves a tombstone with the next version, and a
+# load only stores its record if the version it saw before loading is still
+# the current one, whichever worker invalidated the key.
+#
+# The shared tier is only reached through the database thread pool
+# (repository.run_blocking): a worker holding the SQLite write lock never
+# blocks the event loop, and a shared-store error or timeout is a miss.
+#
+# Cached values are the JSON-ready dicts returned by the loader; callers must
+# not mutate them.
+
+
+class _BudgetedCache(TTLCache):
+    """TTLCache whose maxsize is a byte budget; entries are (value, size in bytes)"""
+
+    def __init__(self, budget: int, ttl: float):
+        super().__init__(maxsize=budget, ttl=ttl, timer=time.monotonic, getsizeof=lambda entry: entry[1])
+        self.evictions = 0
+        self.expirations = 0
+
+    def expire(self, time=None):
+        # Cache.__len__ : TTLCache.__len__ appelle lui-même expire()
+        entries = Cache.__len__(self)
+        result = super().expire(time)
+        self.expirations += entries - Cache.__len__(self)
+        return result
+
+    def popitem(self):
+        key, entry = super().popitem()
+        self.evictions += 1
+        return key, entry
+
+
+class SharedStore:
+    """Cache entries shared between the processes of a host, in a SQLite file.
+
+    Each key has a version, bumped by `invalidate` (the row is then a tombstone,
+    value NULL). Rows, tombstones included, are purged once expired.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=1)
+        self._lock = threading.Lock()
+        self._puts = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS versioned_entries (key TEXT PRIMARY KEY, value BLOB, "
+                "version INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str):
+        """(value or None, version) of a key; version 0 when the key is unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, version, expires_at FROM versioned_entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None, 0
+        value, version, expires_at = row
+        return (value if expires_at > time.time() else None), version
+
+    def put(self, key: str, value: bytes, version: int):
+        """Store a loaded value, unless the key was invalidated since `version` was read"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO versioned_entries (key, value, version, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE versioned_entries.version = excluded.version",
+                (key, value, version, time.time() + self.ttl)
+            )
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM versioned_entries WHERE expires_at <= ?", (time.time(),))
+
+    def invalidate(self, key: str):
+        # La pierre tombale vit aussi longtemps qu'une entrée : bien plus qu'un chargement
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO versioned_entries (key, value, version, expires_at) VALUES (?, NULL, 1, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = NULL, version = versioned_entries.version + 1, "
+                "expires_at = excluded.expires_at",
+                (key, time.time() + self.ttl)
+            )
+
+
+class RecordCache:
+    def __init__(self, budgets: dict, default_budget: int, ttl: float, local_ttl: float, shared_path: str = ""):
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.ttl = ttl
+        self.shared = SharedStore(shared_path, ttl) if shared_path else None
+        self.local_ttl = local_ttl
+        self._caches = {}
+        # Générations et chargements en cours par clé (collection, id), retirés
+        # quand le dernier chargement se termine : la table ne grossit pas
+        self._generations = {}
+        self._loading = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, collection: str):
+        if collection not in self._caches:
+            self._caches[collection] = _BudgetedCache(self.budgets.get(collection, self.default_budget), self.local_ttl)
+            self._stats[collection] = {"hits": 0, "shared_hits": 0, "misses": 0, "too_large": 0, "shared_errors": 0}
+        return self._caches[collection], self._stats[collection]
+
+    def _store_local(self, collection: str, record_id: str, value, encoded: bytes):
+        cache, stats = self._collection(collection)
+        try:
+            cache[record_id] = (value, len(encoded))
+        except ValueError:
+            # Enregistrement plus gros que le budget de la collection
+            stats["too_large"] += 1
+
+    async def _shared_call(self, collection: str, method, *args):
+        """Shared-store call on the database thread pool; None when it fails"""
+        try:
+            return await repository.run_blocking(method, *args)
+        except (sqlite3.Error, repository.DatabaseTimeoutError) as e:
+            with self._lock:
+                self._collection(collection)[1]["shared_errors"] += 1
+            print(f"Erreur du cache partagé ({collection}): {str(e)}")
+            return None
+
+    async def get(self, collection: str, record_id: str, load):
+        """Cached record, or `await load()` (None results are not cached)"""
+        with self._lock:
+            cache, stats = self._collection(collection)
+            cache.expire()
+            entry = cache.get(record_id)
+            if entry is not None:
+                stats["hits"] += 1
+                return entry[0]
+            loading = (collection, record_id)
+            self._loading[loading] = self._loading.get(loading, 0) + 1
+            generation = self._generations.get(loading, 0)
+        try:
+            return await self._load(collection, record_id, load, generation)
+        finally:
+            with self._lock:
+                self._loading[loading] -= 1
+                if not self._loading[loading]:
+                    del self._loading[loading]
+                    self._generations.pop(loading, None)
+
+    async def _load(self, collection: str, record_id: str, load, generation: int):
+        _, stats = self._collection(collection)
+        key = f"{collection}/{record_id}"
+        encoded, version = None, None
+        if self.shared:
+            # Version inconnue (erreur du cache partagé) : le chargement n'y sera pas stocké
+            encoded, version = await self._shared_call(collection, self.shared.get, key) or (None, None)
+        if encoded is not None:
+            value = orjson.loads(encoded)
+            with self._lock:
+                stats["shared_hits"] += 1
+                if self._generations.get((collection, record_id), 0) == generation:
+                    self._store_local(collection, record_id, value, encoded)
+            return value
+
+        value = await load()
+        with self._lock:
+            stats["misses"] += 1
+            if value is None or self._generations.get((collection, record_id), 0) != generation:
+                return value
+            encoded = orjson.dumps(value)
+            self._store_local(collection, record_id, value, encoded)
+        if version is not None:
+            await self._shared_call(collection, self.shared.put, key, encoded, version)
+        return value
+
+    async def invalidate(self, collection: str, record_id: str):
+        with self._lock:
+            cache, _ = self._collection(collection)
+            cache.pop(record_id, None)
+            # Seuls les chargements en cours peuvent encore stocker une valeur périmée
+            if (collection, record_id) in self._loading:
+                self._generations[(collection, record_id)] = self._generations.get((collection, record_id), 0) + 1
+        if self.shared:
+            await self._shared_call(collection, self.shared.invalidate, f"{collection}/{record_id}")
+
+    def clear(self):
+        with self._lock:
+            for cache in self._caches.values():
+                cache.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "shared_store": self.shared is not None,
+                "local_ttl_seconds": self.local_ttl,
+                "collections": {
+                    collection: {
+                        **self._stats[collection],
+                        "evictions": cache.evictions,
+                        "expirations": cache.expirations,
+                        "entries": len(cache),
+                        "bytes": cache.currsize,
+                        "budget_bytes": cache.maxsize
+                    }
+                    for collection, cache in self._caches.items()
+                }
+            }
+
+
+profile_cache = RecordCache(
+    settings.PROFILE_CACHE_BUDGETS, settings.PROFILE_CACHE_DEFAULT_BUDGET_BYTES,
+    settings.PROFILE_CACHE_TTL_SECONDS, settings.PROFILE_CACHE_LOCAL_TTL_SECONDS, settings.PROFILE_CACHE_SHARED_PATH
+)
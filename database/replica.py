@@ -0,0 +1,204 @@
+import copy
+import functools
+import json
+import threading
+import time
+
+from database import firebase
+from configs import settings
+
+
+@functools.lru_cache(maxsize=None)
+def _liveness_stream_class():
+    """pyrebase Stream that also reports every message, keep-alives included.
+
+    pyrebase's SSE client turns keep-alives into None messages that never reach
+    the stream handler; without them a rarely written collection would look
+    like a dead stream.
+    """
+    from pyrebase.pyrebase import Stream, ClosableSSEClient
+
+    class LivenessStream(Stream):
+        def __init__(self, url, stream_handler, build_headers, stream_id, on_message):
+            self.on_message = on_message
+            super().__init__(url, stream_handler, build_headers, stream_id, True)
+
+        def start_stream(self):
+            self.sse = ClosableSSEClient(self.url, session=self.make_session(), build_headers=self.build_headers)
+            for msg in self.sse:
+                self.on_message()
+                if msg:
+                    msg_data = json.loads(msg.data)
+                    msg_data["event"] = msg.event
+                    if self.stream_id:
+                        msg_data["stream_id"] = self.stream_id
+                    self.stream_handler(msg_data)
+
+    return LivenessStream
+
+
+class CollectionReplica:
+    """In-memory copy of one top-level collection, fed by the RTDB stream.
+
+    The stream starts with a `put` of the whole collection at "/", which is the
+    initial load, then sends `put`/`patch` events for every change. pyrebase's
+    SSE client reconnects on its own and the server replays a full `put` after
+    each reconnect; when the stream thread dies or stays silent (no event and no
+    keep-alive) instead, the supervisor in ReplicaManager restarts it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.data = {}
+        self.ready = False
+        self.connected_at = None
+        self.last_event_at = None
+        self.last_message_at = None
+        self.resyncs = 0
+        self.needs_resync = False
+        self._lock = threading.Lock()
+        self._stream = None
+
+    def _put(self, path: str, data):
+        segments = [segment for segment in path.split("/") if segment]
+        if not segments:
+            self.data = data if isinstance(data, dict) else {}
+            return
+        node = self.data
+        for segment in segments[:-1]:
+            if not isinstance(node.get(segment), dict):
+                node[segment] = {}
+            node = node[segment]
+        if data is None:
+            node.pop(segments[-1], None)
+        else:
+            node[segments[-1]] = data
+
+    def _handle(self, message: dict):
+        event = message.get("event")
+        path = message.get("path", "/")
+        if event in ("put", "patch"):
+            with self._lock:
+                if event == "put":
+                    self._put(path, message.get("data"))
+                else:
+                    # Un patch équivaut à un put par clé (les clés peuvent être des chemins)
+                    for key, value in (message.get("data") or {}).items():
+                        self._put(f"{path.rstrip('/')}/{key}", value)
+                self.ready = True
+                self.last_event_at = time.time()
+        elif event in ("cancel", "auth_revoked"):
+            self.needs_resync = True
+
+    def _heard(self):
+        self.last_message_at = time.time()
+
+    def start(self):
+        self.needs_resync = False
+        self.connected_at = time.time()
+        database = firebase.get_app().database().child(self.name)
+        self._stream = _liveness_stream_class()(
+            database.build_request_url(None), self._handle, database.build_headers, self.name, self._heard
+        )
+
+    def stop(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception as e:
+                print(f"Error closing {self.name} stream: {str(e)}")
+
+    def resync(self):
+        self.stop()
+        self.resyncs += 1
+        self.start()
+
+    def alive(self) -> bool:
+        return bool(self._stream and self._stream.thread and self._stream.thread.is_alive())
+
+    def _since(self, *timestamps) -> float:
+        since = max(timestamp or 0 for timestamp in timestamps)
+        return time.time() - since if since else float("inf")
+
+    def silence(self) -> float:
+        """Seconds since the stream last sent anything, keep-alives included (or since connecting)"""
+        return self._since(self.last_message_at, self.connected_at)
+
+    def last_change(self) -> float:
+        """Seconds since the last change received"""
+        return self._since(self.last_event_at)
+
+    def read(self, segments: list):
+        with self._lock:
+            node = self.data
+            for segment in segments:
+                if not isinstance(node, dict) or segment not in node:
+                    return None
+                node = node[segment]
+            # Copie : les handlers modifient parfois les données lues
+            return copy.deepcopy(node) if node != {} else None
+
+
+class ReplicaManager:
+    """Opt-in replicas of the hot collections, with a supervisor thread"""
+
+    def __init__(self, enabled: bool, collections: list):
+        self.enabled = enabled
+        self.replicas = {name: CollectionReplica(name) for name in collections}
+        self._stop = threading.Event()
+        self._supervisor = None
+
+    def start(self):
+        if not self.enabled or self._supervisor:
+            return
+        for replica in self.replicas.values():
+            replica.start()
+        self._stop.clear()
+        self._supervisor = threading.Thread(target=self._supervise, name="replica-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def _supervise(self):
+        while not self._stop.wait(settings.REPLICA_CHECK_SECONDS):
+            for replica in self.replicas.values():
+                if (replica.needs_resync or not replica.alive()
+                        or replica.silence() > settings.REPLICA_MAX_SILENCE_SECONDS):
+                    print(f"Resyncing {replica.name} replica")
+                    try:
+                        replica.resync()
+                    except Exception as e:
+                        print(f"Error resyncing {replica.name} replica: {str(e)}")
+
+    def stop(self):
+        self._stop.set()
+        self._supervisor = None
+        for replica in self.replicas.values():
+            replica.stop()
+
+    def read(self, path: str):
+        """Returns (True, value) when the path is served by a ready replica, else (False, None)"""
+        if not self.enabled:
+            return False, None
+        segments = [segment for segment in path.split("/") if segment]
+        replica = self.replicas.get(segments[0]) if segments else None
+        if replica is None or not replica.ready:
+            return False, None
+        return True, replica.read(segments[1:])
+
+    def metrics(self) -> dict:
+        return {
+            name: {
+                "ready": replica.ready,
+                "connected": replica.alive(),
+                "silence_seconds": replica.silence(),
+                "last_change_seconds": replica.last_change(),
+                "resyncs": replica.resyncs,
+                "records": len(replica.data)
+            }
+            for name, replica in self.replicas.items()
+        }
+
+
+# Le streaming SSE n'existe qu'avec le backend Firebase
+replica_manager = ReplicaManager(settings.REPLICA_ENABLED and settings.DATABASE_BACKEND == "firebase",
+                                 settings.REPLICA_COLLECTIONS)
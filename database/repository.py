@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+
+from database import firebase
+from database.instrumentation import InstrumentedDatabase, metrics_registry
+from database.replica import replica_manager
+from configs import settings
+
+# Async data-access layer used by every router.
+#
+# Reads may ask for the in-process replica (database/replica.py) with
+# `replica=True`; they fall back to a direct read when the collection is not
+# replicated or the replica is not loaded yet.
+#
+# pyrebase and firebase_admin are blocking libraries: calling them directly from
+# an `async def` handler stalls the whole event loop. Every backend call goes
+# through a bounded thread pool instead and is awaited with a timeout, so a
+# worker keeps serving other requests while one of them waits on the network.
+#
+# Paths are plain RTDB paths ("students/<uid>/validated_skills"). A fresh
+# pyrebase Database handle is built for each call because the handle keeps the
+# current path and query on the instance and cannot be shared between threads.
+# Handles are wrapped by database/instrumentation.py, which records each call
+# against the request that made it (the context is copied into the pool thread).
+#
+# Identical concurrent reads (same path, same query) under the prefixes of
+# COALESCED_READ_PATHS share one in-flight backend call ("singleflight"). The
+# call runs in its own task, so it completes for the other waiters even if the
+# request that started it is cancelled. Every caller receives its own copy of
+# the result, whether or not another caller joined, so handlers may mutate what
+# they read. Coalescing is
+# opt-in per path because a read joining a call issued before a concurrent
+# write may return the pre-write value: read-modify-write sequences and index
+# loads pass `coalesce=False`.
+
+_executor = ThreadPoolExecutor(max_workers=settings.DB_POOL_SIZE, thread_name_prefix="rtdb")
+
+
+class DatabaseTimeoutError(Exception):
+    pass
+
+
+_in_flight = {}
+
+
+def _ref(path: str = ""):
+    ref = InstrumentedDatabase(firebase.get_app().database())
+    return ref.child(path) if path else ref
+
+
+async def ensure_initialized():
+    """Build the Firebase clients off the event loop if the startup warm-up has not yet"""
+    if not firebase.initialized():
+        await run_blocking(firebase.initialize)
+
+
+async def run_blocking(func, *args, timeout: float = None, **kwargs):
+    """Run a blocking call on the database thread pool and await its result"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    future = loop.run_in_executor(_executor, context.run, functools.partial(func, *args, **kwargs))
+    timeout = timeout or settings.DB_CALL_TIMEOUT_SECONDS
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        raise DatabaseTimeoutError(f"Backend call {getattr(func, '__name__', func)} exceeded {timeout}s")
+
+
+def _coalesced(path: str) -> bool:
+    path = path.strip("/")
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in settings.COALESCED_READ_PATHS)
+
+
+def _copy(value):
+    # Données JSON : l'aller-retour orjson est bien plus rapide que copy.deepcopy
+    return orjson.loads(orjson.dumps(value)) if isinstance(value, (dict, list)) else value
+
+
+async def _singleflight(key: tuple, load):
+    """Await `load()`, sharing the call with identical concurrent callers"""
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    else:
+        metrics_registry.observe_coalesced(key[1].strip("/").split("/")[0])
+    value = await asyncio.shield(task)
+    # Résultat partagé : une copie par appelant, même sans autre appelant au moment du
+    # réveil (un appelant peut encore le rejoindre) ; l'original n'est rendu à personne
+    return _copy(value)
+
+
+async def get(path: str, replica: bool = False, coalesce: bool = None):
+    if replica:
+        hit, value = replica_manager.read(path)
+        if hit:
+            return value
+    if _coalesced(path) if coalesce is None else coalesce:
+        return await _singleflight(("get", path), lambda: run_blocking(lambda: _ref(path).get().val()))
+    return await run_blocking(lambda: _ref(path).get().val())
+
+
+async def keys(path: str) -> list:
+    """Child keys of a node, without downloading the children (shallow read)"""
+    return list(await run_blocking(lambda: _ref(path).shallow().get().val()) or [])
+
+
+async def fetch_many(collection: str, record_ids, replica: bool = False) -> dict:
+    """Concurrent keyed reads of several records of a collection"""
+    record_ids = list(record_ids)
+    records = await asyncio.gather(*(get(f"{collection}/{record_id}", replica=replica) for record_id in record_ids))
+    return {record_id: record for record_id, record in zip(record_ids, records) if record}
+
+
+async def query(path: str, order_by: str, equal_to=None, start_at=None, end_at=None,
+                limit_to_first: int = None, limit_to_last: int = None, coalesce: bool = None):
+    """Ordered query on a collection (order_by_child + optional filters).
+
+    `order_by` is a child key, or "$key" / "$value" to order by key or value.
+    """
+    def _query():
+        ref = _ref(path).order_by_child(order_by)
+        if equal_to is not None:
+            ref = ref.equal_to(equal_to)
+        if start_at is not None:
+            ref = ref.start_at(start_at)
+        if end_at is not None:
+            ref = ref.end_at(end_at)
+        if limit_to_first is not None:
+            ref = ref.limit_to_first(limit_to_first)
+        if limit_to_last is not None:
+            ref = ref.limit_to_last(limit_to_last)
+        return ref.get().val()
+    if _coalesced(path) if coalesce is None else coalesce:
+        key = ("query", path, order_by, equal_to, start_at, end_at, limit_to_first, limit_to_last)
+        return await _singleflight(key, lambda: run_blocking(_query))
+    return await run_blocking(_query)
+
+
+async def set(path: str, value):
+    return await run_blocking(lambda: _ref(path).set(value))
+
+
+async def update(path: str, value: dict):
+    return await run_blocking(lambda: _ref(path).update(value))
+
+
+async def update_multi(updates: dict):
+    """Atomic multi-path update at the database root ({"a/b": v1, "c/d": v2})"""
+    return await update("", updates)
+
+
+def increment(delta=1) -> dict:
+    """Server-side increment, applied atomically by the database (no read-then-write)"""
+    return {".sv": {"increment": delta}}
+
+
+async def remove(path: str):
+    return await run_blocking(lambda: _ref(path).remove())
+
+
+def shutdown():
+    _executor.shutdown(wait=False)
@@ -0,0 +1,122 @@
+import asyncio
+import sys
+
+from database import repository, indexes
+from configs import settings
+
+# Read state of notifications, kept apart from the notification bodies.
+#
+#   index/unread_notifications/<recipient_id>/<notification_id> = created_at
+#   stats/unread_notifications/<recipient_id>                   = unread count
+#
+# NotificationWriter adds the index entries and a server-side increment of the
+# counter in the same multi-path update as the notifications (created_entries),
+# so the unread badge is a single read of one integer. Marking notifications as
+# read flags the bodies, drops their index entries and decrements the counter,
+# again in one multi-path update.
+#
+# Only notifications found in the unread index are counted, so marking the same
+# notification twice does not decrement twice; mark-read calls are serialized
+# per worker by `read_lock`. Concurrent calls from several workers could still
+# race; `recount` rebuilds the index and counters from the notifications:
+#
+#   python -m database.unread_notifications recount
+
+UNREAD_BY_RECIPIENT = "index/unread_notifications"
+UNREAD_COUNTS = "stats/unread_notifications"
+
+read_lock = asyncio.Lock()
+
+
+def created_entries(notifications: list) -> dict:
+    """Unread index entries and counter increments for new notifications"""
+    entries, created = {}, {}
+    for notification in notifications:
+        recipient_id = indexes.notification_recipient(notification)
+        if not recipient_id or notification.get('read'):
+            continue
+        entries[f"{UNREAD_BY_RECIPIENT}/{recipient_id}/{notification['id']}"] = notification.get('created_at', '')
+        created[recipient_id] = created.get(recipient_id, 0) + 1
+    # Un seul incrément par destinataire : deux valeurs pour un même chemin s'écraseraient
+    for recipient_id, count in created.items():
+        entries[f"{UNREAD_COUNTS}/{recipient_id}"] = repository.increment(count)
+    return entries
+
+
+def read_entries(recipient_id: str, notification_ids) -> dict:
+    """Entries marking unread notifications of one recipient as read"""
+    notification_ids = list(notification_ids)
+    entries = {}
+    for notification_id in notification_ids:
+        entries[f"notifications/{notification_id}/read"] = True
+        entries[f"{UNREAD_BY_RECIPIENT}/{recipient_id}/{notification_id}"] = None
+    if notification_ids:
+        entries[f"{UNREAD_COUNTS}/{recipient_id}"] = repository.increment(-len(notification_ids))
+    return entries
+
+
+async def get_count(recipient_id: str) -> int:
+    return max(await repository.get(f"{UNREAD_COUNTS}/{recipient_id}") or 0, 0)
+
+
+async def mark_read(recipient_id: str, notification_ids) -> int:
+    """Mark the given notifications as read; ids not unread for this recipient are ignored"""
+    notification_ids = list(dict.fromkeys(notification_ids))
+    async with read_lock:
+        unread = await asyncio.gather(*(
+            repository.get(f"{UNREAD_BY_RECIPIENT}/{recipient_id}/{notification_id}")
+            for notification_id in notification_ids
+        ))
+        marked = [notification_id for notification_id, created_at in zip(notification_ids, unread)
+                  if created_at is not None]
+        if marked:
+            await repository.update_multi(read_entries(recipient_id, marked))
+    return len(marked)
+
+
+async def mark_read_before(recipient_id: str, before: str, limit: int = None) -> int:
+    """Mark as read the oldest unread notifications created before `before` (at most `limit`)"""
+    limit = limit or settings.NOTIFICATION_MARK_READ_MAX
+    async with read_lock:
+        entries = await repository.query(f"{UNREAD_BY_RECIPIENT}/{recipient_id}", order_by="$value",
+                                         end_at=before, limit_to_first=limit + 1) or {}
+        # end_at est inclusif : "avant" exclut les notifications créées à cet instant
+        marked = sorted((created_at, notification_id) for notification_id, created_at in entries.items()
+                        if (created_at or "") < before)[:limit]
+        if marked:
+            await repository.update_multi(read_entries(recipient_id, [notification_id for _, notification_id in marked]))
+    return len(marked)
+
+
+async def recount(chunk_size: int = 500) -> dict:
+    """Rebuild the unread index and counters from the notifications"""
+    notifications = await repository.get("notifications") or {}
+    unread = {}
+    for notification_id, notification in notifications.items():
+        if not isinstance(notification, dict) or notification.get('read'):
+            continue
+        recipient_id = indexes.notification_recipient(notification)
+        if recipient_id:
+            unread.setdefault(recipient_id, {})[notification_id] = notification.get('created_at', '')
+
+    recipients = set(unread) | set(await repository.keys(UNREAD_COUNTS)) | set(await repository.keys(UNREAD_BY_RECIPIENT))
+    updates = []
+    for recipient_id in recipients:
+        entries = unread.get(recipient_id)
+        updates.append((f"{UNREAD_BY_RECIPIENT}/{recipient_id}", entries or None))
+        updates.append((f"{UNREAD_COUNTS}/{recipient_id}", len(entries) if entries else None))
+    async with read_lock:
+        for start in range(0, len(updates), chunk_size):
+            await repository.update_multi(dict(updates[start:start + chunk_size]))
+
+    result = {"recipients": len(unread), "unread": sum(len(entries) for entries in unread.values())}
+    print(f"Unread notifications recounted: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    # Usage : python -m database.unread_notifications recount
+    if sys.argv[1:] != ["recount"]:
+        print("Usage: python -m database.unread_notifications recount")
+        sys.exit(1)
+    asyncio.run(recount())
@@ -1,5 +1,9 @@
 # import du framework
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import des routers
@@ -9,15 +13,78 @@ import routers.router_matching
 import routers.router_students
 import routers.router_professionals
 import routers.router_companies
+import routers.router_admin
+import routers.router_notifications
+
+from database.auth_cache import signing_key_refresher
+from database import repository
+from database.instrumentation import instrumentation_middleware, metrics_registry, QueryTokenFilter
+from services.serialization import NegotiatedResponse, ContentNegotiationMiddleware, prebuilt
+from database.replica import replica_manager
+from database.notification_hub import notification_hub
+from database.record_cache import profile_cache
+from services.job_queue import job_queue
+from services.skill_index import skill_index
+from services.expertise_matcher import expertise_matcher
+from services.startup import warm_up
+from services.notification_retention import retention_scheduler
+from configs import settings
 
 # Documentation
 from documentation.description import api_description
 
+# Préchauffage des backends, dans l'ordre, en tâche de fond (voir /ready)
+async def init_backends():
+    # Clients Firebase Admin et pyrebase (ou backend local), hors de la boucle d'événements
+    await repository.ensure_initialized()
+
+async def start_signing_key_refresher():
+    # Préchargement des clés de signature Google (backend Firebase uniquement)
+    if settings.DATABASE_BACKEND == "firebase":
+        signing_key_refresher.start()
+
+async def start_replica():
+    # Réplique locale des collections chaudes (si REPLICA_ENABLED)
+    replica_manager.start()
+
+async def start_indexes():
+    # Index des compétences et des domaines d'expertise (construits puis reconstruits périodiquement)
+    for index in (skill_index, expertise_matcher):
+        await index.ensure_ready()
+        index.start()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # File de tâches en arrière-plan ; le reste est préchauffé sans retarder /health
+    await job_queue.start()
+    # Purge planifiée des notifications (NOTIFICATION_RETENTION_INTERVAL_SECONDS)
+    retention_scheduler.start()
+    warm_up.start([
+        ("firebase", init_backends),
+        ("signing_keys", start_signing_key_refresher),
+        ("replica", start_replica),
+        ("indexes", start_indexes),
+    ])
+    yield
+    await warm_up.stop()
+    await retention_scheduler.stop()
+    signing_key_refresher.stop()
+    # File drainée à l'arrêt, avant le pool de threads
+    await job_queue.stop()
+    replica_manager.stop()
+    await skill_index.stop()
+    await expertise_matcher.stop()
+    # Libération du pool de threads d'accès à la base
+    repository.shutdown()
+
 # Initialisation de l'API
 app = FastAPI(
+    lifespan=lifespan,
     title="StudyConnect - Plateforme de Validation et Mise en Relation",
     description=api_description,
-    version="1.0.0"
+    version="1.0.0",
+    # orjson par défaut, msgpack si le client envoie "Accept: application/msgpack"
+    default_response_class=NegotiatedResponse
 )
 
 # Configuration CORS
@@ -27,8 +94,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Comptage et chronométrage des appels backend par requête (Server-Timing, journal, /metrics)
+app.middleware("http")(instrumentation_middleware)
+
+# Tokens passés en paramètre de requête (/notifications/stream) masqués dans les journaux d'uvicorn
+for logger_name in ("uvicorn.access", "uvicorn.error"):
+    logging.getLogger(logger_name).addFilter(QueryTokenFilter())
+
+# Négociation du format de réponse (JSON / msgpack) selon l'en-tête Accept
+app.add_middleware(ContentNegotiationMiddleware)
+
 # Ajouter les routers dédiés
 app.include_router(routers.router_auth.router)
 app.include_router(routers.router_skills.router)
@@ -36,6 +114,8 @@ app.include_router(routers.router_matching.router)
 app.include_router(routers.router_students.router)
 app.include_router(routers.router_professionals.router)
 app.include_router(routers.router_companies.router)
+app.include_router(routers.router_admin.router)
+app.include_router(routers.router_notifications.router)
 
 # Route racine
 @app.get("/")
@@ -50,11 +130,49 @@ async def root():
             "matching": "/matching",
             "students": "/students",
             "professionals": "/professionals",
-            "companies": "/companies"
+            "companies": "/companies",
+            "admin": "/admin",
+            "notifications": "/notifications"
         }
     }
 
-# Route de santé de l'API
+# Route de santé de l'API (répond dès le démarrage, sans attendre les backends)
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "StudyConnect API"}
+
+# Disponibilité : 503 tant que le préchauffage des backends n'est pas terminé
+@app.get("/ready")
+async def readiness_check():
+    status = warm_up.status()
+    return prebuilt(status, status_code=200 if status["ready"] else 503)
+
+# Métriques de la file de tâches (profondeur, latences)
+@app.get("/jobs/metrics")
+async def job_queue_metrics():
+    return job_queue.metrics()
+
+# État de la réplique locale (fraîcheur, resynchronisations)
+@app.get("/replica/metrics")
+async def replica_metrics():
+    return replica_manager.metrics()
+
+# Connexions push des notifications (WebSocket / SSE)
+@app.get("/notifications/push/metrics")
+async def notification_push_metrics():
+    return notification_hub.metrics()
+
+# Dernière purge des notifications (enregistrements et octets supprimés)
+@app.get("/notifications/retention/metrics")
+async def notification_retention_metrics():
+    return retention_scheduler.metrics()
+
+# Cache des profils (succès, échecs, évictions, octets par collection)
+@app.get("/cache/metrics")
+async def profile_cache_metrics():
+    return profile_cache.metrics()
+
+# Métriques Prometheus (latence par route, appels backend par requête et par opération)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return metrics_registry.render()
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from routers.router_auth import get_current_user
+from services import exports, bulk_import, notification_retention
+from configs import settings
+from typing import List, Optional
+
+router = APIRouter(prefix='/admin', tags=['Administration'])
+
+# Administrateur : custom claim Firebase "admin" ou uid listé dans ADMIN_UIDS
+def is_admin(current_user: dict) -> bool:
+    return current_user.get('admin') is True or current_user.get('uid') in settings.ADMIN_UIDS
+
+@router.get('/export/{collection}')
+async def export_collection(
+    collection: str,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    after: Optional[str] = Query(None, description="Clé `_key` du dernier enregistrement reçu, pour reprendre un export"),
+    fields: Optional[List[str]] = Query(None, description="Colonnes du CSV (par défaut celles du premier lot)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Export complet d'une collection en streaming (NDJSON ou CSV, gzip si accepté)"""
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Réservé aux administrateurs")
+    if collection not in exports.EXPORTABLE_COLLECTIONS:
+        raise HTTPException(status_code=404, detail="Collection non exportable")
+
+    if format == "csv":
+        body = exports.csv_lines(collection, after, fields)
+        media_type = "text/csv; charset=utf-8"
+    else:
+        body = exports.ndjson_lines(collection, after)
+        media_type = "application/x-ndjson"
+
+    headers = {"Content-Disposition": f'attachment; filename="{collection}.{format}"', "Vary": "Accept-Encoding"}
+    if exports.accepts_gzip(request.headers.get("accept-encoding")):
+        body = exports.gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+@router.post('/import/{kind}')
+async def import_records(
+    kind: str,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Par défaut d'après le Content-Type"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Import en masse (NDJSON ou CSV dans le corps de la requête) d'étudiants, d'opportunités ou du catalogue de compétences"""
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Réservé aux administrateurs")
+    if kind not in bulk_import.KINDS:
+        raise HTTPException(status_code=404, detail="Type d'import inconnu")
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+
+    try:
+        content = await request.body()
+        return await bulk_import.run_import(kind, content, format)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Le fichier doit être encodé en UTF-8")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post('/notifications/retention')
+async def run_notification_retention(
+    dry_run: bool = Query(False, description="Calcule ce qui serait supprimé sans rien supprimer"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Purge immédiate des notifications selon les règles de rétention"""
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Réservé aux administrateurs")
+    try:
+        return await notification_retention.run(dry_run=dry_run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
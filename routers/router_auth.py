@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
 from firebase_admin import auth
-from database.firebase import db, authUser
+from database.firebase import get_password_auth
+from database import repository, indexes, pagination
+from database.instrumentation import traced
+from database.pagination import PageParams, page_params
+from database.auth_cache import token_cache, user_cache
+from database.record_cache import profile_cache
+from services.expertise_matcher import expertise_matcher
+from services import serialization
 from classes.schemas_dto import User, StudentCreate, Professional, ProfessionalCreate, CompanyCreate
 from datetime import datetime
 
@@ -13,12 +20,20 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/login')
 router = APIRouter(prefix='/auth', tags=['Auth'])
 
 # Utilitaire: Vérifie le token et retourne l'utilisateur
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
-        decoded_token = auth.verify_id_token(token)
-        user_data = db.child("users").child(decoded_token['uid']).get().val()
-        if not user_data:
-            raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+        decoded_token = token_cache.get(token)
+        if decoded_token is None:
+            await repository.ensure_initialized()
+            decoded_token = await repository.run_blocking(traced("auth.verify_id_token", auth.verify_id_token), token)
+            token_cache.put(token, decoded_token)
+        uid = decoded_token['uid']
+        user_data = user_cache.get(uid)
+        if user_data is None:
+            user_data = await repository.get(f"users/{uid}")
+            if not user_data:
+                raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+            user_cache.put(uid, user_data)
         return {**decoded_token, **user_data, 'token': token}
     except Exception:
         raise HTTPException(status_code=401, detail="Token invalide")
@@ -31,13 +46,15 @@ async def signup(user_data: User):
     if len(password) < 6:
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters long")
     try:
-        user = auth.create_user(email=email, password=password)
+        await repository.ensure_initialized()
+        user = await repository.run_blocking(traced("auth.create_user", auth.create_user), email=email, password=password)
         user_data_dict = {
             "email": email,
             "uid": user.uid,
             "created_at": str(user.user_metadata.creation_timestamp)
         }
-        db.child("users").child(user.uid).set(user_data_dict)
+        await repository.set(f"users/{user.uid}", user_data_dict)
+        user_cache.invalidate(user.uid)
         return JSONResponse(content={
             "message": f"User account created successfully for user {user.uid}",
             "user_id": user.uid
@@ -51,7 +68,9 @@ async def signup(user_data: User):
 @router.post('/signup/student', status_code=201)
 async def signup_student(student_data: StudentCreate):
     try:
-        user = auth.create_user(
+        await repository.ensure_initialized()
+        user = await repository.run_blocking(
+            traced("auth.create_user", auth.create_user),
             email=student_data.email,
             password=student_data.password
         )
@@ -60,12 +79,17 @@ async def signup_student(student_data: StudentCreate):
         student_dict['user_type'] = 'student'
         student_dict['created_at'] = datetime.now().isoformat()
         del student_dict['password']  # Ne pas stocker le mot de passe
-        db.child("students").child(user.uid).set(student_dict)
-        db.child("users").child(user.uid).set({
-            "email": student_data.email,
-            "user_type": "student",
-            "profile_complete": False
+        # Profil et entrée users en un seul commit multi-chemins
+        await repository.update_multi({
+            f"students/{user.uid}": student_dict,
+            f"users/{user.uid}": {
+                "email": student_data.email,
+                "user_type": "student",
+                "profile_complete": False
+            }
         })
+        user_cache.invalidate(user.uid)
+        await profile_cache.invalidate("students", user.uid)
         return {"message": "Compte étudiant créé avec succès", "user_id": user.uid}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -74,7 +98,9 @@ async def signup_student(student_data: StudentCreate):
 @router.post('/signup/professional', status_code=201)
 async def signup_professional(professional_data: ProfessionalCreate):
     try:
-        user = auth.create_user(
+        await repository.ensure_initialized()
+        user = await repository.run_blocking(
+            traced("auth.create_user", auth.create_user),
             email=professional_data.email,
             password=professional_data.password
         )
@@ -83,12 +109,18 @@ async def signup_professional(professional_data: ProfessionalCreate):
         professional_dict['user_type'] = 'professional'
         professional_dict['created_at'] = datetime.now().isoformat()
         del professional_dict['password']  # Ne pas stocker le mot de passe
-        db.child("professionals").child(user.uid).set(professional_dict)
-        db.child("users").child(user.uid).set({
-            "email": professional_data.email,
-            "user_type": "professional",
-            "verified": False
+        # Profil et entrée users en un seul commit multi-chemins
+        await repository.update_multi({
+            f"professionals/{user.uid}": professional_dict,
+            f"users/{user.uid}": {
+                "email": professional_data.email,
+                "user_type": "professional",
+                "verified": False
+            }
         })
+        expertise_matcher.set_professional(user.uid, professional_dict['expertise_domains'])
+        user_cache.invalidate(user.uid)
+        await profile_cache.invalidate("professionals", user.uid)
         return {"message": "Compte professionnel créé avec succès", "user_id": user.uid}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -97,7 +129,9 @@ async def signup_professional(professional_data: ProfessionalCreate):
 @router.post('/signup/company', status_code=201)
 async def signup_company(company_data: CompanyCreate):
     try:
-        user = auth.create_user(
+        await repository.ensure_initialized()
+        user = await repository.run_blocking(
+            traced("auth.create_user", auth.create_user),
             email=company_data.email,
             password=company_data.password
         )
@@ -106,12 +140,17 @@ async def signup_company(company_data: CompanyCreate):
         company_dict['user_type'] = 'company'
         company_dict['created_at'] = datetime.now().isoformat()
         del company_dict['password']  # Ne pas stocker le mot de passe
-        db.child("companies").child(user.uid).set(company_dict)
-        db.child("users").child(user.uid).set({
-            "email": company_data.email,
-            "user_type": "company",
-            "verified": False
+        # Profil et entrée users en un seul commit multi-chemins
+        await repository.update_multi({
+            f"companies/{user.uid}": company_dict,
+            f"users/{user.uid}": {
+                "email": company_data.email,
+                "user_type": "company",
+                "verified": False
+            }
         })
+        user_cache.invalidate(user.uid)
+        await profile_cache.invalidate("companies", user.uid)
         return {"message": "Compte entreprise créé avec succès", "user_id": user.uid}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -120,7 +159,9 @@ async def signup_company(company_data: CompanyCreate):
 @router.post('/login')
 async def login(user_credentials: OAuth2PasswordRequestForm = Depends()):
     try:
-        user = authUser.sign_in_with_email_and_password(
+        await repository.ensure_initialized()
+        user = await repository.run_blocking(
+            traced("auth.sign_in_with_email_and_password", get_password_auth().sign_in_with_email_and_password),
             email=user_credentials.username,
             password=user_credentials.password
         )
@@ -138,22 +179,20 @@ def secure_endpoint(user_data: dict = Depends(get_current_user)):
     return user_data
 
 @router.get('/my-validations')
-async def get_my_validations(current_user: dict = Depends(get_current_user)):
-    """Étudiant récupère ses demandes de validation"""
+async def get_my_validations(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    """Étudiant récupère ses demandes de validation (plus récentes en premier, paginées)"""
     if current_user.get('user_type') != 'student':
         raise HTTPException(status_code=403, detail="Réservé aux étudiants")
     
     try:
-        all_validations = db.child("skill_validations").get().val() or {}
-        my_validations = []
-        
-        for validation_id, validation in all_validations.items():
-            if validation.get('student_id') == current_user['uid']:
-                validation['id'] = validation_id
-                my_validations.append(validation)
-        
-        # Trier par date de création (plus récent en premier)
-        my_validations.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return my_validations
+        my_validations, next_cursor = await pagination.page_index(
+            indexes.VALIDATIONS_BY_STUDENT, current_user['uid'], "skill_validations", page.limit, page.cursor
+        )
+        pagination.set_next_cursor(response, next_cursor)
+        return serialization.prebuilt(my_validations, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
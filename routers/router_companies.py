@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from classes.schemas_dto import Company, CompanyBase, Opportunity
 from routers.router_auth import get_current_user
-from database.firebase import db
+from database import repository, indexes, pagination
+from database.pagination import PageParams, page_params
+from database.record_cache import profile_cache
+from services import serialization
 from typing import List
 
 router = APIRouter(prefix='/companies', tags=['Entreprises'])
@@ -12,22 +15,35 @@ async def get_company_profile(current_user: dict = Depends(get_current_user)):
     if current_user.get('user_type') != 'company':
         raise HTTPException(status_code=403, detail="Réservé aux entreprises")
     
+    async def load():
+        company_data = await repository.get(f"companies/{current_user['uid']}")
+        return Company(**company_data).model_dump(mode="json") if company_data else None
+
     try:
-        company_data = db.child("companies").child(current_user['uid']).get().val()
-        if not company_data:
+        profile = await profile_cache.get("companies", current_user['uid'], load)
+        if not profile:
             raise HTTPException(status_code=404, detail="Profil entreprise non trouvé")
-        return Company(**company_data)
+        return serialization.prebuilt(profile)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/opportunities', response_model=List[Opportunity])
-async def get_company_opportunities(current_user: dict = Depends(get_current_user)):
-    """Récupère toutes les opportunités de l'entreprise"""
+async def get_company_opportunities(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    """Récupère les opportunités de l'entreprise (plus récentes en premier, paginées)"""
     if current_user.get('user_type') != 'company':
         raise HTTPException(status_code=403, detail="Réservé aux entreprises")
     
     try:
-        opportunities = db.child("opportunities").order_by_child("company_id").equal_to(current_user['uid']).get().val() or {}
-        return [Opportunity(**opp) for opp in opportunities.values()]
+        opportunities, next_cursor = await pagination.page_index(
+            indexes.OPPORTUNITIES_BY_COMPANY, current_user['uid'], "opportunities", page.limit, page.cursor,
+            replica=True
+        )
+        pagination.set_next_cursor(response, next_cursor)
+        # Enregistrements écrits par create_opportunity : pas de revalidation par le modèle
+        return serialization.prebuilt(opportunities, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
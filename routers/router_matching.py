@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from classes.schemas_dto import Opportunity, OpportunityBase, Application
 from routers.router_auth import get_current_user
-from database.firebase import db
+from database import repository, indexes, pagination
+from database.pagination import PageParams, page_params
+from database.notification_writer import NotificationWriter
+from services.job_queue import job_queue, QueueFullError
+from services.skill_index import skill_index
+from services import recommendations, serialization
+from services.matching_engine import LEVEL_BONUS
+from configs import settings
 from typing import List
 from datetime import datetime
 import uuid
@@ -29,44 +36,65 @@ async def create_opportunity(
         opportunity_dict = opportunity.dict()
         opportunity_dict['created_at'] = opportunity_dict['created_at'].isoformat()
         
-        db.child("opportunities").child(opportunity_id).set(opportunity_dict)
+        # L'opportunité et son index dans le même commit multi-chemins
+        await skill_index.ensure_ready()
+        await repository.update_multi({
+            f"opportunities/{opportunity_id}": opportunity_dict,
+            **indexes.opportunity_entries(opportunity_id, opportunity_dict)
+        })
+        skill_index.add_opportunity(opportunity_id, opportunity_dict)
         
-        # Notifier les étudiants correspondants
-        await notify_matching_students(opportunity)
+        # Recommandations et notifications des étudiants correspondants en arrière-plan
+        try:
+            await job_queue.enqueue("notify_matching_students", opportunity_dict)
+        except QueueFullError:
+            await match_new_opportunity(opportunity_dict)
         
         return opportunity
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/recommendations')
-async def get_student_recommendations(current_user: dict = Depends(get_current_user)):
-    """Étudiant récupère les opportunités recommandées"""
+async def get_student_recommendations(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    """Étudiant récupère les opportunités recommandées (meilleur score en premier, paginées)"""
     if current_user.get('user_type') != 'student':
         raise HTTPException(status_code=403, detail="Réservé aux étudiants")
     
     try:
-        student_data = db.child("students").child(current_user['uid']).get().val()
-        validated_skills = student_data.get('validated_skills', {})
-        
-        all_opportunities = db.child("opportunities").get().val() or {}
-        recommendations = []
+        # Liste matérialisée (services/recommendations.py) : une seule lecture par clé
+        scores = await recommendations.get_for_student(current_user['uid'])
+        await skill_index.ensure_ready()
+        opportunities = skill_index.opportunities
+        # Opportunités créées par un autre worker et pas encore dans l'index local
+        missing = [opp_id for opp_id in scores if opp_id not in opportunities]
+        if missing:
+            opportunities = {**opportunities, **await repository.fetch_many("opportunities", missing, replica=True)}
         
-        for opp_id, opportunity in all_opportunities.items():
-            required_skills = opportunity.get('required_skills', [])
-            match_score = calculate_match_score(validated_skills, required_skills)
-            
-            if match_score > 0.3:  # Seuil de correspondance
-                opportunity['match_score'] = match_score
-                recommendations.append(opportunity)
-        
-        # Trier par score de correspondance
-        recommendations.sort(key=lambda x: x['match_score'], reverse=True)
-        return recommendations
+        # Top-k par score puis date de création et id (tas plutôt que tri complet)
+        candidates = (
+            (match_score, opportunities[opp_id].get('created_at', ''), opp_id)
+            for opp_id, match_score in scores.items() if opp_id in opportunities
+        )
+        top, next_cursor = pagination.paginate(candidates, sort_key=lambda x: x, limit=page.limit,
+                                               cursor=page.cursor, reverse=True)
+        pagination.set_next_cursor(response, next_cursor)
+        return serialization.prebuilt(
+            [{**opportunities[opp_id], 'match_score': match_score} for match_score, _, opp_id in top], response
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def calculate_match_score(student_skills: dict, required_skills: list) -> float:
-    """Calcule le score de correspondance entre compétences étudiant et exigences"""
+def calculate_match_score(student_skills: dict, required_skills: list, preferred_skills: list = None,
+                          preferred_weight: float = settings.PREFERRED_SKILLS_WEIGHT) -> float:
+    """Calcule le score de correspondance entre compétences étudiant et exigences.
+
+    Version de référence de services.matching_engine.ScoringEngine, qui calcule
+    les mêmes scores par lots.
+    """
     if not required_skills:
         return 0.0
     
@@ -74,38 +102,45 @@ def calculate_match_score(student_skills: dict, required_skills: list) -> float:
     for skill in required_skills:
         if skill in student_skills:
             # Bonus selon le niveau validé
-            level_bonus = {
-                'débutant': 0.25,
-                'intermédiaire': 0.5,
-                'avancé': 0.75,
-                'expert': 1.0
-            }
-            matched_skills += level_bonus.get(student_skills[skill], 0)
+            matched_skills += LEVEL_BONUS.get(student_skills[skill], 0)
+    score = matched_skills / len(required_skills)
+    
+    # Compétences souhaitées, pondérées
+    if preferred_weight and preferred_skills:
+        matched_preferred = 0
+        for skill in preferred_skills:
+            if skill in student_skills:
+                matched_preferred += LEVEL_BONUS.get(student_skills[skill], 0)
+        score += preferred_weight * (matched_preferred / len(preferred_skills))
     
-    return matched_skills / len(required_skills)
+    return score
 
 # Fonction pour notifier les étudiants correspondant à une opportunité
 async def notify_matching_students(opportunity):
     try:
-        students = db.child("students").get().val() or {}
         required_skills = opportunity.required_skills if hasattr(opportunity, 'required_skills') else opportunity.get('required_skills', [])
-        notified_students = []
-        for student_id, student_data in students.items():
-            student_skills = student_data.get('validated_skills', {})
-            if any(skill in student_skills for skill in required_skills):
-                notification_id = str(uuid.uuid4())
-                notification_data = {
-                    "id": notification_id,
-                    "student_id": student_id,
-                    "type": "opportunity_match",
-                    "opportunity_id": opportunity.id,
-                    "message": f"Nouvelle opportunité correspondant à vos compétences : {opportunity.title}",
-                    "created_at": datetime.now().isoformat(),
-                    "read": False
-                }
-                db.child("notifications").child(notification_id).set(notification_data)
-                notified_students.append(student_id)
-        return len(notified_students)
+        # Étudiants ayant validé au moins une des compétences requises
+        await skill_index.ensure_ready()
+        writer = NotificationWriter()
+        for student_id in skill_index.student_candidates(required_skills):
+            writer.add(
+                "student_id", student_id, "opportunity_match",
+                f"Nouvelle opportunité correspondant à vos compétences : {opportunity.title}",
+                opportunity_id=opportunity.id
+            )
+        # Écriture groupée en multi-path updates
+        return await writer.flush()
     except Exception as e:
         print(f"Erreur lors de la notification des étudiants: {str(e)}")
         return 0
+
+# Nouvelle opportunité : recommandations matérialisées, puis notifications
+async def match_new_opportunity(opportunity_dict: dict):
+    try:
+        await recommendations.add_opportunity(opportunity_dict['id'], opportunity_dict)
+    except Exception as e:
+        # Rattrapé par "python -m services.recommendations rebuild"
+        print(f"Erreur lors du calcul des recommandations: {str(e)}")
+    await notify_matching_students(Opportunity(**opportunity_dict))
+
+job_queue.register("notify_matching_students", match_new_opportunity)
@@ -0,0 +1,178 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from routers.router_auth import get_current_user
+from database.notification_hub import notification_hub, catch_up
+from database import unread_notifications
+from services import serialization
+from configs import settings
+from pydantic import BaseModel, Field
+
+router = APIRouter(prefix='/notifications', tags=['Notifications'])
+
+PUSH_USER_TYPES = ('student', 'professional')
+PUSH_SUBPROTOCOL = "bearer"
+
+# Marquage groupé : liste d'ids, ou toutes les non lues créées avant une date
+class MarkReadRequest(BaseModel):
+    ids: Optional[List[str]] = Field(None, max_length=1000)
+    before: Optional[datetime] = None
+
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+
+# Les navigateurs ne permettent pas d'en-tête Authorization sur EventSource ni
+# WebSocket. WebSocket : le token est passé en sous-protocole, new WebSocket(url,
+# ["bearer", token]), que les journaux d'accès n'enregistrent pas. EventSource :
+# paramètre `token`, masqué dans les journaux (main.py, QueryTokenFilter)
+def _protocol_token(websocket: WebSocket) -> Optional[str]:
+    protocols = [protocol.strip() for protocol in websocket.headers.get("sec-websocket-protocol", "").split(",")]
+    if len(protocols) == 2 and protocols[0].lower() == PUSH_SUBPROTOCOL and protocols[1]:
+        return protocols[1]
+    return None
+
+
+async def _push_user(authorization: Optional[str], token: Optional[str]) -> dict:
+    token = token or _bearer_token(authorization)
+    if not token:
+        raise HTTPException(status_code=401, detail="Token manquant")
+    current_user = await get_current_user(token)
+    if current_user.get('user_type') not in PUSH_USER_TYPES:
+        raise HTTPException(status_code=403, detail="Réservé aux étudiants et aux professionnels")
+    return current_user
+
+
+async def _events(recipient_id: str, last_id: Optional[str]):
+    """Notifications manquées depuis `last_id` puis nouvelles notifications ; None pour un heartbeat.
+
+    S'arrête quand le tampon de la connexion a débordé : le client se reconnecte
+    avec l'id de la dernière notification reçue.
+    """
+    # Abonnement avant la lecture de rattrapage : rien n'est perdu entre les deux
+    subscription = notification_hub.subscribe(recipient_id)
+    try:
+        caught_up = set()
+        if last_id:
+            for notification in await catch_up(recipient_id, last_id):
+                caught_up.add(notification.get('id'))
+                yield notification
+        while True:
+            try:
+                notification = await subscription.get(settings.NOTIFICATION_PUSH_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if notification is None:
+                return
+            if notification.get('id') not in caught_up:
+                yield notification
+    finally:
+        notification_hub.unsubscribe(subscription)
+
+
+def _sse_message(notification: Optional[dict]) -> bytes:
+    if notification is None:
+        return b": ping\n\n"
+    return (f"id: {notification.get('id', '')}\nevent: notification\ndata: ".encode("utf-8")
+            + serialization.dumps_json(notification) + b"\n\n")
+
+
+@router.get('/stream')
+async def stream_notifications(
+    request: Request,
+    token: Optional[str] = Query(None, description="Token Firebase, si l'en-tête Authorization ne peut pas être envoyé"),
+    last_id: Optional[str] = Query(None, description="Id de la dernière notification reçue (sinon en-tête Last-Event-ID)")
+):
+    """Notifications en temps réel (Server-Sent Events), avec rattrapage à la reconnexion"""
+    current_user = await _push_user(request.headers.get("authorization"), token)
+    last_id = last_id or request.headers.get("last-event-id")
+
+    async def body():
+        # Délai de reconnexion conseillé à EventSource
+        yield b"retry: 3000\n\n"
+        async for notification in _events(current_user['uid'], last_id):
+            yield _sse_message(notification)
+        yield b"event: overflow\ndata: {}\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # Pas de mise en tampon par nginx
+    })
+
+
+@router.websocket('/ws')
+async def notifications_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    last_id: Optional[str] = None
+):
+    """Notifications en temps réel (WebSocket), avec rattrapage à la reconnexion"""
+    protocol_token = _protocol_token(websocket)
+    try:
+        # Paramètre `token` : ancien mode, conservé pour les clients existants
+        current_user = await _push_user(websocket.headers.get("authorization"), protocol_token or token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    # Le sous-protocole choisi doit être renvoyé, sinon le navigateur ferme la connexion
+    await websocket.accept(subprotocol=PUSH_SUBPROTOCOL if protocol_token else None)
+
+    async def send_events():
+        async for notification in _events(current_user['uid'], last_id):
+            message = {"type": "ping"} if notification is None else {"type": "notification", "notification": notification}
+            await websocket.send_text(serialization.dumps_json(message).decode("utf-8"))
+        # Tampon saturé : le client doit se reconnecter avec last_id
+        await websocket.close(code=1013, reason="overflow")
+
+    async def receive_until_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_until_disconnect())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                print(f"Erreur lors du push des notifications: {str(task.exception())}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.get('/unread-count')
+async def get_unread_count(current_user: dict = Depends(get_current_user)):
+    """Nombre de notifications non lues (lecture d'un seul compteur, pour le badge)"""
+    try:
+        return {"unread": await unread_notifications.get_count(current_user['uid'])}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post('/mark-read')
+async def mark_notifications_read(request: MarkReadRequest, current_user: dict = Depends(get_current_user)):
+    """Marque des notifications comme lues, par ids ou toutes celles créées avant `before`"""
+    if (request.ids is None) == (request.before is None):
+        raise HTTPException(status_code=400, detail="Fournir soit `ids`, soit `before`")
+    try:
+        if request.ids is not None:
+            marked = await unread_notifications.mark_read(current_user['uid'], request.ids)
+        else:
+            before = request.before
+            if before.tzinfo is not None:
+                # created_at est stocké en heure locale sans fuseau
+                before = before.astimezone().replace(tzinfo=None)
+            marked = await unread_notifications.mark_read_before(current_user['uid'], before.isoformat())
+        return {"marked": marked, "unread": await unread_notifications.get_count(current_user['uid'])}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from classes.schemas_dto import Professional, ProfessionalBase
 from routers.router_auth import get_current_user
-from database.firebase import db
+from database import repository
+from database.record_cache import profile_cache
+from services import serialization, validation_stats
+from datetime import datetime
 
 router = APIRouter(prefix='/professionals', tags=['Professionnels'])
 
@@ -11,11 +14,15 @@ async def get_professional_profile(current_user: dict = Depends(get_current_user
     if current_user.get('user_type') != 'professional':
         raise HTTPException(status_code=403, detail="Réservé aux professionnels")
     
+    async def load():
+        professional_data = await repository.get(f"professionals/{current_user['uid']}")
+        return Professional(**professional_data).model_dump(mode="json") if professional_data else None
+
     try:
-        professional_data = db.child("professionals").child(current_user['uid']).get().val()
-        if not professional_data:
+        profile = await profile_cache.get("professionals", current_user['uid'], load)
+        if not profile:
             raise HTTPException(status_code=404, detail="Profil professionnel non trouvé")
-        return Professional(**professional_data)
+        return serialization.prebuilt(profile)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -26,13 +33,19 @@ async def get_validation_statistics(current_user: dict = Depends(get_current_use
         raise HTTPException(status_code=403, detail="Réservé aux professionnels")
     
     try:
-        validations = db.child("skill_validations").order_by_child("professional_id").equal_to(current_user['uid']).get().val() or {}
+        # Agrégats maintenus à chaque validation (services/validation_stats.py) : une lecture par clé
+        aggregates = await validation_stats.get(current_user['uid'])
+        by_domain = aggregates['by_domain']
         
         stats = {
-            "total_validations": len(validations),
-            "validations_this_month": 0,  # À calculer selon la date
-            "average_rating": 0.0,
-            "expertise_domains": []
+            "total_validations": aggregates['total'],
+            "validations_this_month": aggregates['by_month'].get(datetime.now().strftime("%Y-%m"), 0),
+            # Note moyenne des validations, sinon note du profil ; null si aucune
+            "average_rating": aggregates['average_rating'],
+            # Domaines validés, du plus fréquent au moins fréquent
+            "expertise_domains": sorted(by_domain, key=lambda domain: (-by_domain[domain], domain)),
+            "validations_by_domain": by_domain,
+            "validations_by_month": aggregates['by_month']
         }
         
         return stats
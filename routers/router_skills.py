@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from classes.schemas_dto import SkillValidationRequest, SkillValidation, ValidationStatus, CompetenceLevel
 from routers.router_auth import get_current_user
-from database.firebase import db
+from database import repository, indexes, pagination
+from database.pagination import PageParams, page_params
+from database.notification_writer import NotificationWriter
+from database.record_cache import profile_cache
+from services.job_queue import job_queue, QueueFullError
+from services.skill_index import skill_index
+from services.expertise_matcher import expertise_matcher
+from services import recommendations, serialization, validation_stats
 from datetime import datetime
 import uuid
 from pydantic import BaseModel
@@ -20,32 +27,19 @@ class SkillValidationRequestNoId(BaseModel):
 async def notify_relevant_professionals(skill_name: str):
     """Notifie les professionnels compétents dans le domaine de la compétence"""
     try:
-        # Récupérer tous les professionnels
-        professionals = db.child("professionals").get().val() or {}
+        # Professionnels dont un domaine d'expertise contient la compétence ou y est contenu
+        await expertise_matcher.ensure_ready()
+        relevant_professionals = expertise_matcher.professionals_for_skill(skill_name)
         
-        relevant_professionals = []
-        for prof_id, prof_data in professionals.items():
-            expertise_domains = prof_data.get('expertise_domains', [])
-            # Vérifier si la compétence correspond aux domaines d'expertise
-            if any(domain.lower() in skill_name.lower() or skill_name.lower() in domain.lower() 
-                   for domain in expertise_domains):
-                relevant_professionals.append(prof_id)
-        
-        # Créer des notifications pour les professionnels pertinents
+        # Créer des notifications pour les professionnels pertinents (écriture groupée)
+        writer = NotificationWriter()
         for prof_id in relevant_professionals:
-            notification_id = str(uuid.uuid4())
-            notification_data = {
-                "id": notification_id,
-                "professional_id": prof_id,
-                "type": "skill_validation_request",
-                "skill_name": skill_name,
-                "message": f"Nouvelle demande de validation pour la compétence : {skill_name}",
-                "created_at": datetime.now().isoformat(),
-                "read": False
-            }
-            db.child("notifications").child(notification_id).set(notification_data)
-            
-        return len(relevant_professionals)
+            writer.add(
+                "professional_id", prof_id, "skill_validation_request",
+                f"Nouvelle demande de validation pour la compétence : {skill_name}",
+                skill_name=skill_name
+            )
+        return await writer.flush()
     except Exception as e:
         print(f"Erreur lors de la notification des professionnels: {str(e)}")
         return 0
@@ -58,6 +52,11 @@ class SkillValidationRequestNoId(BaseModel):
     portfolio_links: Optional[List[str]] = None
     project_description: Optional[str] = None
 
+async def _notify_relevant_professionals_job(payload: dict):
+    await notify_relevant_professionals(payload["skill_name"])
+
+job_queue.register("notify_relevant_professionals", _notify_relevant_professionals_job)
+
 @router.post('/validation-request', response_model=SkillValidation, status_code=201)
 async def request_skill_validation(
     request_data: SkillValidationRequestNoId,
@@ -77,38 +76,47 @@ async def request_skill_validation(
         # Convertir datetime en string pour Firebase
         validation_dict = validation.dict()
         validation_dict['created_at'] = validation_dict['created_at'].isoformat()
-        db.child("skill_validations").child(validation_id).set(validation_dict)
-        # Notifier les professionnels compétents
-        notified_count = await notify_relevant_professionals(request_data.skill_name)
+        await repository.update_multi({
+            f"skill_validations/{validation_id}": validation_dict,
+            **indexes.validation_entries(validation_id, validation_dict)
+        })
+        expertise_matcher.add_pending_validation(validation_id, validation_dict)
+        # Notifier les professionnels compétents en arrière-plan
+        try:
+            await job_queue.enqueue("notify_relevant_professionals", {"skill_name": request_data.skill_name})
+        except QueueFullError:
+            await notify_relevant_professionals(request_data.skill_name)
         return validation
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/pending-validations')
-async def get_pending_validations(current_user: dict = Depends(get_current_user)):
-    """Professionnel récupère les validations en attente dans son domaine"""
+async def get_pending_validations(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    """Professionnel récupère les validations en attente dans son domaine (plus anciennes en premier, paginées)"""
     if current_user.get('user_type') != 'professional':
         raise HTTPException(status_code=403, detail="Réservé aux professionnels")
     
     try:
-        professional_data = db.child("professionals").child(current_user['uid']).get().val()
+        professional_data = await repository.get(f"professionals/{current_user['uid']}", replica=True)
         if not professional_data:
             raise HTTPException(status_code=404, detail="Profil professionnel non trouvé")
             
         expertise_domains = professional_data.get('expertise_domains', [])
         
-        all_validations = db.child("skill_validations").get().val() or {}
-        pending_validations = []
-        
-        for validation_id, validation in all_validations.items():
-            if (validation.get('status') == ValidationStatus.EN_ATTENTE and 
-                any(domain.lower() in validation.get('skill_name', '').lower() or 
-                    validation.get('skill_name', '').lower() in domain.lower() 
-                    for domain in expertise_domains)):
-                validation['id'] = validation_id
-                pending_validations.append(validation)
-        
-        return pending_validations
+        # Le profil lu fait foi : on rafraîchit au passage les domaines connus du matcher
+        await expertise_matcher.ensure_ready()
+        expertise_matcher.set_professional(current_user['uid'], expertise_domains)
+        pending_validations, next_cursor = pagination.paginate(
+            expertise_matcher.pending_for_domains(expertise_domains),
+            sort_key=lambda x: (x.get('created_at', ''), x['id']),
+            limit=page.limit, cursor=page.cursor
+        )
+        pagination.set_next_cursor(response, next_cursor)
+        return serialization.prebuilt(pending_validations, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -125,30 +133,46 @@ async def validate_skill(
     
     try:
         # Vérifier que la validation existe
-        validation = db.child("skill_validations").child(validation_id).get().val()
+        validation = await repository.get(f"skill_validations/{validation_id}")
         if not validation:
             raise HTTPException(status_code=404, detail="Demande de validation non trouvée")
         
         # Mettre à jour la validation
+        validation_date = datetime.now().isoformat()
         update_data = {
             'status': ValidationStatus.VALIDEE,
             'professional_id': current_user['uid'],
             'validated_level': validated_level,
             'professional_feedback': feedback,
-            'validation_date': datetime.now().isoformat()
+            'validation_date': validation_date
         }
-        
-        db.child("skill_validations").child(validation_id).update(update_data)
-        
-        # Mettre à jour le profil étudiant
         student_id = validation['student_id']
         skill_name = validation['skill_name']
-        
-        db.child("students").child(student_id).child("validated_skills").child(skill_name).set(validated_level)
-        
-        # Mettre à jour les statistiques du professionnel
-        current_count = db.child("professionals").child(current_user['uid']).child("validation_count").get().val() or 0
-        db.child("professionals").child(current_user['uid']).update({"validation_count": current_count + 1})
+        # Agrégats du professionnel (une re-validation n'est pas comptée deux fois)
+        stats_entries = {}
+        if validation.get('status') != ValidationStatus.VALIDEE.value:
+            stats_entries = validation_stats.validation_entries(current_user['uid'], skill_name, validation_date)
+        
+        await skill_index.ensure_ready()
+        async with recommendations.commit_lock:
+            # Nouvelles recommandations de l'étudiant, recalculées avec la compétence validée
+            # Lecture directe : une lecture fusionnée pourrait précéder la validation précédente
+            validated_skills = await repository.get(f"students/{student_id}/validated_skills", coalesce=False) or {}
+            validated_skills[skill_name] = CompetenceLevel(validated_level).value
+            
+            # Validation, profil étudiant, recommandations et compteur du professionnel en un
+            # seul commit multi-chemins ; l'incrément est appliqué côté serveur (pas de lecture préalable)
+            await repository.update_multi({
+                **{f"skill_validations/{validation_id}/{field}": value for field, value in update_data.items()},
+                f"students/{student_id}/validated_skills/{skill_name}": validated_level,
+                **recommendations.student_entries(student_id, validated_skills),
+                f"professionals/{current_user['uid']}/validation_count": repository.increment(),
+                **stats_entries
+            })
+            skill_index.set_student_skill(student_id, skill_name, CompetenceLevel(validated_level).value)
+        await profile_cache.invalidate("students", student_id)
+        await profile_cache.invalidate("professionals", current_user['uid'])
+        expertise_matcher.remove_validation(validation_id)
         
         return {"message": "Compétence validée avec succès"}
     except HTTPException as he:
@@ -157,23 +181,21 @@ async def validate_skill(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/my-validations')
-async def get_my_validations(current_user: dict = Depends(get_current_user)):
-    """Étudiant récupère ses demandes de validation"""
+async def get_my_validations(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    """Étudiant récupère ses demandes de validation (plus récentes en premier, paginées)"""
     if current_user.get('user_type') != 'student':
         raise HTTPException(status_code=403, detail="Réservé aux étudiants")
     
     try:
-        all_validations = db.child("skill_validations").get().val() or {}
-        my_validations = []
-        
-        for validation_id, validation in all_validations.items():
-            if validation.get('student_id') == current_user['uid']:
-                validation['id'] = validation_id
-                my_validations.append(validation)
-        
-        # Trier par date de création (plus récent en premier)
-        my_validations.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return my_validations
+        my_validations, next_cursor = await pagination.page_index(
+            indexes.VALIDATIONS_BY_STUDENT, current_user['uid'], "skill_validations", page.limit, page.cursor
+        )
+        pagination.set_next_cursor(response, next_cursor)
+        return serialization.prebuilt(my_validations, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -187,7 +209,7 @@ async def cancel_validation_request(
         raise HTTPException(status_code=403, detail="Réservé aux étudiants")
     
     try:
-        validation = db.child("skill_validations").child(validation_id).get().val()
+        validation = await repository.get(f"skill_validations/{validation_id}")
         if not validation:
             raise HTTPException(status_code=404, detail="Demande de validation non trouvée")
         
@@ -197,7 +219,11 @@ async def cancel_validation_request(
         if validation.get('status') != ValidationStatus.EN_ATTENTE:
             raise HTTPException(status_code=400, detail="Impossible d'annuler une demande déjà traitée")
         
-        db.child("skill_validations").child(validation_id).remove()
+        await repository.update_multi({
+            f"skill_validations/{validation_id}": None,
+            **indexes.validation_entries(validation_id, validation, delete=True)
+        })
+        expertise_matcher.remove_validation(validation_id)
         return {"message": "Demande de validation annulée avec succès"}
     except HTTPException as he:
         raise he
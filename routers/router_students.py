@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from classes.schemas_dto import Student, StudentBase
 from routers.router_auth import get_current_user
-from database.firebase import db
+from database import repository, indexes, pagination
+from database.pagination import PageParams, page_params
+from database.auth_cache import user_cache
+from database.record_cache import profile_cache
+from services import serialization
 from typing import List
 
 router = APIRouter(prefix='/students', tags=['Étudiants'])
@@ -12,11 +16,15 @@ async def get_student_profile(current_user: dict = Depends(get_current_user)):
     if current_user.get('user_type') != 'student':
         raise HTTPException(status_code=403, detail="Réservé aux étudiants")
     
+    async def load():
+        student_data = await repository.get(f"students/{current_user['uid']}")
+        return Student(**student_data).model_dump(mode="json") if student_data else None
+
     try:
-        student_data = db.child("students").child(current_user['uid']).get().val()
-        if not student_data:
+        profile = await profile_cache.get("students", current_user['uid'], load)
+        if not profile:
             raise HTTPException(status_code=404, detail="Profil étudiant non trouvé")
-        return Student(**student_data)
+        return serialization.prebuilt(profile)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -30,21 +38,27 @@ async def update_student_profile(
         raise HTTPException(status_code=403, detail="Réservé aux étudiants")
     
     try:
-        db.child("students").child(current_user['uid']).update(profile_data.dict())
+        await repository.update(f"students/{current_user['uid']}", profile_data.dict())
+        user_cache.invalidate(current_user['uid'])
+        await profile_cache.invalidate("students", current_user['uid'])
         return {"message": "Profil mis à jour avec succès"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/notifications')
-async def get_student_notifications(current_user: dict = Depends(get_current_user)):
-    """Récupère les notifications de l'étudiant connecté"""
+async def get_student_notifications(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: dict = Depends(get_current_user)
+):
+    """Récupère les notifications de l'étudiant connecté (plus récentes en premier, paginées)"""
     if current_user.get('user_type') != 'student':
         raise HTTPException(status_code=403, detail="Réservé aux étudiants")
     try:
-        all_notifications = db.child("notifications").get().val() or {}
-        my_notifications = [notif for notif in all_notifications.values() if notif.get('student_id') == current_user['uid']]
-        # Trier par date de création (plus récent en premier)
-        my_notifications.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return my_notifications
+        my_notifications, next_cursor = await pagination.page_index(
+            indexes.NOTIFICATIONS_BY_RECIPIENT, current_user['uid'], "notifications", page.limit, page.cursor
+        )
+        pagination.set_next_cursor(response, next_cursor)
+        return serialization.prebuilt(my_notifications, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
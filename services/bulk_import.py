@@ -0,0 +1,315 @@
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import typing
+import uuid
+from datetime import datetime
+
+from firebase_admin import auth
+from pydantic import ValidationError
+
+from database import repository, indexes
+from database.instrumentation import traced
+from database.notification_writer import NotificationWriter
+from database.record_cache import profile_cache
+from services import recommendations
+from services.skill_index import skill_index
+from classes.schemas_dto import StudentCreate, OpportunityBase, Opportunity, SkillCatalogEntry
+from configs import settings
+
+# Bulk imports of students, opportunities and skill catalog entries.
+#
+# Input is NDJSON (one JSON object per line) or CSV with a header row; list
+# fields of a CSV are either a JSON array or values separated by ";". Records
+# are validated with the API schemas `IMPORT_BATCH_SIZE` at a time, and each
+# batch is written in multi-path updates of `IMPORT_WRITE_CHUNK_SIZE` paths.
+# Invalid records are reported with their line number and skipped.
+#
+#   students       auth users created with the Admin SDK's batch import_users
+#                  (passwords hashed here with PBKDF2-SHA256, which Firebase
+#                  upgrades to its own scheme at first sign-in), then profile and
+#                  users entries shaped like /auth/signup/student. import_users
+#                  does not check email uniqueness: emails repeated in the file
+#                  or already used by an account are rejected beforehand
+#   opportunities  records and company index entries; matching runs once at the
+#                  end: recommendations of every imported opportunity and one
+#                  summary notification per matching student
+#   skills         skills_catalog/<domain>/<name>
+#
+#   python -m services.bulk_import students students.csv --format csv
+
+KINDS = ("students", "opportunities", "skills")
+FORMATS = ("ndjson", "csv")
+MAX_REPORTED_ERRORS = 1000
+# Limites de l'Admin SDK pour import_users et get_users
+AUTH_IMPORT_LIMIT = 1000
+AUTH_LOOKUP_LIMIT = 100
+# Mots de passe hachés par appel bloquant : PBKDF2 est du calcul, pas un appel à la
+# base, et ne doit pas approcher DB_CALL_TIMEOUT_SECONDS
+HASH_CHUNK_SIZE = 100
+
+
+class ImportReport:
+    def __init__(self):
+        self.received = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> dict:
+        return {"received": self.received, "imported": self.imported, "failed": self.failed,
+                "errors": sorted(self.errors, key=lambda error: error["line"]), "errors_truncated": self.failed > len(self.errors)}
+
+
+def _list_fields(model) -> set:
+    fields = set()
+    for name, field in model.model_fields.items():
+        annotations = (field.annotation, *typing.get_args(field.annotation))
+        if any(typing.get_origin(annotation) in (list, typing.List) for annotation in annotations):
+            fields.add(name)
+    return fields
+
+
+def _csv_value(value: str, is_list: bool):
+    if not is_list:
+        return value
+    if value.lstrip().startswith("["):
+        return json.loads(value)
+    return [item.strip() for item in value.split(";") if item.strip()]
+
+
+def parse_records(content: bytes, format: str, model):
+    """Yield (line number, record dict or parse error message)"""
+    text = content.decode("utf-8-sig")
+    if format == "csv":
+        list_fields = _list_fields(model)
+        reader = csv.DictReader(io.StringIO(text))
+        for row in reader:
+            try:
+                # Cellules vides : valeurs par défaut du schéma
+                yield reader.line_num, {
+                    field: _csv_value(value, field in list_fields)
+                    for field, value in row.items() if field and value not in (None, "")
+                }
+            except ValueError as e:
+                yield reader.line_num, f"Invalid list value: {e}"
+        return
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        yield line_number, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+def _batches(records, size: int):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validate(batch, model, report: ImportReport) -> list:
+    """(line number, model instance) of the valid records of a batch"""
+    valid = []
+    for line_number, record in batch:
+        report.received += 1
+        if isinstance(record, str):
+            report.fail(line_number, record)
+            continue
+        try:
+            valid.append((line_number, model(**record)))
+        except ValidationError as e:
+            report.fail(line_number, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+    return valid
+
+
+async def _write_chunks(updates: list):
+    chunk_size = settings.IMPORT_WRITE_CHUNK_SIZE
+    for start in range(0, len(updates), chunk_size):
+        await repository.update_multi(dict(updates[start:start + chunk_size]))
+
+
+def _hash_password(password: str):
+    salt = os.urandom(16)
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, settings.IMPORT_PASSWORD_HASH_ROUNDS), salt
+
+
+def _auth_records(students: list) -> list:
+    users = []
+    for uid, student in students:
+        password_hash, salt = _hash_password(student.password)
+        users.append(auth.ImportUserRecord(
+            uid=uid, email=student.email, display_name=f"{student.first_name} {student.last_name}",
+            password_hash=password_hash, password_salt=salt
+        ))
+    return users
+
+
+def _email_key(email: str) -> str:
+    # Firebase Auth ne distingue pas la casse des emails
+    return email.strip().lower()
+
+
+async def _existing_emails(emails: list) -> set:
+    """Emails (normalized) among `emails` already used by an auth account"""
+    results = await asyncio.gather(*(
+        repository.run_blocking(traced("auth.get_users", auth.get_users),
+                                [auth.EmailIdentifier(email) for email in emails[start:start + AUTH_LOOKUP_LIMIT]])
+        for start in range(0, len(emails), AUTH_LOOKUP_LIMIT)
+    ))
+    return {_email_key(user.email) for result in results for user in result.users if user.email}
+
+
+async def import_students(records, report: ImportReport):
+    batch_size = min(settings.IMPORT_BATCH_SIZE, AUTH_IMPORT_LIMIT)
+    hash_alg = auth.UserImportHash.pbkdf2_sha256(rounds=settings.IMPORT_PASSWORD_HASH_ROUNDS)
+    seen_emails = set()
+    await repository.ensure_initialized()
+    for batch in _batches(records, batch_size):
+        candidates = []
+        for line_number, student in _validate(batch, StudentCreate, report):
+            # Longueur minimale imposée par Firebase Auth
+            if len(student.password) < 6:
+                report.fail(line_number, "password: must be at least 6 characters")
+            elif _email_key(student.email) in seen_emails:
+                report.fail(line_number, "email: duplicate in file")
+            else:
+                seen_emails.add(_email_key(student.email))
+                candidates.append((line_number, student))
+        if not candidates:
+            continue
+
+        existing = await _existing_emails([student.email for _, student in candidates])
+        valid = []
+        for line_number, student in candidates:
+            if _email_key(student.email) in existing:
+                report.fail(line_number, "email: an account already exists")
+            else:
+                valid.append((line_number, student))
+        if not valid:
+            continue
+
+        students = [(uuid.uuid4().hex, student) for _, student in valid]
+        users = []
+        for start in range(0, len(students), HASH_CHUNK_SIZE):
+            users.extend(await repository.run_blocking(_auth_records, students[start:start + HASH_CHUNK_SIZE]))
+        result = await repository.run_blocking(traced("auth.import_users", auth.import_users), users, hash_alg=hash_alg)
+        rejected = {error.index: error.reason for error in result.errors}
+        for index, reason in rejected.items():
+            report.fail(valid[index][0], f"auth: {reason}")
+
+        created_at = datetime.now().isoformat()
+        updates = []
+        for index, (uid, student) in enumerate(students):
+            if index in rejected:
+                continue
+            student_dict = student.dict()
+            del student_dict['password']  # Ne pas stocker le mot de passe
+            student_dict.update(id=uid, user_type='student', created_at=created_at)
+            updates.append((f"students/{uid}", student_dict))
+            updates.append((f"users/{uid}", {"email": student.email, "user_type": "student", "profile_complete": False}))
+        await _write_chunks(updates)
+        await asyncio.gather(*(profile_cache.invalidate("students", uid)
+                               for index, (uid, _) in enumerate(students) if index not in rejected))
+        report.imported += len(students) - len(rejected)
+
+
+async def import_opportunities(records, report: ImportReport):
+    imported = {}
+    for batch in _batches(records, settings.IMPORT_BATCH_SIZE):
+        updates = []
+        for _, opportunity_data in _validate(batch, OpportunityBase, report):
+            opportunity_id = str(uuid.uuid4())
+            opportunity_dict = Opportunity(id=opportunity_id, created_at=datetime.now(), **opportunity_data.dict()).dict()
+            opportunity_dict['created_at'] = opportunity_dict['created_at'].isoformat()
+            updates.append((f"opportunities/{opportunity_id}", opportunity_dict))
+            updates.extend(indexes.opportunity_entries(opportunity_id, opportunity_dict).items())
+            imported[opportunity_id] = opportunity_dict
+        await _write_chunks(updates)
+    report.imported = len(imported)
+    if imported:
+        await _match_opportunities(imported)
+
+
+async def _match_opportunities(opportunities: dict):
+    """Single matching pass over the imported opportunities"""
+    await skill_index.ensure_ready()
+    matches = {}
+    async with recommendations.commit_lock:
+        updates = []
+        for opportunity_id, opportunity in opportunities.items():
+            skill_index.add_opportunity(opportunity_id, opportunity)
+            updates.extend(recommendations.opportunity_entries(opportunity_id, opportunity).items())
+        await _write_chunks(updates)
+    for opportunity_id, opportunity in opportunities.items():
+        for student_id in skill_index.student_candidates(opportunity.get('required_skills') or []):
+            matches.setdefault(student_id, []).append(opportunity_id)
+
+    # Une notification récapitulative par étudiant plutôt qu'une par opportunité
+    writer = NotificationWriter()
+    for student_id, opportunity_ids in matches.items():
+        if len(opportunity_ids) == 1:
+            title = opportunities[opportunity_ids[0]]['title']
+            writer.add("student_id", student_id, "opportunity_match",
+                       f"Nouvelle opportunité correspondant à vos compétences : {title}",
+                       opportunity_id=opportunity_ids[0])
+        else:
+            writer.add("student_id", student_id, "opportunity_match",
+                       f"{len(opportunity_ids)} nouvelles opportunités correspondant à vos compétences",
+                       opportunity_ids=opportunity_ids)
+    await writer.flush()
+
+
+async def import_skills(records, report: ImportReport):
+    for batch in _batches(records, settings.IMPORT_BATCH_SIZE):
+        valid = _validate(batch, SkillCatalogEntry, report)
+        await _write_chunks([
+            (f"skills_catalog/{skill.domain}/{skill.name}", {"category": skill.category, "description": skill.description})
+            for _, skill in valid
+        ])
+        report.imported += len(valid)
+
+
+_IMPORTERS = {
+    "students": (StudentCreate, import_students),
+    "opportunities": (OpportunityBase, import_opportunities),
+    "skills": (SkillCatalogEntry, import_skills),
+}
+
+
+async def run_import(kind: str, content: bytes, format: str = "ndjson") -> dict:
+    model, importer = _IMPORTERS[kind]
+    report = ImportReport()
+    await importer(parse_records(content, format, model), report)
+    print(f"Bulk import of {kind}: {report.imported}/{report.received} imported, {report.failed} failed")
+    return report.as_dict()
+
+
+if __name__ == "__main__":
+    # Usage : python -m services.bulk_import students|opportunities|skills <fichier> [--format csv|ndjson]
+    args = sys.argv[1:]
+    if len(args) not in (2, 4) or args[0] not in KINDS or (len(args) == 4 and (args[2] != "--format" or args[3] not in FORMATS)):
+        print("Usage: python -m services.bulk_import students|opportunities|skills <file> [--format csv|ndjson]")
+        sys.exit(1)
+    format = args[3] if len(args) == 4 else ("csv" if args[1].endswith(".csv") else "ndjson")
+    with open(args[1], "rb") as source:
+        print(json.dumps(asyncio.run(run_import(args[0], source.read(), format)), ensure_ascii=False, indent=2))
@@ -0,0 +1,264 @@
+import bisect
+from collections import deque
+
+from classes.schemas_dto import ValidationStatus
+from database import repository
+from services.rebuildable_index import RebuildableIndex
+from configs import settings
+
+
+def normalize(text: str) -> str:
+    return (text or "").lower()
+
+
+class _AhoCorasick:
+    """Multi-pattern automaton: which registered patterns occur inside a text.
+
+    Patterns are reference counted, so the same string can be registered by
+    several owners. The trie and failure links cover the patterns present at
+    the last build; patterns added since are kept in a short `recent` list
+    scanned directly, and removed ones are filtered out of the results. The
+    trie is only rebuilt once `recent` or the removed patterns outgrow
+    REBUILD_THRESHOLD, so steady add/discard traffic does not make every
+    lookup pay for a full rebuild.
+    """
+
+    REBUILD_THRESHOLD = 64
+
+    def __init__(self):
+        self._patterns = {}
+        self._built = set()
+        self._recent = set()
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+
+    def add(self, pattern: str):
+        self._patterns[pattern] = self._patterns.get(pattern, 0) + 1
+        if self._patterns[pattern] == 1 and pattern not in self._built:
+            self._recent.add(pattern)
+
+    def discard(self, pattern: str):
+        if pattern in self._patterns:
+            self._patterns[pattern] -= 1
+            if not self._patterns[pattern]:
+                del self._patterns[pattern]
+                self._recent.discard(pattern)
+
+    def _needs_build(self) -> bool:
+        removed = len(self._built) - (len(self._patterns) - len(self._recent))
+        return len(self._recent) > self.REBUILD_THRESHOLD or removed > self.REBUILD_THRESHOLD
+
+    def _build(self):
+        goto, fail, out = [{}], [0], [set()]
+        for pattern in self._patterns:
+            node = 0
+            for char in pattern:
+                if char not in goto[node]:
+                    goto.append({})
+                    fail.append(0)
+                    out.append(set())
+                    goto[node][char] = len(goto) - 1
+                node = goto[node][char]
+            out[node].add(pattern)
+
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0) if goto[state].get(char) != child else 0
+                out[child] |= out[fail[child]]
+
+        self._goto, self._fail, self._out = goto, fail, out
+        self._built = set(self._patterns)
+        self._recent = set()
+
+    def find_all(self, text: str) -> set:
+        if self._needs_build():
+            self._build()
+        # Le motif vide éventuel est porté par la racine : il est contenu dans tout texte
+        found = set(self._out[0])
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found |= self._out[node]
+        # Motifs retirés depuis la construction exclus, motifs récents cherchés directement
+        found = {pattern for pattern in found if pattern in self._patterns}
+        found.update(pattern for pattern in self._recent if pattern in text)
+        return found
+
+
+class _SuffixIndex:
+    """Which registered strings contain a given text.
+
+    Every suffix of every registered string is kept once, as (string, start),
+    sorted by suffix: the strings containing a text are those owning a suffix
+    that starts with it, a contiguous range found by binary search. Memory is
+    linear in the total length of the strings. Additions are sorted in on the
+    next lookup (one by one when few, with a full sort after a bulk load).
+    """
+
+    BULK_SORT = 256
+
+    def __init__(self):
+        self._counts = {}
+        self._suffixes = []
+        self._unsorted = []
+
+    @staticmethod
+    def _key(entry):
+        value, start = entry
+        return value[start:], value
+
+    def _sort(self):
+        if not self._unsorted:
+            return
+        if len(self._unsorted) <= self.BULK_SORT:
+            for entry in self._unsorted:
+                bisect.insort(self._suffixes, entry, key=self._key)
+        else:
+            self._suffixes.extend(self._unsorted)
+            self._suffixes.sort(key=self._key)
+        self._unsorted = []
+
+    def add(self, value: str):
+        self._counts[value] = self._counts.get(value, 0) + 1
+        if self._counts[value] == 1:
+            # Suffixe vide compris : tout texte vide est contenu dans la chaîne
+            self._unsorted.extend((value, start) for start in range(len(value) + 1))
+
+    def discard(self, value: str):
+        if value not in self._counts:
+            return
+        self._counts[value] -= 1
+        if self._counts[value]:
+            return
+        del self._counts[value]
+        self._sort()
+        for start in range(len(value) + 1):
+            key = self._key((value, start))
+            index = bisect.bisect_left(self._suffixes, key, key=self._key)
+            if index < len(self._suffixes) and self._suffixes[index] == (value, start):
+                del self._suffixes[index]
+
+    def containing(self, text: str) -> set:
+        self._sort()
+        prefix = lambda entry: entry[0][entry[1]:entry[1] + len(text)]
+        low = bisect.bisect_left(self._suffixes, text, key=prefix)
+        high = bisect.bisect_right(self._suffixes, text, key=prefix)
+        return {value for value, _ in self._suffixes[low:high]}
+
+
+class _BidirectionalIndex:
+    """Strings owned by ids, matched when they contain or are contained in a text"""
+
+    def __init__(self):
+        self.owners = {}
+        self._automaton = _AhoCorasick()
+        self._substrings = _SuffixIndex()
+
+    def add(self, value: str, owner_id: str):
+        owners = self.owners.setdefault(value, set())
+        if owner_id not in owners:
+            owners.add(owner_id)
+            self._automaton.add(value)
+            self._substrings.add(value)
+
+    def discard(self, value: str, owner_id: str):
+        owners = self.owners.get(value)
+        if owners and owner_id in owners:
+            owners.discard(owner_id)
+            self._automaton.discard(value)
+            self._substrings.discard(value)
+            if not owners:
+                del self.owners[value]
+
+    def match(self, text: str) -> set:
+        values = self._automaton.find_all(text) | self._substrings.containing(text)
+        matched = set()
+        for value in values:
+            matched |= self.owners.get(value, set())
+        return matched
+
+
+class ExpertiseMatcher(RebuildableIndex):
+    """Routes skills to professionals by expertise domain, and back.
+
+    A skill and a domain match when one is a case-insensitive substring of the
+    other. Professionals' domains and pending validations' skill names are each
+    kept in an Aho-Corasick automaton (strings contained in the query) plus a
+    sorted suffix list (strings containing the query), both linear in the total
+    length of the strings. A lookup costs time proportional to the query text,
+    the number of matches and the log of the index size (plus a bounded scan of
+    strings added since the automaton was last built), not to the number of
+    professionals or validations.
+    """
+
+    name = "des domaines d'expertise"
+
+    def __init__(self, rebuild_interval: float):
+        super().__init__(rebuild_interval)
+        self._reset()
+
+    def _reset(self):
+        self.professional_domains = {}
+        self.pending_validations = {}
+        self._domains = _BidirectionalIndex()
+        self._skills = _BidirectionalIndex()
+
+    async def _load(self):
+        professionals = await repository.get("professionals", replica=True, coalesce=False) or {}
+        validations = await repository.get("skill_validations", replica=True) or {}
+        return professionals, validations
+
+    def _rebuild(self, data):
+        professionals, validations = data
+        self._reset()
+        for prof_id, prof_data in professionals.items():
+            self.set_professional(prof_id, prof_data.get('expertise_domains', []))
+        for validation_id, validation in validations.items():
+            if validation.get('status') == ValidationStatus.EN_ATTENTE:
+                self.add_pending_validation(validation_id, validation)
+
+    # Mises à jour incrémentales
+
+    def set_professional(self, prof_id: str, expertise_domains: list):
+        self._record(self.set_professional, prof_id, expertise_domains)
+        for domain in self.professional_domains.pop(prof_id, set()):
+            self._domains.discard(domain, prof_id)
+        domains = {normalize(domain) for domain in expertise_domains or []}
+        for domain in domains:
+            self._domains.add(domain, prof_id)
+        self.professional_domains[prof_id] = domains
+
+    def add_pending_validation(self, validation_id: str, validation: dict):
+        self._record(self.add_pending_validation, validation_id, validation)
+        self.remove_validation(validation_id)
+        self.pending_validations[validation_id] = validation
+        self._skills.add(normalize(validation.get('skill_name', '')), validation_id)
+
+    def remove_validation(self, validation_id: str):
+        self._record(self.remove_validation, validation_id)
+        validation = self.pending_validations.pop(validation_id, None)
+        if validation is not None:
+            self._skills.discard(normalize(validation.get('skill_name', '')), validation_id)
+
+    # Requêtes
+
+    def professionals_for_skill(self, skill_name: str) -> set:
+        return self._domains.match(normalize(skill_name))
+
+    def pending_for_domains(self, expertise_domains: list) -> list:
+        validation_ids = set()
+        for domain in expertise_domains or []:
+            validation_ids |= self._skills.match(normalize(domain))
+        return [{**self.pending_validations[validation_id], 'id': validation_id} for validation_id in validation_ids]
+
+
+expertise_matcher = ExpertiseMatcher(settings.EXPERTISE_INDEX_REBUILD_SECONDS)
@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+import zlib
+
+from database import repository
+from services import serialization
+from configs import settings
+
+# Streaming exports of whole collections.
+#
+# Records are read in key order, `EXPORT_CHUNK_SIZE` at a time, with
+# order_by_key / start_at / limit_to_first range queries, and each chunk is
+# encoded and sent before the next one is read: memory stays bounded by the
+# chunk size whatever the collection size.
+#
+# Every exported record carries its key as `_key`. An interrupted export is
+# resumed by passing the `_key` of the last record received as `after`.
+
+EXPORTABLE_COLLECTIONS = ("opportunities", "skill_validations", "applications")
+KEY_FIELD = "_key"
+
+
+async def iter_chunks(collection: str, after: str = None, chunk_size: int = None):
+    """Yield lists of (key, record) in key order, starting strictly after `after`"""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    cursor = after
+    while True:
+        # Une entrée de plus après un curseur : start_at est inclusif et renvoie le curseur lui-même
+        limit = chunk_size + 1 if cursor is not None else chunk_size
+        records = await repository.query(collection, order_by="$key", start_at=cursor, limit_to_first=limit) or {}
+        items = [(key, record) for key, record in records.items() if key != cursor]
+        if items:
+            yield items
+            cursor = items[-1][0]
+        if len(records) < limit:
+            return
+
+
+def _flatten(value):
+    if isinstance(value, (dict, list)):
+        return serialization.dumps_json(value).decode("utf-8")
+    return "" if value is None else value
+
+
+async def ndjson_lines(collection: str, after: str = None):
+    async for items in iter_chunks(collection, after):
+        yield b"".join(
+            serialization.dumps_json({KEY_FIELD: key, **(record if isinstance(record, dict) else {"value": record})})
+            + b"\n"
+            for key, record in items
+        )
+
+
+async def csv_lines(collection: str, after: str = None, fields: list = None):
+    """CSV rows; columns are `fields`, or the fields found in the first chunk"""
+    columns = None
+    async for items in iter_chunks(collection, after):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if columns is None:
+            columns = fields or sorted({field for _, record in items if isinstance(record, dict) for field in record})
+            writer.writerow([KEY_FIELD] + columns)
+        for key, record in items:
+            record = record if isinstance(record, dict) else {}
+            writer.writerow([key] + [_flatten(record.get(column)) for column in columns])
+        yield buffer.getvalue().encode("utf-8")
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (q-values honored, `*` included)"""
+    qualities = {}
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    for name in ("gzip", "x-gzip", "*"):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
+
+async def gzipped(chunks):
+    """Compress a byte stream on the fly (one gzip member, flushed after every chunk)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
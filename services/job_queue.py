@@ -0,0 +1,173 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+from configs import settings
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class _Journal:
+    """SQLite journal holding jobs that have been enqueued but not yet handled"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, name TEXT NOT NULL, payload TEXT NOT NULL, enqueued_at REAL NOT NULL)"
+            )
+
+    def add(self, job: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, name, payload, enqueued_at) VALUES (?, ?, ?, ?)",
+                (job['id'], job['name'], json.dumps(job['payload']), job['enqueued_at'])
+            )
+
+    def done(self, job_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def pending(self) -> list:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name, payload, enqueued_at FROM jobs ORDER BY enqueued_at").fetchall()
+        return [{"id": r[0], "name": r[1], "payload": json.loads(r[2]), "enqueued_at": r[3]} for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """Bounded asyncio work queue for post-write fan-out.
+
+    Handlers are registered by name and receive a JSON-serialisable payload, so
+    that jobs can be written to the optional SQLite journal and replayed after a
+    restart. `enqueue` waits at most `enqueue_timeout` for a free slot and then
+    raises QueueFullError, letting the caller decide how to degrade.
+    """
+
+    def __init__(self, maxsize: int, workers: int, enqueue_timeout: float, journal_path: str = ""):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.enqueue_timeout = enqueue_timeout
+        self.journal_path = journal_path
+        self._handlers = {}
+        self._queue = None
+        self._tasks = []
+        self._journal = None
+        self._stats = {"enqueued": 0, "processed": 0, "failed": 0, "in_flight": 0}
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+
+    def register(self, name: str, handler):
+        self._handlers[name] = handler
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.journal_path:
+            self._journal = _Journal(self.journal_path)
+            # Rejouer les tâches non terminées avant l'arrêt précédent
+            for job in self._journal.pending():
+                await self._queue.put(job)
+
+    async def enqueue(self, name: str, payload: dict) -> str:
+        if not self.running:
+            raise RuntimeError("Job queue is not started")
+        if name not in self._handlers:
+            raise ValueError(f"Unknown job: {name}")
+        job = {"id": str(uuid.uuid4()), "name": name, "payload": payload, "enqueued_at": time.time()}
+        # Journaliser avant la mise en file : un worker peut terminer la tâche aussitôt
+        if self._journal:
+            await asyncio.to_thread(self._journal.add, job)
+        try:
+            await asyncio.wait_for(self._queue.put(job), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            if self._journal:
+                await asyncio.to_thread(self._journal.done, job["id"])
+            raise QueueFullError(f"Job queue full ({self.maxsize} jobs)")
+        self._stats["enqueued"] += 1
+        return job["id"]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            started = time.time()
+            self._wait_times.append(started - job["enqueued_at"])
+            self._stats["in_flight"] += 1
+            try:
+                await self._handlers[job["name"]](job["payload"])
+                self._stats["processed"] += 1
+            except Exception as e:
+                self._stats["failed"] += 1
+                print(f"Erreur lors de l'exécution de la tâche {job['name']}: {str(e)}")
+            finally:
+                self._stats["in_flight"] -= 1
+                self._run_times.append(time.time() - started)
+                if self._journal:
+                    await asyncio.to_thread(self._journal.done, job["id"])
+                self._queue.task_done()
+
+    async def join(self):
+        """Wait until every queued job has been processed"""
+        if self.running:
+            await self._queue.join()
+
+    async def stop(self, drain_timeout: float = None):
+        """Let queued jobs finish (up to drain_timeout), then stop the workers"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout or settings.JOB_QUEUE_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # Les tâches restantes sont conservées dans le journal s'il est activé
+            print(f"Job queue drain timed out with {self._queue.qsize()} jobs left")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+
+    def metrics(self) -> dict:
+        def _summary(samples):
+            if not samples:
+                return {"avg": 0.0, "p95": 0.0, "max": 0.0}
+            ordered = sorted(samples)
+            return {
+                "avg": sum(ordered) / len(ordered),
+                "p95": ordered[int(0.95 * (len(ordered) - 1))],
+                "max": ordered[-1]
+            }
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "maxsize": self.maxsize,
+            "workers": len(self._tasks),
+            **self._stats,
+            "wait_seconds": _summary(self._wait_times),
+            "run_seconds": _summary(self._run_times)
+        }
+
+
+job_queue = JobQueue(
+    maxsize=settings.JOB_QUEUE_MAXSIZE,
+    workers=settings.JOB_QUEUE_WORKERS,
+    enqueue_timeout=settings.JOB_QUEUE_ENQUEUE_TIMEOUT_SECONDS,
+    journal_path=settings.JOB_QUEUE_JOURNAL
+)
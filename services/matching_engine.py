@@ -0,0 +1,173 @@
+import numpy as np
+
+# Bonus selon le niveau validé
+LEVEL_BONUS = {
+    'débutant': 0.25,
+    'intermédiaire': 0.5,
+    'avancé': 0.75,
+    'expert': 1.0
+}
+
+
+class _SparseRows:
+    """Append-only CSR matrix (indptr / indices / data) built from Python lists"""
+
+    def __init__(self):
+        self.indptr = [0]
+        self.indices = []
+        self.data = []
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def append(self, row: dict):
+        self.indices.extend(row.keys())
+        self.data.extend(row.values())
+        self.indptr.append(len(self.indices))
+        self._arrays = None
+
+    def _get_arrays(self):
+        if self._arrays is None:
+            indptr = np.asarray(self.indptr, dtype=np.int64)
+            row_of = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(indptr))
+            self._arrays = (
+                row_of,
+                np.asarray(self.indices, dtype=np.int64),
+                np.asarray(self.data, dtype=np.float64)
+            )
+        return self._arrays
+
+    def dot(self, vector: np.ndarray) -> np.ndarray:
+        """Matrix-vector product, one value per row"""
+        row_of, indices, data = self._get_arrays()
+        return np.bincount(row_of, weights=data * vector[indices], minlength=len(self))
+
+
+class ScoringEngine:
+    """Sparse matrix form of calculate_match_score.
+
+    Skills are encoded as integer columns. Opportunities are rows of two CSR
+    matrices holding how many times each skill appears in `required_skills` and
+    `preferred_skills`; students are stored column-wise (skill -> {student row:
+    level bonus}). Scoring one student against every opportunity is a single
+    sparse matrix-vector product, and scoring one opportunity against every
+    student sums a handful of skill columns.
+
+    Level bonuses are multiples of 0.25 and the counts are integers, so the sums
+    are exact and the scores are bit-for-bit those of calculate_match_score.
+    """
+
+    def __init__(self, preferred_weight: float):
+        self.preferred_weight = preferred_weight
+        self._skill_ids = {}
+        # Opportunités (lignes)
+        self.opportunity_ids = []
+        self._opportunity_rows = {}
+        self._required = _SparseRows()
+        self._preferred = _SparseRows()
+        self._required_len = []
+        self._preferred_len = []
+        self._active = []
+        self._row_arrays = None
+        # Étudiants (colonnes par compétence)
+        self.student_ids = []
+        self._student_rows = {}
+        self._columns = {}
+        self._column_arrays = {}
+
+    def _skill_id(self, skill: str) -> int:
+        if skill not in self._skill_ids:
+            self._skill_ids[skill] = len(self._skill_ids)
+        return self._skill_ids[skill]
+
+    def _counts(self, skills) -> dict:
+        counts = {}
+        for skill in skills or []:
+            skill_id = self._skill_id(skill)
+            counts[skill_id] = counts.get(skill_id, 0) + 1
+        return counts
+
+    def add_opportunity(self, opp_id: str, opportunity: dict):
+        if opp_id in self._opportunity_rows:
+            self.remove_opportunity(opp_id)
+        required = opportunity.get('required_skills') or []
+        preferred = opportunity.get('preferred_skills') or []
+        self._opportunity_rows[opp_id] = len(self.opportunity_ids)
+        self.opportunity_ids.append(opp_id)
+        self._required.append(self._counts(required))
+        self._preferred.append(self._counts(preferred))
+        self._required_len.append(len(required))
+        self._preferred_len.append(len(preferred))
+        self._active.append(True)
+        self._row_arrays = None
+
+    def remove_opportunity(self, opp_id: str):
+        row = self._opportunity_rows.pop(opp_id, None)
+        if row is not None:
+            self._active[row] = False
+            self._row_arrays = None
+
+    def set_student_skill(self, student_id: str, skill: str, level: str):
+        if student_id not in self._student_rows:
+            self._student_rows[student_id] = len(self.student_ids)
+            self.student_ids.append(student_id)
+        skill_id = self._skill_id(skill)
+        self._columns.setdefault(skill_id, {})[self._student_rows[student_id]] = LEVEL_BONUS.get(level, 0)
+        self._column_arrays.pop(skill_id, None)
+
+    def _combine(self, required_sum, required_len, preferred_sum, preferred_len):
+        scores = np.zeros_like(required_sum)
+        has_required = required_len > 0
+        scores[has_required] = required_sum[has_required] / required_len[has_required]
+        if self.preferred_weight:
+            has_preferred = has_required & (preferred_len > 0)
+            scores[has_preferred] += self.preferred_weight * (preferred_sum[has_preferred] / preferred_len[has_preferred])
+        return scores
+
+    def score_student(self, validated_skills: dict):
+        """Scores of one student against every active opportunity -> (opportunity ids, scores)"""
+        if self._row_arrays is None:
+            self._row_arrays = (
+                np.asarray(self._required_len, dtype=np.float64),
+                np.asarray(self._preferred_len, dtype=np.float64),
+                np.asarray(self._active, dtype=bool)
+            )
+        required_len, preferred_len, active = self._row_arrays
+        vector = np.zeros(len(self._skill_ids), dtype=np.float64)
+        for skill, level in (validated_skills or {}).items():
+            if skill in self._skill_ids:
+                vector[self._skill_ids[skill]] = LEVEL_BONUS.get(level, 0)
+        scores = self._combine(self._required.dot(vector), required_len,
+                               self._preferred.dot(vector), preferred_len)
+        scores[~active] = 0.0
+        return self.opportunity_ids, scores
+
+    def _column_sum(self, counts: dict) -> np.ndarray:
+        rows, weights = [], []
+        for skill_id, count in counts.items():
+            if skill_id not in self._columns:
+                continue
+            if skill_id not in self._column_arrays:
+                column = self._columns[skill_id]
+                self._column_arrays[skill_id] = (
+                    np.fromiter(column.keys(), dtype=np.int64, count=len(column)),
+                    np.fromiter(column.values(), dtype=np.float64, count=len(column))
+                )
+            column_rows, column_bonus = self._column_arrays[skill_id]
+            rows.append(column_rows)
+            weights.append(column_bonus * count)
+        if not rows:
+            return np.zeros(len(self.student_ids), dtype=np.float64)
+        return np.bincount(np.concatenate(rows), weights=np.concatenate(weights), minlength=len(self.student_ids))
+
+    def score_opportunity(self, opportunity: dict):
+        """Scores of one opportunity against every known student -> (student ids, scores)"""
+        required = opportunity.get('required_skills') or []
+        preferred = opportunity.get('preferred_skills') or []
+        size = len(self.student_ids)
+        scores = self._combine(
+            self._column_sum(self._counts(required)), np.full(size, float(len(required))),
+            self._column_sum(self._counts(preferred)), np.full(size, float(len(preferred)))
+        )
+        return self.student_ids, scores
@@ -0,0 +1,224 @@
+import asyncio
+import gzip
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta
+
+from database import repository, indexes, unread_notifications
+from services import serialization
+from configs import settings
+
+# Retention of the notifications collection.
+#
+# Policies (0 disables one):
+#   read_age   read notifications older than NOTIFICATION_RETENTION_READ_DAYS
+#   max_age    any notification older than NOTIFICATION_RETENTION_MAX_AGE_DAYS
+#   keep_last  beyond the NOTIFICATION_RETENTION_KEEP_LAST newest of a recipient
+#
+# Candidates are selected from the index nodes only (recipient index and unread
+# index, see database/unread_notifications.py); the bodies of the selected
+# notifications are read to archive them and measure the bytes reclaimed.
+# Notifications written before the unread index existed are missing from it
+# whether read or not, so a read_age candidate is only deleted when its own
+# `read` field is set as well. Each chunk is deleted in one multi-path update
+# together with its index entries and the unread counter decrements. When NOTIFICATION_ARCHIVE_DIR is set, the chunk
+# is first written to a temporary gzip member next to the run's NDJSON archive,
+# and appended to the archive only once the delete has succeeded: a chunk whose
+# delete fails is not archived, so the next run does not archive it twice.
+#
+# The job is meant to run from cron, in a single process at a time:
+#
+#   python -m services.notification_retention run [--dry-run]
+#
+# It can also run every NOTIFICATION_RETENTION_INTERVAL_SECONDS in the app (0,
+# the default, disables it). Runs are only serialized within one process, and
+# two concurrent runs would archive the same notifications twice and decrement
+# their unread counters twice: enable it in exactly one worker.
+
+POLICIES = ("read_age", "max_age", "keep_last")
+
+
+def _cutoff(days: int):
+    return (datetime.now() - timedelta(days=days)).isoformat() if days > 0 else None
+
+
+def select_expired(entries: dict, unread_ids, read_cutoff: str = None, max_age_cutoff: str = None,
+                   keep_last: int = 0) -> dict:
+    """Notification id -> policy, among one recipient's index entries (id -> created_at)"""
+    unread_ids = set(unread_ids)
+    newest_first = sorted(((created_at or "", notification_id) for notification_id, created_at in entries.items()),
+                          reverse=True)
+    expired = {}
+    for rank, (created_at, notification_id) in enumerate(newest_first):
+        # read_age en dernier : c'est la seule règle que le champ `read` peut encore annuler
+        if max_age_cutoff and created_at < max_age_cutoff:
+            expired[notification_id] = "max_age"
+        elif keep_last and rank >= keep_last:
+            expired[notification_id] = "keep_last"
+        elif read_cutoff and notification_id not in unread_ids and created_at < read_cutoff:
+            expired[notification_id] = "read_age"
+    return expired
+
+
+class RetentionRun:
+    def __init__(self, dry_run: bool, archive_dir: str, chunk_size: int):
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.archive_path = None
+        if archive_dir and not dry_run:
+            self.archive_path = os.path.join(
+                archive_dir, f"notifications-{datetime.now().strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+            )
+        self.recipients = 0
+        self.deleted = 0
+        self.by_policy = dict.fromkeys(POLICIES, 0)
+        self.bytes_reclaimed = 0
+        self.kept_unread = 0
+        self._pending = []
+
+    async def add(self, recipient_id: str, expired: dict):
+        for notification_id, policy in expired.items():
+            self._pending.append((recipient_id, notification_id, policy))
+            if len(self._pending) >= self.chunk_size:
+                await self.flush()
+
+    def _stage(self, records: list) -> str:
+        """Write a chunk to a temporary gzip member, returns its path"""
+        os.makedirs(os.path.dirname(self.archive_path) or ".", exist_ok=True)
+        staged = f"{self.archive_path}.part"
+        with gzip.open(staged, "wb") as part:
+            part.writelines(serialization.dumps_json(record) + b"\n" for record in records)
+        return staged
+
+    def _commit(self, staged: str):
+        # Membres gzip concaténés : l'archive reste un seul flux gzip lisible
+        with open(staged, "rb") as part, open(self.archive_path, "ab") as archive:
+            shutil.copyfileobj(part, archive)
+        os.remove(staged)
+
+    async def flush(self):
+        chunk, self._pending = self._pending, []
+        if not chunk:
+            return
+        bodies = await repository.fetch_many("notifications", [notification_id for _, notification_id, _ in chunk])
+        # Absente de l'index des non lues mais pas marquée lue : notification antérieure à l'index
+        unread = {notification_id for _, notification_id, policy in chunk
+                  if policy == "read_age" and notification_id in bodies and not bodies[notification_id].get('read')}
+        if unread:
+            self.kept_unread += len(unread)
+            chunk = [entry for entry in chunk if entry[1] not in unread]
+            bodies = {notification_id: body for notification_id, body in bodies.items() if notification_id not in unread}
+            if not chunk:
+                return
+        encoded = {notification_id: serialization.dumps_json(body) for notification_id, body in bodies.items()}
+        if not self.dry_run:
+            staged = None
+            if self.archive_path and bodies:
+                staged = await repository.run_blocking(self._stage, list(bodies.values()))
+            try:
+                await self._delete(chunk)
+            except Exception:
+                if staged:
+                    os.remove(staged)
+                raise
+            if staged:
+                await repository.run_blocking(self._commit, staged)
+        self.deleted += len(chunk)
+        self.bytes_reclaimed += sum(len(body) for body in encoded.values())
+        for _, _, policy in chunk:
+            self.by_policy[policy] += 1
+
+    async def _delete(self, chunk: list):
+        updates = {}
+        for recipient_id, notification_id, _ in chunk:
+            updates[f"notifications/{notification_id}"] = None
+            updates[f"{indexes.NOTIFICATIONS_BY_RECIPIENT}/{recipient_id}/{notification_id}"] = None
+        # Sous le verrou des lectures : une notification marquée lue entre-temps n'est pas décomptée deux fois
+        async with unread_notifications.read_lock:
+            still_unread = await asyncio.gather(*(
+                repository.get(f"{unread_notifications.UNREAD_BY_RECIPIENT}/{recipient_id}/{notification_id}")
+                for recipient_id, notification_id, _ in chunk
+            ))
+            decrements = {}
+            for (recipient_id, notification_id, _), created_at in zip(chunk, still_unread):
+                if created_at is not None:
+                    updates[f"{unread_notifications.UNREAD_BY_RECIPIENT}/{recipient_id}/{notification_id}"] = None
+                    decrements[recipient_id] = decrements.get(recipient_id, 0) + 1
+            for recipient_id, count in decrements.items():
+                updates[f"{unread_notifications.UNREAD_COUNTS}/{recipient_id}"] = repository.increment(-count)
+            await repository.update_multi(updates)
+
+    def report(self) -> dict:
+        return {"dry_run": self.dry_run, "recipients_scanned": self.recipients, "deleted": self.deleted,
+                "deleted_by_policy": self.by_policy, "kept_unread": self.kept_unread,
+                "bytes_reclaimed": self.bytes_reclaimed,
+                "archive": self.archive_path if self.deleted else None}
+
+
+async def run(dry_run: bool = False) -> dict:
+    """Apply the retention policies to every recipient's notifications"""
+    started = time.perf_counter()
+    read_cutoff = _cutoff(settings.NOTIFICATION_RETENTION_READ_DAYS)
+    max_age_cutoff = _cutoff(settings.NOTIFICATION_RETENTION_MAX_AGE_DAYS)
+    retention = RetentionRun(dry_run, settings.NOTIFICATION_ARCHIVE_DIR, settings.NOTIFICATION_RETENTION_CHUNK_SIZE)
+
+    for recipient_id in await repository.keys(indexes.NOTIFICATIONS_BY_RECIPIENT):
+        entries, unread = await asyncio.gather(
+            repository.get(f"{indexes.NOTIFICATIONS_BY_RECIPIENT}/{recipient_id}"),
+            repository.keys(f"{unread_notifications.UNREAD_BY_RECIPIENT}/{recipient_id}")
+        )
+        retention.recipients += 1
+        expired = select_expired(entries or {}, unread, read_cutoff, max_age_cutoff,
+                                 settings.NOTIFICATION_RETENTION_KEEP_LAST)
+        await retention.add(recipient_id, expired)
+    await retention.flush()
+
+    result = {**retention.report(), "duration_seconds": time.perf_counter() - started}
+    print(f"Notification retention: {result['deleted']} notifications, {result['bytes_reclaimed']} bytes reclaimed"
+          f"{' (dry run)' if dry_run else ''}")
+    return result
+
+
+class RetentionScheduler:
+    """Runs the retention job periodically in the app's event loop"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_report = None
+        self.runs = 0
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.last_report = await run()
+                self.runs += 1
+            except Exception as e:
+                print(f"Erreur lors de la purge des notifications: {str(e)}")
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {"interval_seconds": self.interval, "runs": self.runs, "last_report": self.last_report}
+
+
+retention_scheduler = RetentionScheduler(settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    # Usage : python -m services.notification_retention run [--dry-run]
+    if sys.argv[1:] not in (["run"], ["run", "--dry-run"]):
+        print("Usage: python -m services.notification_retention run [--dry-run]")
+        sys.exit(1)
+    asyncio.run(run(dry_run="--dry-run" in sys.argv))
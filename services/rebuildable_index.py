@@ -0,0 +1,78 @@
+import abc
+import asyncio
+
+
+class RebuildableIndex(abc.ABC):
+    """Base class for in-memory indexes loaded from the database.
+
+    Subclasses implement `_load()` (async, fetches the source data) and
+    `_rebuild(data)` (sync, replaces the in-memory structures), and call
+    `self._record(method, *args)` at the start of each incremental update.
+    Updates received while a rebuild is loading are replayed on the freshly
+    built structures, so they are not lost. The index is rebuilt every
+    `rebuild_interval` seconds to pick up writes made by other workers:
+    incremental updates only reach the worker that made the write, so with
+    several workers the interval is the bound on how stale an index can be.
+    A rebuild reloads whole collections, so the interval is in minutes.
+    All mutations happen on the event loop, so no locking is needed.
+    """
+
+    name = "index"
+
+    def __init__(self, rebuild_interval: float):
+        self.rebuild_interval = rebuild_interval
+        self.ready = False
+        self._task = None
+        self._build_lock = asyncio.Lock()
+        self._writes_during_build = None
+
+    @abc.abstractmethod
+    async def _load(self):
+        """Fetch the source data of the index"""
+
+    @abc.abstractmethod
+    def _rebuild(self, data):
+        """Replace the in-memory structures with ones built from `data`"""
+
+    def _record(self, method, *args):
+        if self._writes_during_build is not None:
+            self._writes_during_build.append((method, args))
+
+    async def build(self):
+        async with self._build_lock:
+            self._writes_during_build = []
+            try:
+                data = await self._load()
+            except Exception:
+                self._writes_during_build = None
+                raise
+            writes, self._writes_during_build = self._writes_during_build, None
+            self._rebuild(data)
+            for method, args in writes:
+                method(*args)
+            self.ready = True
+
+    async def ensure_ready(self):
+        if not self.ready:
+            await self.build()
+
+    async def _rebuild_loop(self):
+        # Déjà construit (préchauffage au démarrage) : première reconstruction après un intervalle
+        if self.ready:
+            await asyncio.sleep(self.rebuild_interval)
+        while True:
+            try:
+                await self.build()
+            except Exception as e:
+                print(f"Erreur lors de la construction de l'index {self.name}: {str(e)}")
+            await asyncio.sleep(self.rebuild_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._rebuild_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,136 @@
+import asyncio
+import sys
+
+import numpy as np
+
+from database import repository
+from services.skill_index import skill_index
+from configs import settings
+
+# Materialized recommendation lists.
+#
+#   recommendations/<student_id>/<opportunity_id> = match score
+#
+# Only scores above MATCH_SCORE_THRESHOLD are stored, so /matching/recommendations
+# is a single keyed read. The lists are kept up to date incrementally:
+#
+#   - validate_skill rescores the student against every opportunity
+#     (student_entries replaces the student's whole list), inside the same
+#     multi-path update as the validation;
+#   - create_opportunity only writes the opportunity and adds it to the skill
+#     index; the job queue then scores it against the students
+#     (add_opportunity writes one entry per matching student).
+#
+# Scores come from the skill index's ScoringEngine. Both workflows compute
+# their entries from the in-memory engine and commit them under `commit_lock`,
+# validate_skill also updating the engine inside the lock: run concurrently, an
+# opportunity could otherwise write a score computed before a validation.
+# `commit_lock` is an asyncio.Lock and only serializes the requests of one
+# worker process; with several workers such races remain possible between
+# processes. `rebuild` recomputes every list from scratch and `check` compares
+# the stored lists with a full recompute:
+#
+#   python -m services.recommendations rebuild
+#   python -m services.recommendations check
+
+RECOMMENDATIONS = "recommendations"
+SCORE_TOLERANCE = 1e-9
+
+commit_lock = asyncio.Lock()
+
+
+def _matches(ids, scores) -> dict:
+    return {ids[i]: float(scores[i]) for i in np.flatnonzero(scores > settings.MATCH_SCORE_THRESHOLD)}
+
+
+def score_student(validated_skills: dict) -> dict:
+    """Opportunity id -> score for one student (skill index must be ready)"""
+    return _matches(*skill_index.engine.score_student(validated_skills))
+
+
+def student_entries(student_id: str, validated_skills: dict) -> dict:
+    return {f"{RECOMMENDATIONS}/{student_id}": score_student(validated_skills) or None}
+
+
+def opportunity_entries(opportunity_id: str, opportunity: dict) -> dict:
+    matches = _matches(*skill_index.engine.score_opportunity(opportunity))
+    return {f"{RECOMMENDATIONS}/{student_id}/{opportunity_id}": score for student_id, score in matches.items()}
+
+
+async def add_opportunity(opportunity_id: str, opportunity: dict, chunk_size: int = None) -> int:
+    """Add a new opportunity to the lists of the matching students, returns how many"""
+    chunk_size = chunk_size or settings.RECOMMENDATIONS_REBUILD_CHUNK_SIZE
+    await skill_index.ensure_ready()
+    async with commit_lock:
+        updates = list(opportunity_entries(opportunity_id, opportunity).items())
+        for start in range(0, len(updates), chunk_size):
+            await repository.update_multi(dict(updates[start:start + chunk_size]))
+    return len(updates)
+
+
+async def get_for_student(student_id: str) -> dict:
+    return await repository.get(f"{RECOMMENDATIONS}/{student_id}") or {}
+
+
+async def _expected() -> dict:
+    """Full recompute: student id -> {opportunity id: score}"""
+    await skill_index.build()
+    students = await repository.get("students", coalesce=False) or {}
+    return {
+        student_id: score_student(student.get('validated_skills') or {})
+        for student_id, student in students.items() if isinstance(student, dict)
+    }
+
+
+async def rebuild(chunk_size: int = None) -> dict:
+    """Recompute every student's list and drop the lists of unknown students"""
+    chunk_size = chunk_size or settings.RECOMMENDATIONS_REBUILD_CHUNK_SIZE
+    expected = await _expected()
+    stale = [student_id for student_id in await repository.keys(RECOMMENDATIONS) if student_id not in expected]
+    updates = [(f"{RECOMMENDATIONS}/{student_id}", scores or None) for student_id, scores in expected.items()]
+    updates += [(f"{RECOMMENDATIONS}/{student_id}", None) for student_id in stale]
+    for start in range(0, len(updates), chunk_size):
+        await repository.update_multi(dict(updates[start:start + chunk_size]))
+    stats = {
+        "students": len(expected),
+        "recommendations": sum(len(scores) for scores in expected.values()),
+        "stale_removed": len(stale)
+    }
+    print(f"Recommendations rebuilt: {stats}")
+    return stats
+
+
+async def check() -> dict:
+    """Compare the materialized lists with a full recompute"""
+    expected = await _expected()
+    stored = await repository.get(RECOMMENDATIONS) or {}
+    report = {"students": len(expected), "missing": 0, "unexpected": 0, "score_mismatches": 0,
+              "stale_students": len([student_id for student_id in stored if student_id not in expected]),
+              "inconsistent_students": []}
+    for student_id, scores in expected.items():
+        materialized = stored.get(student_id) or {}
+        missing = scores.keys() - materialized.keys()
+        unexpected = materialized.keys() - scores.keys()
+        mismatches = [opp_id for opp_id in scores.keys() & materialized.keys()
+                      if abs(scores[opp_id] - materialized[opp_id]) > SCORE_TOLERANCE]
+        report["missing"] += len(missing)
+        report["unexpected"] += len(unexpected)
+        report["score_mismatches"] += len(mismatches)
+        if missing or unexpected or mismatches:
+            report["inconsistent_students"].append(student_id)
+    report["consistent"] = not report["inconsistent_students"] and not report["stale_students"]
+    print(f"Recommendations check: {({k: v for k, v in report.items() if k != 'inconsistent_students'})}")
+    for student_id in report["inconsistent_students"][:20]:
+        print(f"  inconsistent: {student_id}")
+    return report
+
+
+if __name__ == "__main__":
+    # Usage : python -m services.recommendations rebuild|check
+    if sys.argv[1:] not in (["rebuild"], ["check"]):
+        print("Usage: python -m services.recommendations rebuild|check")
+        sys.exit(1)
+    if sys.argv[1] == "rebuild":
+        asyncio.run(rebuild())
+    else:
+        sys.exit(0 if asyncio.run(check())["consistent"] else 1)
@@ -0,0 +1,111 @@
+import contextvars
+from datetime import date, datetime
+from enum import Enum
+
+import msgpack
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+# Response serialization.
+#
+# NegotiatedResponse is the app's default response class: it renders with
+# orjson, or with msgpack when the client sent `Accept: application/msgpack`
+# (the mobile apps). The Accept header is captured by ContentNegotiationMiddleware
+# in a context variable, since a response class never sees the request.
+#
+# Routes returning a response model still pay for FastAPI's validation and
+# jsonable_encoder pass. List endpoints returning data the server just read or
+# built use `prebuilt()` instead, which renders the content as is.
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+_wants_msgpack = contextvars.ContextVar("wants_msgpack", default=False)
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "tolist"):
+        # Scalaires et tableaux numpy (scores de correspondance)
+        return value.tolist()
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def dumps_json(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def dumps_msgpack(content) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True, datetime=False)
+
+
+def accepts_msgpack(accept: str) -> bool:
+    for media_range in (accept or "").split(","):
+        media_type, _, params = media_range.strip().partition(";")
+        if media_type.strip().lower() in MSGPACK_MEDIA_TYPES:
+            quality = 1.0
+            for param in params.split(";"):
+                key, _, value = param.strip().partition("=")
+                if key.strip().lower() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            return quality > 0
+    return False
+
+
+class NegotiatedResponse(Response):
+    media_type = "application/json"
+
+    def __init__(self, content=None, *args, **kwargs):
+        if _wants_msgpack.get():
+            self.media_type = MSGPACK_MEDIA_TYPES[0]
+        super().__init__(content, *args, **kwargs)
+        self.headers.setdefault("vary", "Accept")
+
+    def render(self, content) -> bytes:
+        if self.media_type == "application/json":
+            return dumps_json(content)
+        return dumps_msgpack(content)
+
+
+def prebuilt(content, response: Response = None, status_code: int = 200) -> NegotiatedResponse:
+    """Response for data the server built itself: no response-model revalidation.
+
+    Headers set on the injected `response` (e.g. X-Next-Cursor) are carried over.
+    """
+    result = NegotiatedResponse(content, status_code=status_code)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-type"):
+                result.headers[name] = value
+    return result
+
+
+class ContentNegotiationMiddleware:
+    """ASGI middleware recording whether the client asked for msgpack"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = ""
+        for name, value in scope.get("headers", ()):
+            if name == b"accept":
+                accept = value.decode("latin-1")
+                break
+        token = _wants_msgpack.set(accepts_msgpack(accept))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _wants_msgpack.reset(token)
@@ -0,0 +1,68 @@
+import asyncio
+
+from database import repository
+from services.matching_engine import ScoringEngine
+from services.rebuildable_index import RebuildableIndex
+from configs import settings
+
+
+class SkillIndex(RebuildableIndex):
+    """In-memory skill index over opportunities and students.
+
+    `students_by_skill` maps a skill to {student_id: validated level}, so the
+    fan-out only looks at the union of the relevant posting lists. `engine`
+    holds the same data as sparse matrices for batch match scoring.
+    """
+
+    name = "des compétences"
+
+    def __init__(self, rebuild_interval: float):
+        super().__init__(rebuild_interval)
+        self.opportunities = {}
+        self.students_by_skill = {}
+        self.engine = ScoringEngine(settings.PREFERRED_SKILLS_WEIGHT)
+
+    async def _load(self):
+        return await asyncio.gather(
+            repository.get("opportunities", replica=True, coalesce=False),
+            repository.get("students", coalesce=False)
+        )
+
+    def _rebuild(self, data):
+        opportunities, students = data
+        engine = ScoringEngine(settings.PREFERRED_SKILLS_WEIGHT)
+        for opp_id, opportunity in (opportunities or {}).items():
+            engine.add_opportunity(opp_id, opportunity)
+        students_by_skill = {}
+        for student_id, student in (students or {}).items():
+            for skill, level in (student.get('validated_skills') or {}).items():
+                students_by_skill.setdefault(skill, {})[student_id] = level
+                engine.set_student_skill(student_id, skill, level)
+
+        self.opportunities = dict(opportunities or {})
+        self.students_by_skill = students_by_skill
+        self.engine = engine
+
+    def add_opportunity(self, opp_id: str, opportunity: dict):
+        self._record(self.add_opportunity, opp_id, opportunity)
+        self.opportunities[opp_id] = opportunity
+        self.engine.add_opportunity(opp_id, opportunity)
+
+    def remove_opportunity(self, opp_id: str):
+        self._record(self.remove_opportunity, opp_id)
+        self.opportunities.pop(opp_id, None)
+        self.engine.remove_opportunity(opp_id)
+
+    def set_student_skill(self, student_id: str, skill: str, level: str):
+        self._record(self.set_student_skill, student_id, skill, level)
+        self.students_by_skill.setdefault(skill, {})[student_id] = level
+        self.engine.set_student_skill(student_id, skill, level)
+
+    def student_candidates(self, skills) -> set:
+        candidates = set()
+        for skill in skills:
+            candidates.update(self.students_by_skill.get(skill, {}))
+        return candidates
+
+
+skill_index = SkillIndex(settings.SKILL_INDEX_REBUILD_SECONDS)
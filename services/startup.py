@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from configs import settings
+
+# Background warm-up of the backends.
+#
+# The lifespan hook starts the warm-up and yields at once, so the worker serves
+# /health while Firebase clients, replica streams and in-memory indexes are still
+# being built. Steps run in order; a failing step is retried every
+# WARMUP_RETRY_SECONDS, the following ones waiting for it. /ready reports the
+# progress and answers 503 until every step is done. Requests arriving earlier
+# still work: clients and indexes are also built on first use.
+
+
+class WarmUp:
+    def __init__(self, retry_interval: float):
+        self.retry_interval = retry_interval
+        self.steps = {}
+        self.started_at = None
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.steps) and all(step["status"] == "done" for step in self.steps.values())
+
+    def start(self, steps: list):
+        """Run (name, async callable) steps in the background"""
+        if self._task is not None:
+            return
+        self.started_at = time.monotonic()
+        self.steps = {name: {"status": "pending", "seconds": None, "error": None, "attempts": 0} for name, _ in steps}
+        self._task = asyncio.create_task(self._run(steps))
+
+    async def _run(self, steps: list):
+        for name, step in steps:
+            state = self.steps[name]
+            while True:
+                state.update(status="running", attempts=state["attempts"] + 1)
+                started = time.monotonic()
+                try:
+                    await step()
+                except Exception as e:
+                    print(f"Erreur lors du préchauffage ({name}): {str(e)}")
+                    state.update(status="failed", error=str(e))
+                    await asyncio.sleep(self.retry_interval)
+                    continue
+                state.update(status="done", error=None, seconds=time.monotonic() - started)
+                break
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime_seconds": time.monotonic() - self.started_at if self.started_at else 0.0,
+            "steps": self.steps
+        }
+
+
+warm_up = WarmUp(settings.WARMUP_RETRY_SECONDS)
@@ -0,0 +1,120 @@
+import asyncio
+import re
+import sys
+
+from database import repository
+from classes.schemas_dto import ValidationStatus
+
+# Per-professional validation aggregates.
+#
+#   stats/professionals/<professional_id> = {
+#       total, by_month: {"2025-01": n}, by_domain: {<skill>: n}, rating_sum, rating_count
+#   }
+#
+# validate_skill adds server-side increments for these counters to its
+# multi-path update (validation_entries), so /professionals/validation-stats is
+# a single keyed read. The average rating comes from rating_sum / rating_count
+# when validations carry a rating, otherwise from the professional's own
+# `rating` field; it is None when neither has a value. `backfill` recomputes every node from skill_validations:
+#
+#   python -m services.validation_stats backfill
+
+PROFESSIONAL_STATS = "stats/professionals"
+
+# Caractères interdits dans les clés du Realtime Database (noms de compétences
+# comme "node.js" ou "c#"), encodés façon URL ; "%" l'est aussi pour rester réversible
+_KEY_ESCAPES = {char: f"%{ord(char):02X}" for char in "%.$#[]/"}
+_KEY_UNESCAPES = re.compile("|".join(re.escape(escape) for escape in _KEY_ESCAPES.values()))
+
+
+def encode_key(name: str) -> str:
+    return "".join(_KEY_ESCAPES.get(char, char) for char in name)
+
+
+def decode_key(key: str) -> str:
+    return _KEY_UNESCAPES.sub(lambda match: chr(int(match.group(0)[1:], 16)), key)
+
+
+def _month(date: str) -> str:
+    return (date or "")[:7] or "unknown"
+
+
+def validation_entries(professional_id: str, skill_name: str, validation_date: str, rating: float = None) -> dict:
+    """Server-side increments recording one validation in the professional's aggregates"""
+    prefix = f"{PROFESSIONAL_STATS}/{professional_id}"
+    entries = {
+        f"{prefix}/total": repository.increment(),
+        f"{prefix}/by_month/{_month(validation_date)}": repository.increment(),
+        f"{prefix}/by_domain/{encode_key(skill_name)}": repository.increment()
+    }
+    if rating is not None:
+        entries[f"{prefix}/rating_sum"] = repository.increment(rating)
+        entries[f"{prefix}/rating_count"] = repository.increment()
+    return entries
+
+
+def _rated(rating) -> bool:
+    # 0.0 est la valeur par défaut du profil : pas encore de note
+    return isinstance(rating, (int, float)) and not isinstance(rating, bool) and rating > 0
+
+
+async def get(professional_id: str) -> dict:
+    stats, rating = await asyncio.gather(
+        repository.get(f"{PROFESSIONAL_STATS}/{professional_id}"),
+        repository.get(f"professionals/{professional_id}/rating")
+    )
+    stats = stats or {}
+    if stats.get("rating_count"):
+        average_rating = stats.get("rating_sum", 0) / stats["rating_count"]
+    else:
+        average_rating = rating if _rated(rating) else None
+    return {
+        "total": stats.get("total", 0),
+        "by_month": stats.get("by_month") or {},
+        "by_domain": {decode_key(key): count for key, count in (stats.get("by_domain") or {}).items()},
+        "average_rating": average_rating
+    }
+
+
+def _validated(validation) -> bool:
+    return (isinstance(validation, dict) and validation.get("professional_id")
+            and validation.get("status") == ValidationStatus.VALIDEE.value)
+
+
+async def backfill(chunk_size: int = 500) -> dict:
+    """Recompute every professional's aggregates from the validated skill validations"""
+    validations = await repository.get("skill_validations") or {}
+    aggregates = {}
+    for validation in validations.values():
+        if not _validated(validation):
+            continue
+        stats = aggregates.setdefault(validation["professional_id"], {
+            "total": 0, "by_month": {}, "by_domain": {}, "rating_sum": 0, "rating_count": 0
+        })
+        stats["total"] += 1
+        month = _month(validation.get("validation_date"))
+        stats["by_month"][month] = stats["by_month"].get(month, 0) + 1
+        domain = encode_key(validation.get("skill_name", ""))
+        stats["by_domain"][domain] = stats["by_domain"].get(domain, 0) + 1
+        if _rated(validation.get("rating")):
+            stats["rating_sum"] += validation["rating"]
+            stats["rating_count"] += 1
+
+    stale = [pid for pid in await repository.keys(PROFESSIONAL_STATS) if pid not in aggregates]
+    updates = [(f"{PROFESSIONAL_STATS}/{pid}", stats) for pid, stats in aggregates.items()]
+    updates += [(f"{PROFESSIONAL_STATS}/{pid}", None) for pid in stale]
+    for start in range(0, len(updates), chunk_size):
+        await repository.update_multi(dict(updates[start:start + chunk_size]))
+
+    result = {"professionals": len(aggregates), "validations": sum(s["total"] for s in aggregates.values()),
+              "stale_removed": len(stale)}
+    print(f"Validation stats backfilled: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    # Usage : python -m services.validation_stats backfill
+    if sys.argv[1:] != ["backfill"]:
+        print("Usage: python -m services.validation_stats backfill")
+        sys.exit(1)
+    asyncio.run(backfill())
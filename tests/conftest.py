@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Backend local en mémoire : les tests n'ont besoin ni de Firebase ni du réseau
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
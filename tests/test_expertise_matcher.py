@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from services.expertise_matcher import _BidirectionalIndex
+
+ALPHABET = "abcd "
+
+
+def _random_string(rng, max_length=8):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+
+def _expected(owners: dict, text: str) -> set:
+    return {owner_id for owner_id, value in owners.items() if value in text or text in value}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_naive_substring_search_under_churn(seed):
+    rng = random.Random(seed)
+    index, owners = _BidirectionalIndex(), {}
+    for step in range(1500):
+        if owners and rng.random() < 0.4:
+            owner_id = rng.choice(sorted(owners))
+            index.discard(owners.pop(owner_id), owner_id)
+        else:
+            owner_id = f"owner-{step}"
+            owners[owner_id] = _random_string(rng)
+            index.add(owners[owner_id], owner_id)
+        if step % 10 == 0:
+            text = _random_string(rng)
+            assert index.match(text) == _expected(owners, text)
+
+
+def test_bulk_load_then_removals():
+    rng = random.Random(42)
+    index = _BidirectionalIndex()
+    owners = {f"owner-{i}": _random_string(rng, 12) for i in range(600)}
+    for owner_id, value in owners.items():
+        index.add(value, owner_id)
+    for owner_id in list(owners)[::3]:
+        index.discard(owners.pop(owner_id), owner_id)
+    for _ in range(50):
+        text = _random_string(rng, 5)
+        assert index.match(text) == _expected(owners, text)
+
+
+def test_long_strings_stay_linear():
+    index = _BidirectionalIndex()
+    value = "".join(random.Random(1).choice("abcdefgh") for _ in range(5000))
+    index.add(value, "owner")
+    assert len(index._substrings._suffixes) + len(index._substrings._unsorted) == len(value) + 1
+    assert index.match(value[1000:1100]) == {"owner"}
+    index.discard(value, "owner")
+    assert index.match(value[1000:1100]) == set()
+    assert index._substrings._suffixes == []
@@ -0,0 +1,21 @@
+import pytest
+
+from services.exports import accepts_gzip
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("GZIP;Q=0.5", True),
+    ("x-gzip", True),
+    ("br, *", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, br", False),
+    ("gzip;q=0, *", False),
+    ("*;q=0", False),
+    ("deflate", False),
+    ("", False),
+    (None, False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) is expected
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from routers.router_matching import calculate_match_score
+from services.matching_engine import LEVEL_BONUS, ScoringEngine
+
+SKILLS = [f"skill-{i}" for i in range(40)]
+LEVELS = list(LEVEL_BONUS) + ["inconnu"]
+
+
+def _dataset(seed: int):
+    rng = random.Random(seed)
+    opportunities = {}
+    for i in range(150):
+        opportunities[f"opp-{i}"] = {
+            # Doublons possibles, listes vides comprises
+            "required_skills": [rng.choice(SKILLS) for _ in range(rng.randint(0, 6))],
+            "preferred_skills": [rng.choice(SKILLS) for _ in range(rng.randint(0, 4))]
+        }
+    students = {
+        f"student-{i}": {skill: rng.choice(LEVELS) for skill in rng.sample(SKILLS, rng.randint(0, 12))}
+        for i in range(200)
+    }
+    return opportunities, students
+
+
+def _engine(opportunities: dict, students: dict, preferred_weight: float) -> ScoringEngine:
+    engine = ScoringEngine(preferred_weight)
+    for opp_id, opportunity in opportunities.items():
+        engine.add_opportunity(opp_id, opportunity)
+    for student_id, skills in students.items():
+        for skill, level in skills.items():
+            engine.set_student_skill(student_id, skill, level)
+    return engine
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("preferred_weight", [0.0, 0.2, 0.35])
+def test_score_student_matches_reference(seed, preferred_weight):
+    opportunities, students = _dataset(seed)
+    engine = _engine(opportunities, students, preferred_weight)
+    for skills in students.values():
+        opportunity_ids, scores = engine.score_student(skills)
+        for opp_id, score in zip(opportunity_ids, scores):
+            opportunity = opportunities[opp_id]
+            assert score == calculate_match_score(skills, opportunity["required_skills"],
+                                                  opportunity["preferred_skills"], preferred_weight)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("preferred_weight", [0.0, 0.2])
+def test_score_opportunity_matches_reference(seed, preferred_weight):
+    opportunities, students = _dataset(seed)
+    engine = _engine(opportunities, students, preferred_weight)
+    for opportunity in opportunities.values():
+        student_ids, scores = engine.score_opportunity(opportunity)
+        for student_id, score in zip(student_ids, scores):
+            assert score == calculate_match_score(students[student_id], opportunity["required_skills"],
+                                                  opportunity["preferred_skills"], preferred_weight)
+
+
+def test_removed_and_replaced_opportunities():
+    opportunities, students = _dataset(4)
+    engine = _engine(opportunities, students, 0.2)
+    engine.remove_opportunity("opp-0")
+    engine.add_opportunity("opp-1", {"required_skills": SKILLS[:3], "preferred_skills": SKILLS[3:5]})
+    skills = {SKILLS[0]: "expert", SKILLS[3]: "avancé"}
+    scores = dict(zip(*engine.score_student(skills)))
+    assert scores["opp-0"] == 0.0
+    assert scores["opp-1"] == calculate_match_score(skills, SKILLS[:3], SKILLS[3:5], 0.2)
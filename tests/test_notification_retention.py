@@ -0,0 +1,45 @@
+import asyncio
+import gzip
+import os
+import uuid
+
+import orjson
+import pytest
+
+from database import repository
+from services.notification_retention import RetentionRun
+
+
+async def _seed(recipient_id: str, count: int) -> list:
+    ids = [uuid.uuid4().hex for _ in range(count)]
+    await repository.update_multi({
+        f"notifications/{notification_id}": {"id": notification_id, "student_id": recipient_id, "read": True}
+        for notification_id in ids
+    })
+    return ids
+
+
+def _archived(path) -> list:
+    with gzip.open(path, "rb") as archive:
+        return [orjson.loads(line)["id"] for line in archive]
+
+
+def test_failed_delete_is_not_archived(tmp_path, monkeypatch):
+    async def scenario():
+        recipient_id = uuid.uuid4().hex
+        ids = await _seed(recipient_id, 4)
+        retention = RetentionRun(False, str(tmp_path), chunk_size=2)
+        await retention.add(recipient_id, {notification_id: "read_age" for notification_id in ids[:2]})
+
+        async def failing_delete(chunk):
+            raise repository.DatabaseTimeoutError("timeout")
+
+        monkeypatch.setattr(retention, "_delete", failing_delete)
+        with pytest.raises(repository.DatabaseTimeoutError):
+            await retention.add(recipient_id, {notification_id: "read_age" for notification_id in ids[2:]})
+        return retention, ids
+
+    retention, ids = asyncio.run(scenario())
+    assert retention.deleted == 2
+    assert _archived(retention.archive_path) == ids[:2]
+    assert [path.name for path in tmp_path.iterdir()] == [os.path.basename(retention.archive_path)]
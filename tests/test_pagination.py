@@ -0,0 +1,88 @@
+import asyncio
+import random
+import uuid
+
+import pytest
+
+from database import pagination, repository
+
+INDEX = "index/test_pagination"
+
+
+def _seed(entries: dict) -> str:
+    """Index entries (id -> created_at) and their records, under a fresh owner"""
+    owner_id = uuid.uuid4().hex
+    updates = {}
+    for record_id, created_at in entries.items():
+        updates[f"{INDEX}/{owner_id}/{record_id}"] = created_at
+        updates[f"test_records/{record_id}"] = {"id": record_id, "created_at": created_at}
+    asyncio.run(repository.update_multi(updates))
+    return owner_id
+
+
+def _all_pages(owner_id: str, limit: int) -> list:
+    async def walk():
+        pages, cursor = [], None
+        while True:
+            records, next_cursor = await pagination.page_index(INDEX, owner_id, "test_records", limit, cursor)
+            assert len(records) <= limit
+            pages.append(records)
+            if next_cursor is None:
+                return pages
+            assert len(records) == limit
+            cursor = pagination.decode_cursor(next_cursor)
+    return asyncio.run(walk())
+
+
+def _expected(entries: dict) -> list:
+    return [record_id for _, record_id in sorted(((created_at, record_id) for record_id, created_at in entries.items()),
+                                                 reverse=True)]
+
+
+def _ids(pages: list) -> list:
+    return [record["id"] for page in pages for record in page]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 7, 50])
+def test_pages_cover_every_record_once_with_ties(limit):
+    rng = random.Random(limit)
+    # Peu de dates distinctes : beaucoup d'entrées de même $value aux limites de page
+    entries = {f"rec-{i:03d}": f"2024-01-0{rng.randint(1, 3)}T00:00:00" for i in range(40)}
+    owner_id = _seed(entries)
+    assert _ids(_all_pages(owner_id, limit)) == _expected(entries)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_all_entries_with_the_same_value(limit):
+    # La taille de lecture doit être élargie plusieurs fois après le premier curseur
+    entries = {f"rec-{i:03d}": "2024-01-01T00:00:00" for i in range(30)}
+    owner_id = _seed(entries)
+    assert _ids(_all_pages(owner_id, limit)) == _expected(entries)
+
+
+@pytest.mark.parametrize("count, limit", [(0, 3), (3, 3), (4, 3), (6, 3)])
+def test_page_boundaries(count, limit):
+    entries = {f"rec-{i}": f"2024-01-01T00:00:0{i}" for i in range(count)}
+    owner_id = _seed(entries)
+    pages = _all_pages(owner_id, limit)
+    assert _ids(pages) == _expected(entries)
+    # Pas de page vide finale quand le nombre d'entrées est un multiple de la limite
+    assert len(pages) == max(1, -(-count // limit))
+
+
+def test_cursor_excludes_records_inserted_later_at_the_same_instant():
+    entries = {f"rec-{i}": "2024-01-01T00:00:00" for i in range(5)}
+    owner_id = _seed(entries)
+
+    async def first_then_rest():
+        first, next_cursor = await pagination.page_index(INDEX, owner_id, "test_records", 2)
+        # Même date que le curseur, id plus grand : déjà "avant" dans l'ordre décroissant
+        await repository.update_multi({f"{INDEX}/{owner_id}/rec-9": "2024-01-01T00:00:00",
+                                       "test_records/rec-9": {"id": "rec-9"}})
+        rest, _ = await pagination.page_index(INDEX, owner_id, "test_records", 10,
+                                              pagination.decode_cursor(next_cursor))
+        return first, rest
+
+    first, rest = asyncio.run(first_then_rest())
+    assert [record["id"] for record in first] == ["rec-4", "rec-3"]
+    assert [record["id"] for record in rest] == ["rec-2", "rec-1", "rec-0"]
@@ -0,0 +1,30 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from database import repository
+from database.auth_cache import token_cache
+from database.instrumentation import QueryTokenFilter, redact_query_tokens
+from main import app
+
+
+def test_websocket_token_in_subprotocol():
+    token, uid = uuid.uuid4().hex, uuid.uuid4().hex
+    token_cache.put(token, {"uid": uid, "exp": time.time() + 3600})
+    asyncio.run(repository.update_multi({f"users/{uid}": {"email": "a@b.c", "user_type": "student"}}))
+    # Sans lifespan : le pool de threads de la base reste ouvert pour les autres tests
+    with TestClient(app).websocket_connect("/notifications/ws", subprotocols=["bearer", token]) as websocket:
+        assert websocket.accepted_subprotocol == "bearer"
+
+
+def test_query_tokens_are_redacted_in_log_records():
+    assert redact_query_tokens("/notifications/stream?last_id=1&token=abc.def") == "/notifications/stream?last_id=1&token=***"
+    assert redact_query_tokens("/notifications/ws?TOKEN=abc") == "/notifications/ws?TOKEN=***"
+    assert redact_query_tokens("/skills?tokens=1") == "/skills?tokens=1"
+    record = logging.LogRecord("uvicorn.access", logging.INFO, __file__, 1, '%s - "%s %s HTTP/%s" %d',
+                               ("127.0.0.1:5000", "GET", "/notifications/stream?token=secret", "1.1", 200), None)
+    assert QueryTokenFilter().filter(record)
+    assert "secret" not in record.getMessage()
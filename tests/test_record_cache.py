@@ -0,0 +1,52 @@
+import asyncio
+
+from database.record_cache import RecordCache
+
+
+def _cache(**kwargs):
+    return RecordCache({}, 1 << 20, ttl=300, local_ttl=5, **kwargs)
+
+
+def test_local_ttl_is_short_without_shared_store():
+    assert _cache().local_ttl == 5
+
+
+def test_invalidation_during_load_is_not_cached():
+    async def scenario():
+        cache, started, release = _cache(), asyncio.Event(), asyncio.Event()
+        loads = []
+
+        async def load():
+            loads.append(1)
+            started.set()
+            await release.wait()
+            return {"version": len(loads)}
+
+        pending = asyncio.create_task(cache.get("students", "s1", load))
+        await started.wait()
+        await cache.invalidate("students", "s1")
+        release.set()
+        stale = await pending
+        fresh = await cache.get("students", "s1", load)
+        return stale, fresh, len(loads), cache._generations, cache._loading
+
+    stale, fresh, loads, generations, loading = asyncio.run(scenario())
+    assert stale == {"version": 1}
+    assert fresh == {"version": 2}
+    assert loads == 2
+    assert generations == {} and loading == {}
+
+
+def test_generations_are_not_kept_for_idle_keys():
+    async def scenario():
+        cache = _cache()
+
+        async def load():
+            return {"ok": True}
+
+        for i in range(100):
+            await cache.get("students", f"s{i}", load)
+            await cache.invalidate("students", f"s{i}")
+        return cache._generations, cache._loading
+
+    assert asyncio.run(scenario()) == ({}, {})
@@ -0,0 +1,17 @@
+import pytest
+
+from services.serialization import accepts_msgpack
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/msgpack", True),
+    ("application/json, application/x-msgpack;q=0.5", True),
+    ("application/msgpack;q=0", False),
+    ("application/msgpack; Q=0", False),
+    ("Application/MsgPack;Q=0.0", False),
+    ("application/msgpack;q=abc", False),
+    ("application/json", False),
+    ("", False),
+])
+def test_accepts_msgpack(accept, expected):
+    assert accepts_msgpack(accept) is expected
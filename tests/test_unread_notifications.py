@@ -0,0 +1,149 @@
+import asyncio
+import uuid
+
+from database import repository, unread_notifications
+
+
+def _notification(recipient_id: str, created_at: str, read: bool = False) -> dict:
+    return {"id": uuid.uuid4().hex, "student_id": recipient_id, "created_at": created_at, "read": read}
+
+
+async def _write(notifications: list):
+    """Notifications with their unread entries, as NotificationWriter commits them"""
+    await repository.update_multi({
+        **{f"notifications/{notification['id']}": notification for notification in notifications},
+        **unread_notifications.created_entries(notifications)
+    })
+
+
+async def _state(recipient_id: str):
+    return (await unread_notifications.get_count(recipient_id),
+            set(await repository.keys(f"{unread_notifications.UNREAD_BY_RECIPIENT}/{recipient_id}")))
+
+
+def test_created_entries_count_once_per_recipient():
+    async def scenario():
+        recipient_id = uuid.uuid4().hex
+        notifications = [_notification(recipient_id, f"2024-01-01T00:00:0{i}") for i in range(3)]
+        notifications.append(_notification(recipient_id, "2024-01-01T00:00:09", read=True))
+        await _write(notifications)
+        await _write([_notification(recipient_id, "2024-01-02T00:00:00")])
+        return await _state(recipient_id), notifications
+
+    (count, unread), notifications = asyncio.run(scenario())
+    assert count == 4
+    assert {notification["id"] for notification in notifications[:3]} <= unread
+    assert notifications[3]["id"] not in unread
+
+
+def test_double_mark_read_decrements_once():
+    async def scenario():
+        recipient_id = uuid.uuid4().hex
+        notifications = [_notification(recipient_id, f"2024-01-01T00:00:0{i}") for i in range(3)]
+        await _write(notifications)
+        first = await unread_notifications.mark_read(recipient_id, [notifications[0]["id"], notifications[0]["id"]])
+        second = await unread_notifications.mark_read(recipient_id, [notifications[0]["id"], notifications[1]["id"]])
+        # Ids inconnus ou d'un autre destinataire : ignorés
+        other = await unread_notifications.mark_read(uuid.uuid4().hex, [notifications[2]["id"]])
+        unknown = await unread_notifications.mark_read(recipient_id, ["missing"])
+        body = await repository.get(f"notifications/{notifications[0]['id']}")
+        return (first, second, other, unknown), await _state(recipient_id), body, notifications
+
+    marked, (count, unread), body, notifications = asyncio.run(scenario())
+    assert marked == (1, 1, 0, 0)
+    assert count == 1
+    assert unread == {notifications[2]["id"]}
+    assert body["read"] is True
+
+
+def test_concurrent_mark_read_of_the_same_ids():
+    async def scenario():
+        recipient_id = uuid.uuid4().hex
+        notifications = [_notification(recipient_id, f"2024-01-01T00:00:0{i}") for i in range(4)]
+        await _write(notifications)
+        ids = [notification["id"] for notification in notifications[:3]]
+        marked = await asyncio.gather(*(unread_notifications.mark_read(recipient_id, ids) for _ in range(5)))
+        return marked, await _state(recipient_id)
+
+    marked, (count, unread) = asyncio.run(scenario())
+    assert sorted(marked) == [0, 0, 0, 0, 3]
+    assert count == 1 and len(unread) == 1
+
+
+def test_mark_read_before_excludes_the_boundary():
+    async def scenario():
+        recipient_id = uuid.uuid4().hex
+        created = ["2024-01-01T00:00:00", "2024-01-02T00:00:00", "2024-01-02T00:00:00", "2024-01-03T00:00:00"]
+        notifications = [_notification(recipient_id, created_at) for created_at in created]
+        await _write(notifications)
+        marked = await unread_notifications.mark_read_before(recipient_id, "2024-01-02T00:00:00")
+        again = await unread_notifications.mark_read_before(recipient_id, "2024-01-02T00:00:00")
+        return (marked, again), await _state(recipient_id), notifications
+
+    (marked, again), (count, unread), notifications = asyncio.run(scenario())
+    assert (marked, again) == (1, 0)
+    assert count == 3
+    assert unread == {notification["id"] for notification in notifications[1:]}
+
+
+def test_mark_read_before_limit_marks_the_oldest():
+    async def scenario():
+        recipient_id = uuid.uuid4().hex
+        notifications = [_notification(recipient_id, f"2024-01-01T00:00:0{i}") for i in range(5)]
+        await _write(notifications)
+        marked = await unread_notifications.mark_read_before(recipient_id, "2024-02-01T00:00:00", limit=2)
+        return marked, await _state(recipient_id), notifications
+
+    marked, (count, unread), notifications = asyncio.run(scenario())
+    assert marked == 2
+    assert count == 3
+    assert unread == {notification["id"] for notification in notifications[2:]}
+
+
+def test_recount_repairs_drifted_counters():
+    async def scenario():
+        recipient_id = uuid.uuid4().hex
+        notifications = [_notification(recipient_id, f"2024-01-01T00:00:0{i}") for i in range(3)]
+        notifications.append(_notification(recipient_id, "2024-01-01T00:00:09", read=True))
+        await _write(notifications)
+        # Compteur faussé et entrée d'index orpheline
+        await repository.update_multi({
+            f"{unread_notifications.UNREAD_COUNTS}/{recipient_id}": -7,
+            f"{unread_notifications.UNREAD_BY_RECIPIENT}/{recipient_id}/ghost": "2024-01-01T00:00:00"
+        })
+        await unread_notifications.recount()
+        return await _state(recipient_id), notifications
+
+    (count, unread), notifications = asyncio.run(scenario())
+    assert count == 3
+    assert unread == {notification["id"] for notification in notifications[:3]}
+
+
+def test_writer_retry_after_applied_write_counts_once(monkeypatch):
+    from database.notification_writer import NotificationWriter
+
+    update_multi = repository.update_multi
+    calls = []
+
+    async def applied_then_timeout(updates):
+        # L'écriture est appliquée mais la réponse se perd
+        calls.append(updates)
+        await update_multi(updates)
+        if len(calls) == 1:
+            raise repository.DatabaseTimeoutError("timeout")
+
+    async def scenario():
+        recipient_id = uuid.uuid4().hex
+        writer = NotificationWriter(max_retries=2, retry_backoff=0)
+        for i in range(3):
+            writer.add("student_id", recipient_id, "test", f"message {i}")
+        monkeypatch.setattr(repository, "update_multi", applied_then_timeout)
+        written = await writer.flush()
+        monkeypatch.setattr(repository, "update_multi", update_multi)
+        return written, await _state(recipient_id), writer.failed
+
+    written, (count, unread), failed = asyncio.run(scenario())
+    assert written == 3
+    assert len(calls) == 1
+    assert count == 3 and len(unread) == 3
+    assert failed == []